@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+from ..schemas.user_schema import Principal
+from ..config import (
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+    PRINCIPAL_CACHE_MAX_ENTRIES,
+    PRINCIPAL_CACHE_REDIS_TIMEOUT_SECONDS,
+    PRINCIPAL_CACHE_REDIS_BACKOFF_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PATTERN = "auth_principal:{}"
+
+
+def _principal_redis_client() -> redis.Redis:
+    """
+    Own pool with short timeouts: the shared client waits up to 5s per call,
+    which would make an unreachable Redis slower than not caching at all.
+    """
+    return redis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        db=int(os.getenv("REDIS_DB", 0)),
+        password=os.getenv("REDIS_PASSWORD", None),
+        username=os.getenv("REDIS_USERNAME", None),
+        max_connections=20,
+        decode_responses=True,
+        socket_timeout=PRINCIPAL_CACHE_REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=PRINCIPAL_CACHE_REDIS_TIMEOUT_SECONDS,
+    )
+
+
+class PrincipalCache:
+    """
+    Authenticated principal by user id, in-process and in Redis.
+
+    invalidate() deletes the Redis copy and this worker's copy; other workers
+    may keep serving their local copy for up to `local_ttl` seconds, so that TTL
+    is kept short.
+
+    After a Redis error the shared level is skipped for `redis_backoff` seconds,
+    so an outage costs one short timeout per worker rather than one per request.
+    """
+
+    def __init__(self, local_ttl: int, redis_ttl: int, max_entries: int, redis_backoff: float = 30.0):
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.max_entries = max_entries
+        self.redis_backoff = redis_backoff
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis: redis.Redis | None = None
+        self._redis_down_until = 0.0
+
+    def _shared(self) -> redis.Redis | None:
+        """The Redis client, or None while backing off after a failure."""
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = _principal_redis_client()
+        return self._redis
+
+    def _redis_failed(self, action: str, error: Exception) -> None:
+        self._redis_down_until = time.monotonic() + self.redis_backoff
+        logger.warning(f"Principal cache Redis {action} failed, skipping Redis for {self.redis_backoff:.0f}s: {error}")
+
+    def get_local(self, user_id: int) -> Principal | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def get_shared(self, user_id: int) -> Principal | None:
+        """Redis lookup; a hit is copied into the local level."""
+        client = self._shared()
+        if client is None:
+            return None
+        try:
+            raw = client.get(REDIS_KEY_PATTERN.format(user_id))
+        except Exception as e:
+            self._redis_failed("read", e)
+            return None
+        if not raw:
+            return None
+        principal = Principal.model_validate_json(raw)
+        self._put_local(principal)
+        return principal
+
+    def get(self, user_id: int) -> Principal | None:
+        return self.get_local(user_id) or self.get_shared(user_id)
+
+    def set(self, principal: Principal) -> None:
+        self._put_local(principal)
+        client = self._shared()
+        if client is None:
+            return
+        try:
+            client.setex(REDIS_KEY_PATTERN.format(principal.id), self.redis_ttl, principal.model_dump_json())
+        except Exception as e:
+            self._redis_failed("write", e)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+        # deletes ignore the backoff: a stale copy in Redis would outlive the outage
+        if self._redis is None:
+            self._redis = _principal_redis_client()
+        try:
+            self._redis.delete(REDIS_KEY_PATTERN.format(user_id))
+        except Exception as e:
+            self._redis_failed("delete", e)
+
+    def _put_local(self, principal: Principal) -> None:
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.local_ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+principal_cache = PrincipalCache(
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+    PRINCIPAL_CACHE_MAX_ENTRIES,
+    PRINCIPAL_CACHE_REDIS_BACKOFF_SECONDS
+)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Call after changing a user's role, active flag, onboarding state or password."""
+    principal_cache.invalidate(user_id)
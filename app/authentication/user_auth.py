@@ -1,15 +1,19 @@
 import jwt
 from jwt.exceptions import ExpiredSignatureError, PyJWTError
 from fastapi import Depends, status, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from ..schemas import user_schema
 from ..models import user_model
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..utils.hashing import verify_password
 from typing import Optional, Annotated
 from datetime import datetime, timedelta, timezone
 from ..config import JWT_SECRET_KEY
+from .principal_cache import principal_cache
 
 
 SECRET_KEY = JWT_SECRET_KEY
@@ -43,10 +47,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encode_jwt
 
 
-def get_current_user(
-    db: Annotated[Session, Depends(get_db)],
-    token: str = Depends(oauth2_schema),
-) -> user_model.User:
+def _decode_access_token(token: str) -> user_schema.TokenData:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -60,7 +61,7 @@ def get_current_user(
         if user_id is None:
             raise credentials_exception from None
 
-        token_data = user_schema.TokenData(id=user_id)
+        return user_schema.TokenData(id=user_id)
 
     except ExpiredSignatureError as e:
         raise HTTPException(
@@ -72,14 +73,105 @@ def get_current_user(
     except PyJWTError as e:
         raise credentials_exception from e
 
+
+def get_current_user(
+    db: Annotated[Session, Depends(get_db)],
+    token: str = Depends(oauth2_schema),
+) -> user_model.User:
+    token_data = _decode_access_token(token)
+
     user = db.query(user_model.User).filter(user_model.User.id == token_data.id).first()
     if user is None:
-        raise credentials_exception from None
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from None
+
+    return user
+
+
+async def get_current_user_async(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    token: str = Depends(oauth2_schema),
+) -> user_model.User:
+    """Same as get_current_user, for `async def` routes using AsyncSession."""
+    token_data = _decode_access_token(token)
+
+    user = await db.get(user_model.User, token_data.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from None
 
     return user
 
 
 
+def _principal_from_user(user: user_model.User | None) -> user_schema.Principal:
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from None
+
+    return user_schema.Principal(
+        id=user.id,
+        role=user.role or "user",
+        is_active=bool(user.is_active),
+        is_onboarded=bool(user.onboarding and user.onboarding.is_onboarded)
+    )
+
+
+def get_current_principal(
+    db: Annotated[Session, Depends(get_db)],
+    token: str = Depends(oauth2_schema),
+) -> user_schema.Principal:
+    """
+    Lightweight current user for routes that only need id / role / flags.
+    Served from the principal cache; the users table is only hit on a miss.
+    """
+    token_data = _decode_access_token(token)
+
+    principal = principal_cache.get(token_data.id)
+    if principal is None:
+        user = (
+            db.query(user_model.User)
+            .options(joinedload(user_model.User.onboarding))
+            .filter(user_model.User.id == token_data.id)
+            .first()
+        )
+        principal = _principal_from_user(user)
+        principal_cache.set(principal)
+
+    return principal
+
+
+async def get_current_principal_async(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    token: str = Depends(oauth2_schema),
+) -> user_schema.Principal:
+    """Same as get_current_principal, for `async def` routes using AsyncSession."""
+    token_data = _decode_access_token(token)
+
+    principal = principal_cache.get_local(token_data.id)
+    if principal is None:
+        principal = await run_in_threadpool(principal_cache.get_shared, token_data.id)
+    if principal is None:
+        user = await db.scalar(
+            select(user_model.User)
+            .options(joinedload(user_model.User.onboarding))
+            .where(user_model.User.id == token_data.id)
+        )
+        principal = _principal_from_user(user)
+        await run_in_threadpool(principal_cache.set, principal)
+
+    return principal
+
+
 def get_current_active_user(
     current_user: Annotated[user_model.User, Depends(get_current_user)],
 ):
@@ -109,8 +201,8 @@ def update_user(db: Session, user_id: int, update_data: dict):
         
 
 def get_current_admin_user(
-        current_user: Annotated[user_model.User, Depends(get_current_user)]
-) -> user_model.User:
+        current_user: Annotated[user_schema.Principal, Depends(get_current_principal)]
+) -> user_schema.Principal:
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,12 +1,28 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL")
+# Optional override; derived from SQLALCHEMY_DATABASE_URL (asyncpg driver) when unset
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_SQLALCHEMY_DATABASE_URL")
+
+# Connection pool settings, applied to both the sync and the async engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ("true", "1", "yes")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 
+# Cache of the authenticated principal (id, role, flags) looked up on every request
+PRINCIPAL_CACHE_LOCAL_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL_SECONDS", 15))
+PRINCIPAL_CACHE_REDIS_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL_SECONDS", 120))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
+# Redis is optional on this path: short socket timeouts, and Redis is skipped for a while after a failure
+PRINCIPAL_CACHE_REDIS_TIMEOUT_SECONDS = float(os.getenv("PRINCIPAL_CACHE_REDIS_TIMEOUT_SECONDS", 0.1))
+PRINCIPAL_CACHE_REDIS_BACKOFF_SECONDS = float(os.getenv("PRINCIPAL_CACHE_REDIS_BACKOFF_SECONDS", 30))
+
 
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
@@ -34,11 +50,95 @@ DOMAIN=os.getenv("DOMAIN")
 
 GROQ_API_KEY=os.getenv("GROQ_API_KEY")
 HF_TOKEN=os.getenv("HF_TOKEN")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+# LLM gateway (app.services.llm_gateway): "groq", or "stub" for tests and load runs
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+# Retries on 429 / 5xx / connection errors, with jittered exponential backoff from this base
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 0.5))
+LLM_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LLM_DEFAULT_TIMEOUT_SECONDS", 30))
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", 0))
+# Fraction of LLM calls (prompt + output) appended to LLM_LOG_PATH as JSONL; 0 disables
+LLM_LOG_SAMPLE_RATE = float(os.getenv("LLM_LOG_SAMPLE_RATE", 0))
+LLM_LOG_PATH = os.getenv("LLM_LOG_PATH", "./logs/llm_calls.jsonl")
+# When set, GET /metrics/prometheus requires "Authorization: Bearer <token>"
+PROMETHEUS_SCRAPE_TOKEN = os.getenv("PROMETHEUS_SCRAPE_TOKEN")
 
 EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "exercises.csv")
 
 
-groq_client = OpenAI(
-    api_key=os.getenv("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1",
-)
\ No newline at end of file
+# Exercise retrieval (embedding model + Chroma store), loaded lazily on first use
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db_exercise")
+CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "iron_ready_exercises")
+RETRIEVER_TOP_K = int(os.getenv("RETRIEVER_TOP_K", 8))
+# MMR candidate pool and relevance/diversity trade-off (1.0 = pure relevance)
+RETRIEVER_FETCH_K = int(os.getenv("RETRIEVER_FETCH_K", 30))
+RETRIEVER_MMR_LAMBDA = float(os.getenv("RETRIEVER_MMR_LAMBDA", 0.5))
+# Fewer than this many filtered hits relaxes the filter (skill first, then sport)
+RETRIEVER_MIN_FILTERED_RESULTS = int(os.getenv("RETRIEVER_MIN_FILTERED_RESULTS", 4))
+PRELOAD_RETRIEVER = os.getenv("PRELOAD_RETRIEVER", "False").lower() in ("true", "1", "yes")
+# "chroma" queries the collection; "numpy" searches an in-process matrix exported by the indexer
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", os.path.join(CHROMA_PERSIST_DIR, "numpy_index"))
+# Memory-map the exported matrix so every worker shares the same pages
+NUMPY_INDEX_MMAP = os.getenv("NUMPY_INDEX_MMAP", "True").lower() in ("true", "1", "yes")
+# e.g. http://127.0.0.1:8765 — when set, workers embed through the shared sidecar instead of loading the model
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL")
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", 10))
+EMBEDDING_SIDECAR_HOST = os.getenv("EMBEDDING_SIDECAR_HOST", "127.0.0.1")
+EMBEDDING_SIDECAR_PORT = int(os.getenv("EMBEDDING_SIDECAR_PORT", 8765))
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", 256))
+# Documents embedded / upserted per batch by the incremental indexer (app.services.exercise_rag)
+EXERCISE_INDEX_BATCH_SIZE = int(os.getenv("EXERCISE_INDEX_BATCH_SIZE", 64))
+# Re-embed exercises in the background when admins create/edit/delete them
+EXERCISE_INDEX_SYNC_ENABLED = os.getenv("EXERCISE_INDEX_SYNC_ENABLED", "True").lower() in ("true", "1", "yes")
+
+
+# Cache of generated week plans keyed by a bucketed onboarding profile
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "True").lower() in ("true", "1", "yes")
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", 512))
+PLAN_CACHE_USE_REDIS = os.getenv("PLAN_CACHE_USE_REDIS", "True").lower() in ("true", "1", "yes")
+
+
+# Plan engine: "llm" (retrieval + Groq) or "rules" (app.services.rule_based_plan, no model call).
+# Both tiers default to "llm"; "rules" is opt-in per request or by setting a tier default here
+PLAN_ENGINE_FREE_TIER_DEFAULT = os.getenv("PLAN_ENGINE_FREE_TIER_DEFAULT", "llm")
+PLAN_ENGINE_PREMIUM_DEFAULT = os.getenv("PLAN_ENGINE_PREMIUM_DEFAULT", "llm")
+# Fall back to the rule-based engine when the LLM call fails or exceeds PLAN_LLM_TIMEOUT_SECONDS
+PLAN_ENGINE_RULES_FALLBACK = os.getenv("PLAN_ENGINE_RULES_FALLBACK", "True").lower() in ("true", "1", "yes")
+PLAN_LLM_TIMEOUT_SECONDS = float(os.getenv("PLAN_LLM_TIMEOUT_SECONDS", 30))
+# Days lost to truncated/invalid LLM output are regenerated only if this much of the timeout is left
+PLAN_REPAIR_MIN_SECONDS = float(os.getenv("PLAN_REPAIR_MIN_SECONDS", 5))
+# Approximate token budget for the exercise table sent to the model (app.services.plan_context)
+PLAN_CONTEXT_TOKEN_BUDGET = int(os.getenv("PLAN_CONTEXT_TOKEN_BUDGET", 600))
+# Same, for regenerating a few days of an existing week (POST /workouts/regenerate)
+PLAN_DAY_CONTEXT_TOKEN_BUDGET = int(os.getenv("PLAN_DAY_CONTEXT_TOKEN_BUDGET", 300))
+# Superseded plan versions kept per user besides the current one; older ones move to workout_plans_archive
+PLAN_VERSIONS_RETAINED = int(os.getenv("PLAN_VERSIONS_RETAINED", 2))
+# Plan retention interval in seconds (0 disables the in-process loop)
+PLAN_RETENTION_INTERVAL_SECONDS = int(os.getenv("PLAN_RETENTION_INTERVAL_SECONDS", 24 * 3600))
+
+
+# Recovery tips fetched when a session is completed
+RECOVERY_TIP_CONCURRENCY = int(os.getenv("RECOVERY_TIP_CONCURRENCY", 4))
+RECOVERY_TIP_TIMEOUT_SECONDS = float(os.getenv("RECOVERY_TIP_TIMEOUT_SECONDS", 4))
+# "library": serve only pre-generated tips; "refresh": also call the LLM for combos missing from the library
+RECOVERY_TIP_MODE = os.getenv("RECOVERY_TIP_MODE", "library").lower()
+RECOVERY_TIP_LIBRARY_RELOAD_SECONDS = int(os.getenv("RECOVERY_TIP_LIBRARY_RELOAD_SECONDS", 3600))
+RECOVERY_TIPS_PER_COMBO = int(os.getenv("RECOVERY_TIPS_PER_COMBO", 5))
+
+
+# Admin dashboard statistics: full recompute interval in seconds (0 disables the in-process loop)
+DASHBOARD_RECONCILE_INTERVAL_SECONDS = int(os.getenv("DASHBOARD_RECONCILE_INTERVAL_SECONDS", 3600))
+
+
+# Background workout plan generation (POST /workouts/generate/async)
+WORKOUT_GENERATION_WORKERS = int(os.getenv("WORKOUT_GENERATION_WORKERS", 4))
+WORKOUT_GENERATION_MAX_PENDING = int(os.getenv("WORKOUT_GENERATION_MAX_PENDING", 32))
+# Pending/running jobs older than this are reported as failed (lost to a restart or crash)
+WORKOUT_GENERATION_JOB_TIMEOUT_SECONDS = int(os.getenv("WORKOUT_GENERATION_JOB_TIMEOUT_SECONDS", 600))
@@ -1,4 +1,6 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.notification_model import Notification
 from ..schemas.notification_schema import NotificationCreate
 
@@ -36,4 +38,14 @@ def mark_notification_read(db: Session, notification_id: int, user_id: int) -> N
     notification.is_read = True
     db.commit()
     db.refresh(notification)
-    return notification
\ No newline at end of file
+    return notification
+
+
+async def get_user_notifications_async(db: AsyncSession, user_id: int, unread_only: bool = False) -> list[Notification]:
+    stmt = select(Notification).where(Notification.user_id == user_id)
+
+    if unread_only:
+        stmt = stmt.where(Notification.is_read == False)
+
+    result = await db.scalars(stmt.order_by(Notification.created_at.desc()))
+    return list(result.all())
@@ -1,7 +1,9 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.recovery_model import Recovery
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 
 def update_recovery(
@@ -35,12 +37,63 @@ def update_recovery(
     return recovery
 
 
+def update_recoveries(
+    db: Session,
+    user_id: int,
+    status: str,
+    tips: Dict[str, str]
+) -> List[Recovery]:
+    """
+    Upsert recovery rows for several muscle groups in one transaction.
+
+    Args:
+        tips: muscle group -> tip
+    """
+    existing = {
+        recovery.muscle_group: recovery
+        for recovery in db.query(Recovery).filter(
+            Recovery.user_id == user_id,
+            Recovery.muscle_group.in_(list(tips))
+        ).all()
+    }
+
+    now = datetime.utcnow()
+    recoveries = []
+    for muscle_group, tip in tips.items():
+        recovery = existing.get(muscle_group)
+        if recovery:
+            recovery.status = status
+            recovery.tip = tip
+            recovery.last_updated = now
+        else:
+            recovery = Recovery(
+                user_id=user_id,
+                muscle_group=muscle_group,
+                status=status,
+                tip=tip,
+                last_updated=now
+            )
+            db.add(recovery)
+        recoveries.append(recovery)
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return recoveries
+
 
 
 def get_user_recoveries(db: Session, user_id: int) -> List[Recovery]:
     return db.query(Recovery).filter(Recovery.user_id == user_id).all()
 
 
+async def get_user_recoveries_async(db: AsyncSession, user_id: int) -> List[Recovery]:
+    result = await db.scalars(select(Recovery).where(Recovery.user_id == user_id))
+    return list(result.all())
+
+
 def calculate_recovery(last_workout_end_time: datetime | None) -> Tuple[str, str]:
     """
     Calculate muscle recovery status and a basic recovery tip based on last workout end time.
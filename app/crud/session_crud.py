@@ -1,9 +1,12 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 from ..models.session_model import WorkoutSession, SetLog 
-from ..schemas.session_schema import SessionCreate, SetLogCreate
+from ..schemas.session_schema import SessionCreate, SetLogCreate, SetLogSyncItem
 
 
 def create_session(db: Session, session_create: SessionCreate, user_id: int) -> WorkoutSession:
@@ -43,4 +46,64 @@ def create_set_log(db: Session, log_create: SetLogCreate, session_id: int) -> Se
     db.add(db_log)
     db.commit()
     db.refresh(db_log)
-    return db_log
\ No newline at end of file
+    return db_log
+
+
+
+async def create_session_async(db: AsyncSession, session_create: SessionCreate, user_id: int) -> WorkoutSession:
+    db_session = WorkoutSession(
+        user_id=user_id,
+        workout_id=session_create.workout_id,
+        start_time=datetime.utcnow(),
+        completed=False
+    )
+    db.add(db_session)
+    await db.commit()
+    await db.refresh(db_session)
+    return db_session
+
+
+async def create_set_log_async(db: AsyncSession, log_create: SetLogCreate, session_id: int) -> SetLog:
+    db_log = SetLog(
+        session_id=session_id,
+        exercise_name=log_create.exercise_name,
+        set_number=log_create.set_number,
+        reps_done=log_create.reps_done,
+        weight_used=log_create.weight_used,
+        notes=log_create.notes
+    )
+    db.add(db_log)
+    await db.commit()
+    await db.refresh(db_log)
+    return db_log
+
+
+async def create_set_logs_bulk_async(db: AsyncSession, logs: List[SetLogCreate], session_id: int) -> List[SetLog]:
+    """Insert all sets with one multi-row INSERT ... RETURNING and a single commit."""
+    rows = [{**log.model_dump(), "session_id": session_id} for log in logs]
+    result = await db.scalars(insert(SetLog).returning(SetLog, sort_by_parameter_order=True), rows)
+    db_logs = list(result.all())
+    await db.commit()
+    return db_logs
+
+
+async def sync_set_logs_async(db: AsyncSession, logs: List[SetLogSyncItem], session_id: int) -> List[SetLog]:
+    """
+    Idempotent variant of create_set_logs_bulk_async: rows whose client_id is
+    already stored for the session are skipped (ON CONFLICT DO NOTHING).
+    Returns only the rows inserted by this call.
+    """
+    rows = {}
+    for log in logs:
+        rows.setdefault(log.client_id, {**log.model_dump(), "session_id": session_id})
+
+    stmt = (
+        pg_insert(SetLog)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=[SetLog.session_id, SetLog.client_id])
+        .returning(SetLog)
+    )
+    result = await db.scalars(stmt)
+    db_logs = list(result.all())
+    await db.commit()
+    return db_logs
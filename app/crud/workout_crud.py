@@ -1,4 +1,6 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from ..models.workout_model import WorkoutPlan
 
@@ -11,12 +13,34 @@ def get_workout_plans(
     week: Optional[int] = None
 ) -> List[WorkoutPlan]:
     """
-    Get all workout plans for a specific user.
-    Supports optional pagination and week filter.
+    Get the current workout plan rows for a specific user.
+    Supports optional pagination and week (ISO week number) filter.
     """
-    query = db.query(WorkoutPlan).filter(WorkoutPlan.user_id == user_id)
+    query = db.query(WorkoutPlan).filter(
+        WorkoutPlan.user_id == user_id,
+        WorkoutPlan.is_current.is_(True)
+    )
 
     if week is not None:
         query = query.filter(WorkoutPlan.week == week)
 
-    return query.offset(skip).limit(limit).all()
\ No newline at end of file
+    return query.order_by(WorkoutPlan.plan_datetime).offset(skip).limit(limit).all()
+
+
+async def get_workout_plans_async(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    week: Optional[int] = None
+) -> List[WorkoutPlan]:
+    stmt = select(WorkoutPlan).where(
+        WorkoutPlan.user_id == user_id,
+        WorkoutPlan.is_current.is_(True)
+    )
+
+    if week is not None:
+        stmt = stmt.where(WorkoutPlan.week == week)
+
+    result = await db.scalars(stmt.order_by(WorkoutPlan.plan_datetime).offset(skip).limit(limit))
+    return list(result.all())
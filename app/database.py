@@ -3,14 +3,57 @@ import redis
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from .config import SQLALCHEMY_DATABASE_URL
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from .config import (
+    SQLALCHEMY_DATABASE_URL,
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+from .utils.pool_metrics import PoolMetrics, instrumented_pool_class
 
 
 SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+def _to_async_url(url: str) -> str:
+    """Swap the sync postgres driver for asyncpg, e.g. postgresql+psycopg2:// -> postgresql+asyncpg://"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = ASYNC_SQLALCHEMY_DATABASE_URL or _to_async_url(SQLALCHEMY_DATABASE_URL)
+
+POOL_OPTIONS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=instrumented_pool_class(QueuePool, sync_pool_metrics),
+    **POOL_OPTIONS
+)
 seasionlocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+    **POOL_OPTIONS
+)
+async_sessionlocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 redis_client = None
@@ -21,6 +64,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Async counterpart of get_db for `async def` routes."""
+    async with async_sessionlocal() as db:
+        yield db
         
         
         
@@ -180,6 +229,14 @@ def init_redis():
     redis_session = RedisSession()
     return redis_session.client
 
+def get_pool_stats() -> list[dict]:
+    """Current usage and checkout wait metrics of both connection pools."""
+    return [
+        sync_pool_metrics.snapshot(engine.pool),
+        async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+    ]
+
+
 # Health check functions
 def check_database_health():
     """Check if database connection is healthy."""
@@ -1,14 +1,38 @@
 from fastapi import FastAPI, status, HTTPException
 from .database import Base, engine
-from .routers import register_user, user, forgot_password, admin_dashboard, onboarding, subscription, workout_plan, recoveries, notificatiions, exercise_router, recovery_router, sport_router, content_router
+from .routers import register_user, user, forgot_password, admin_dashboard, onboarding, subscription, workout_plan, recoveries, notificatiions, exercise_router, recovery_router, sport_router, content_router, metrics_router
 from fastapi import Request
 import stripe
-from .config import STRIPE_SECRET_KEY, STRIPE_WEBHOOK_SECRET
+from .config import STRIPE_SECRET_KEY, STRIPE_WEBHOOK_SECRET, PRELOAD_RETRIEVER
+from .services.generation_jobs import fail_stale_jobs, shutdown_generation_pool
+from .services.vector_store import warm_up_retriever
+from .services.exercise_index_sync import shutdown_index_sync
+from .services.dashboard_stats import start_reconciliation_loop, stop_reconciliation_loop
+from .services.plan_retention import run_backfill, start_retention_loop, stop_retention_loop
 
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
 
+
+@app.on_event("startup")
+def start_background_workers():
+    if PRELOAD_RETRIEVER:
+        warm_up_retriever()
+    fail_stale_jobs()
+    start_reconciliation_loop()
+    run_backfill()
+    start_retention_loop()
+
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    shutdown_generation_pool()
+    shutdown_index_sync()
+    stop_reconciliation_loop()
+    stop_retention_loop()
+
+
 @app.get('/health', status_code=status.HTTP_200_OK)
 def health():
     return HTTPException(
@@ -50,4 +74,5 @@ app.include_router(admin_dashboard.router)
 app.include_router(exercise_router.router)
 app.include_router(recovery_router.router)
 app.include_router(sport_router.router)
-app.include_router(content_router.router)
\ No newline at end of file
+app.include_router(content_router.router)
+app.include_router(metrics_router.router)
\ No newline at end of file
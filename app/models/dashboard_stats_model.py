@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Float, Date, DateTime
+from ..database import Base
+from datetime import datetime
+
+
+class DashboardCounter(Base):
+    """Precomputed admin dashboard totals, updated alongside the writes that change them."""
+    __tablename__ = "dashboard_counters"
+
+    name = Column(String(50), primary_key=True)  # total_users / premium_users / total_revenue
+    value = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class DailyRevenue(Base):
+    """Subscription revenue per UTC day; rolling 30-day windows are summed from these rows."""
+    __tablename__ = "daily_revenue"
+
+    day = Column(Date, primary_key=True)
+    amount = Column(Float, nullable=False, default=0.0)
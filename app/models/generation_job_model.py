@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey
+from ..database import Base
+from datetime import datetime
+
+
+class WorkoutGenerationJob(Base):
+    __tablename__ = "workout_generation_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending")  # pending / running / completed / failed
+    error = Column(String, nullable=True)
+    plan_ids = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
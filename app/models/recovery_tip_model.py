@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from ..database import Base
+from datetime import datetime
+
+
+class RecoveryTip(Base):
+    """Pre-generated tip pool served instead of calling the LLM per request."""
+    __tablename__ = "recovery_tips"
+
+    id = Column(Integer, primary_key=True, index=True)
+    muscle_group = Column(String, nullable=False)
+    recovery_status = Column(String, nullable=False)  # red / yellow / green
+    intensity = Column(String, nullable=False)  # intense / moderate / light
+    tip = Column(String, nullable=False)
+    source = Column(String, nullable=False, default="batch")  # batch / live
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_recovery_tips_lookup", "muscle_group", "recovery_status", "intensity"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, String, Float
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, String, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
@@ -21,6 +21,10 @@ class WorkoutSession(Base):
 
 class SetLog(Base):
     __tablename__ = "set_logs"
+    __table_args__ = (
+        # Offline sync retries: a client-generated id is stored at most once per session
+        UniqueConstraint("session_id", "client_id", name="uq_set_logs_session_client"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
@@ -29,5 +33,6 @@ class SetLog(Base):
     reps_done = Column(Integer, nullable=False)
     weight_used = Column(Float, nullable=True) 
     notes = Column(String, nullable=True)
+    client_id = Column(String(64), nullable=True)
 
     session = relationship("WorkoutSession", back_populates="set_logs")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -27,6 +27,14 @@ class TransactionStatus(str, PyEnum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Covers the revenue queries (status/type equality + created_at range) without heap reads
+        Index(
+            "ix_transactions_revenue",
+            "status", "type", "created_at",
+            postgresql_include=["amount", "currency"]
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     stripe_payment_intent_id = Column(String(100), nullable=True, unique=True, index=True)
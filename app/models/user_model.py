@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP, text, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP, text, DateTime, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 from cuid2 import Cuid
@@ -27,4 +27,9 @@ class User(Base):
     notifications = relationship("Notification", back_populates="user", order_by="Notification.created_at.desc()")
     reset_code = relationship("PasswordResetCode", back_populates="user")
     transactions = relationship("Transaction", back_populates="user", foreign_keys="Transaction.user_id")
-    activities = relationship("ActivityLog", back_populates="user", order_by="ActivityLog.created_at.desc()", lazy="dynamic")
\ No newline at end of file
+    activities = relationship("ActivityLog", back_populates="user", order_by="ActivityLog.created_at.desc()", lazy="dynamic")
+
+    __table_args__ = (
+        # newest-first admin listing and its keyset pagination
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
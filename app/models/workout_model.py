@@ -1,14 +1,22 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Boolean, Index, true, false
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
 
 class WorkoutPlan(Base):
     __tablename__ = "workout_plans"
+    __table_args__ = (
+        # The today/weekly view reads only the current version; superseded rows stay out of the index
+        Index(
+            "ix_workout_plans_current",
+            "user_id", "is_current", "day",
+            postgresql_where=Column("is_current") == true()
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    week = Column(Integer, default=1)
+    week = Column(Integer, default=1)  # ISO week number of plan_datetime
     day = Column(String, nullable=False)
     plan_datetime = Column(DateTime, nullable=False)
     muscle_group = Column(String, nullable=False)
@@ -19,6 +27,29 @@ class WorkoutPlan(Base):
     cool_down = Column(String, nullable=True)
     generated_at = Column(DateTime, default=datetime.utcnow)
     admin_edited = Column(Boolean, default=False)
+    # Rows saved by one generation share a version (uuid4 hex); only the latest version is current
+    plan_version_id = Column(String(32), nullable=True, index=True)
+    is_current = Column(Boolean, nullable=False, default=False, server_default=false())
 
     user = relationship("User", back_populates="workout_plans")
-    sessions = relationship("WorkoutSession", back_populates="workout")
\ No newline at end of file
+    sessions = relationship("WorkoutSession", back_populates="workout")
+
+
+class WorkoutPlanArchive(Base):
+    """Superseded plan rows moved out of workout_plans by app.services.plan_retention."""
+    __tablename__ = "workout_plans_archive"
+
+    id = Column(Integer, primary_key=True)  # id the row had in workout_plans
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    plan_version_id = Column(String(32), nullable=True)
+    day = Column(String, nullable=False)
+    plan_datetime = Column(DateTime, nullable=False)
+    muscle_group = Column(String, nullable=False)
+    duration = Column(Integer, nullable=False)
+    exercises = Column(JSON, nullable=False)
+    status = Column(String, nullable=False)
+    warm_up = Column(String, nullable=True)
+    cool_down = Column(String, nullable=True)
+    generated_at = Column(DateTime, nullable=True)
+    admin_edited = Column(Boolean, default=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,12 +1,16 @@
+import base64
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func, select, or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, or_, and_, tuple_
 from typing import Annotated, List
 from ..database import get_db
-from ..models import user_model, subs_model, transaction_model, activity_log
-from ..schemas.admin_schema import DashboardStats, RecentActivityItem, UserListItem, UserPage, SubscriptionInfo, OnboardingInfo
+from ..models import user_model, subs_model, activity_log, onboarding_model
+from ..schemas.admin_schema import DashboardStats, RecentActivityItem, UserListItem, UserPage, UserKeysetPage, SubscriptionInfo, OnboardingInfo, RevenueAnalytics, RevenueSummary, RevenueBucket
 from ..authentication.user_auth import get_current_admin_user
-from ..schemas.user_schema import UserBase
+from ..authentication.principal_cache import invalidate_principal
+from ..services.dashboard_stats import read_dashboard_stats
+from ..services.revenue_analytics import revenue_summary, revenue_series
+from ..schemas.user_schema import UserBase, Principal
 from datetime import datetime, timedelta
 from fastapi_pagination import Params
 from fastapi_pagination.ext.sqlalchemy import paginate
@@ -20,45 +24,19 @@ router = APIRouter(
 @router.get("/status", response_model=DashboardStats)
 def get_dashboard_stats(
     db: Annotated[Session, Depends(get_db)],
-    current_admin: Annotated[user_model.User, Depends(get_current_admin_user)]
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
 ):
     now = datetime.utcnow()
 
-    total_users = db.query(func.count(user_model.User.id.distinct())).scalar() or 0
-
-    premium_users = (
-        db.query(func.count(user_model.User.id.distinct()))
-        .join(subs_model.Subscription)
-        .filter(
-            subs_model.Subscription.status.in_([
-                subs_model.SubscriptionStatus.ACTIVE.value,
-                subs_model.SubscriptionStatus.PAST_DUE.value
-            ]),
-            subs_model.Subscription.cancel_at_period_end.is_(False)
-        )
-        .scalar() or 0
-    )
+    # Counters are maintained on write and reconciled periodically (services.dashboard_stats)
+    stats = read_dashboard_stats(db)
+    total_users = stats["total_users"]
+    premium_users = stats["premium_users"]
+    free_users = max(total_users - premium_users, 0)
 
-    free_users = total_users - premium_users
-
-    def get_revenue(start_date=None, end_date=None):
-        q = db.query(func.coalesce(func.sum(transaction_model.Transaction.amount), 0.0)).filter(
-            transaction_model.Transaction.amount > 0,
-            transaction_model.Transaction.status == transaction_model.TransactionStatus.COMPLETED.value,
-            transaction_model.Transaction.type.in_([
-                transaction_model.TransactionType.SUBSCRIPTION_PAYMENT.value,
-                transaction_model.TransactionType.SUBSCRIPTION_RENEWAL.value
-            ])
-        )
-        if start_date:
-            q = q.filter(transaction_model.Transaction.created_at >= start_date)
-        if end_date:
-            q = q.filter(transaction_model.Transaction.created_at < end_date)
-        return q.scalar() or 0.0
-    
-    total_revenue = get_revenue()
-    monthly_revenue = get_revenue(now - timedelta(days=30))
-    last_month_revenue = get_revenue(now - timedelta(days=60), now - timedelta(days=30))
+    total_revenue = stats["total_revenue"]
+    monthly_revenue = stats["monthly_revenue"]
+    last_month_revenue = stats["last_month_revenue"]
 
     recent_activities: List[RecentActivityItem] = []
 
@@ -102,20 +80,78 @@ def get_dashboard_stats(
     )
 
 
-
-@router.get("/", response_model=UserPage)
-def list_users(
+@router.get("/revenue", response_model=RevenueAnalytics)
+def get_revenue_analytics(
     db: Annotated[Session, Depends(get_db)],
-    admin: Annotated[user_model.User, Depends(get_current_admin_user)],
-    search: Annotated[str | None, Query(description="Search by name or email (partial match)")] = None,
-    params: Params = Depends()  
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)],
+    granularity: Annotated[str, Query(pattern="^(day|week|month)$")] = "day",
+    start: Annotated[datetime | None, Query(description="Inclusive; defaults to 90 days ago")] = None,
+    end: Annotated[datetime | None, Query(description="Exclusive; defaults to now")] = None
 ):
+    now = datetime.utcnow()
+    start = start or now - timedelta(days=90)
+    end = end or now
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+    return RevenueAnalytics(
+        granularity=granularity,
+        start=start,
+        end=end,
+        summary=RevenueSummary(**revenue_summary(db, now)),
+        series=[RevenueBucket(**bucket) for bucket in revenue_series(db, granularity, start, end)]
+    )
+
+
+
+def _user_list_stmt(search: str | None):
+    """
+    One row per user with exactly the columns UserListItem needs: onboarding is
+    joined directly, subscription is the user's most recent one.
+    """
+    latest = aliased(subs_model.Subscription)
+    latest_subscription_id = (
+        select(latest.id)
+        .where(latest.user_id == user_model.User.id)
+        .order_by(latest.created_at.desc())
+        .limit(1)
+        .correlate(user_model.User)
+        .scalar_subquery()
+    )
+
     stmt = (
-        select(user_model.User)
-        .outerjoin(subs_model.Subscription, user_model.User.subscription)
-        .order_by(user_model.User.created_at.desc())
+        select(
+            user_model.User.id,
+            user_model.User.name,
+            user_model.User.email,
+            user_model.User.is_active,
+            user_model.User.role,
+            user_model.User.created_at,
+            onboarding_model.Onboarding.id.label("onboarding_id"),
+            onboarding_model.Onboarding.age,
+            onboarding_model.Onboarding.gender,
+            onboarding_model.Onboarding.height_cm,
+            onboarding_model.Onboarding.weight_kg,
+            onboarding_model.Onboarding.sport_category,
+            onboarding_model.Onboarding.sport_sub_category,
+            subs_model.Subscription.status.label("subscription_status"),
+            subs_model.Subscription.current_period_end,
+            subs_model.Subscription.cancel_at_period_end,
+            subs_model.Subscription.plan_type,
+        )
+        .outerjoin(onboarding_model.Onboarding, onboarding_model.Onboarding.user_id == user_model.User.id)
+        .outerjoin(
+            subs_model.Subscription,
+            and_(
+                subs_model.Subscription.user_id == user_model.User.id,
+                subs_model.Subscription.id == latest_subscription_id
+            )
+        )
     )
+    return _filter_users(stmt, search)
 
+
+def _filter_users(stmt, search: str | None):
     if search:
         search_pattern = f"%{search}%"
         stmt = stmt.where(
@@ -124,45 +160,71 @@ def list_users(
                 user_model.User.email.ilike(search_pattern)
             )
         )
+    return stmt
 
-    page = paginate(db, stmt, params)
-
-    items = []
-    for user in page.items:
-        onboarding_info = None
-        if user.onboarding:
-            onboarding_info = OnboardingInfo(
-                age=user.onboarding.age,
-                gender=user.onboarding.gender,
-                height_cm=user.onboarding.height_cm,
-                weight_kg=user.onboarding.weight_kg
-            )
 
-        sub_info = None
-        if user.subscription:
-            sub_info = SubscriptionInfo(
-                status=user.subscription.status.value if user.subscription.status else "unknown",
-                plan_name=None, 
-                price=None,      
-                current_period_end=user.subscription.current_period_end,
-                cancel_at_period_end=user.subscription.cancel_at_period_end
-            )
+def _user_list_item(row) -> UserListItem:
+    onboarding_info = None
+    if row.onboarding_id is not None:
+        onboarding_info = OnboardingInfo(
+            age=row.age,
+            gender=row.gender,
+            height_cm=row.height_cm,
+            weight_kg=row.weight_kg,
+            sport_category=row.sport_category,
+            sport_sub_category=row.sport_sub_category
+        )
 
-        items.append(
-            UserListItem(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                is_active=user.is_active,
-                role=user.role,
-                created_at=user.created_at,
-                onboarding=onboarding_info,
-                subscription=sub_info
-            )
+    sub_info = None
+    if row.subscription_status is not None:
+        sub_info = SubscriptionInfo(
+            status=row.subscription_status.value,
+            current_period_end=row.current_period_end,
+            cancel_at_period_end=bool(row.cancel_at_period_end),
+            plan_type=row.plan_type
+        )
+
+    return UserListItem(
+        id=row.id,
+        name=row.name,
+        email=row.email,
+        is_active=row.is_active,
+        role=row.role,
+        created_at=row.created_at,
+        onboarding=onboarding_info,
+        subscription=sub_info
+    )
+
+
+def _encode_cursor(created_at: datetime, user_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{user_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
 
+
+@router.get("/", response_model=UserPage)
+def list_users(
+    db: Annotated[Session, Depends(get_db)],
+    admin: Annotated[Principal, Depends(get_current_admin_user)],
+    search: Annotated[str | None, Query(description="Search by name or email (partial match)")] = None,
+    params: Params = Depends()  
+):
+    stmt = _user_list_stmt(search).order_by(user_model.User.created_at.desc(), user_model.User.id.desc())
+    count_stmt = _filter_users(select(func.count(user_model.User.id)), search)
+
+    page = paginate(db, stmt, params, count_query=count_stmt, unwrap_mode="no-unwrap")
+
     return UserPage(
-        items=items,
+        items=[_user_list_item(row) for row in page.items],
         total=page.total,
         page=page.page,
         size=page.size,
@@ -170,12 +232,43 @@ def list_users(
     )
 
 
+@router.get("/users/keyset", response_model=UserKeysetPage)
+def list_users_keyset(
+    db: Annotated[Session, Depends(get_db)],
+    admin: Annotated[Principal, Depends(get_current_admin_user)],
+    search: Annotated[str | None, Query(description="Search by name or email (partial match)")] = None,
+    cursor: Annotated[str | None, Query(description="next_cursor from the previous page")] = None,
+    size: Annotated[int, Query(ge=1, le=100)] = 50
+):
+    """Newest-first user listing paginated by (created_at, id) instead of OFFSET, for deep pages."""
+    stmt = _user_list_stmt(search)
+
+    if cursor:
+        created_at, user_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(user_model.User.created_at, user_model.User.id) < (created_at, user_id))
+
+    rows = db.execute(
+        stmt.order_by(user_model.User.created_at.desc(), user_model.User.id.desc()).limit(size + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return UserKeysetPage(
+        items=[_user_list_item(row) for row in rows],
+        size=size,
+        next_cursor=next_cursor
+    )
+
+
 @router.put("/users/{user_id}", status_code=status.HTTP_200_OK)
 def edit_user(
     user_id: int,
     data: UserBase,
     db: Annotated[Session, Depends(get_db)],
-    current_admin: Annotated[user_model.User, Depends(get_current_admin_user)]
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
 ):
     user = db.query(user_model.User).filter(user_model.User.id == user_id).first()
     if not user:
@@ -187,6 +280,7 @@ def edit_user(
     user.email = data.email
     user.avatar_url = data.avatar_url
     db.commit()
+    invalidate_principal(user_id)
     return {
         "message": "User updated"
     }
@@ -196,7 +290,7 @@ def edit_user(
 def ban_user(
     user_id: int,
     db: Annotated[Session, Depends(get_db)],
-    current_admin: Annotated[user_model.User, Depends(get_current_admin_user)]
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
 ):
     user = db.query(user_model.User).filter(
         user_model.User.id == user_id
@@ -208,6 +302,7 @@ def ban_user(
         )
     user.is_active = False
     db.commit()
+    invalidate_principal(user_id)
     return {
         "message": "User banned" 
     }
\ No newline at end of file
@@ -5,7 +5,8 @@ from ..database import get_db
 from ..models.exercise_model import Exercise
 from ..schemas.exercise_schema import ExerciseCreate, ExerciseOut
 from ..authentication.user_auth import get_current_admin_user
-from ..models.user_model import User
+from ..schemas.user_schema import Principal
+from ..services.exercise_index_sync import enqueue_exercise_reindex
 import shutil
 import os
 
@@ -23,7 +24,7 @@ def create_exercise(
     exercise: ExerciseCreate,
     image: UploadFile = File(None),
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     if db.query(Exercise).filter(Exercise.name == exercise.name).first():
         raise HTTPException(
@@ -41,6 +42,7 @@ def create_exercise(
     db.add(new_ex)
     db.commit()
     db.refresh(new_ex)
+    enqueue_exercise_reindex(new_ex.id)
     return new_ex
 
 
@@ -55,7 +57,7 @@ def update_exercise(
     data: ExerciseCreate,
     image: UploadFile = File(None),
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     ex = db.query(Exercise).filter(
         Exercise.id == ex_id
@@ -77,6 +79,7 @@ def update_exercise(
 
     db.commit()
     db.refresh(ex)
+    enqueue_exercise_reindex(ex.id)
     return ex
 
 
@@ -85,7 +88,7 @@ def update_exercise(
 def delete_exercise(
     ex_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     ex = db.query(Exercise).filter(Exercise.id == ex_id).first()
     if not ex:
@@ -95,5 +98,6 @@ def delete_exercise(
         )
     db.delete(ex)
     db.commit()
+    enqueue_exercise_reindex(ex_id)
 
     
\ No newline at end of file
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta, timezone
 from typing import Annotated
 from ..utils import otp_and_mail, hashing
 from ..authentication.user_auth import get_current_user
+from ..authentication.principal_cache import invalidate_principal
 
 router = APIRouter(
     prefix="/forgot",
@@ -154,6 +155,7 @@ def update_password_without_token(
     
     try:
         db.commit()
+        invalidate_principal(user.id)
         
         user_session_key = redis_session.get_key("user_session: {}",user.id)
         redis_session.delete(user_session_key)
@@ -186,6 +188,7 @@ def update_password(
             detail="This user does not exist"
         )
     db.commit()
+    invalidate_principal(user.id)
 
     return {
         "status": "Success",
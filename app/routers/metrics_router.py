@@ -0,0 +1,69 @@
+import os
+import secrets
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import Annotated
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from ..authentication.user_auth import get_current_admin_user
+from ..schemas.user_schema import Principal
+from ..database import get_pool_stats
+from ..config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, PROMETHEUS_SCRAPE_TOKEN
+from ..services.plan_cache import get_plan_cache_stats
+from ..services.vector_store import get_retrieval_cache_stats
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics (Admin)"]
+)
+
+
+@router.get("/plan_cache", status_code=status.HTTP_200_OK)
+def plan_cache_stats(
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
+):
+    """Hit/miss counters of the workout plan cache in this worker."""
+    return get_plan_cache_stats()
+
+
+@router.get("/retrieval_cache", status_code=status.HTTP_200_OK)
+def retrieval_cache_stats(
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
+):
+    """Hit/miss counters of the exercise retrieval cache in this worker."""
+    return get_retrieval_cache_stats()
+
+
+@router.get("/db_pool", status_code=status.HTTP_200_OK)
+def db_pool_stats(
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
+):
+    """Checked-out / overflow connections and checkout wait histogram per pool."""
+    return {
+        "config": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+        },
+        "pools": get_pool_stats(),
+    }
+
+
+@router.get("/prometheus", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """
+    Prometheus exposition of the LLM metrics (latency, tokens, cost, cache lookups).
+    With PROMETHEUS_MULTIPROC_DIR set, samples from every worker are aggregated.
+    """
+    if PROMETHEUS_SCRAPE_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not secrets.compare_digest(authorization, f"Bearer {PROMETHEUS_SCRAPE_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid scrape token")
+
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,22 +1,22 @@
 from typing import Annotated, List
 from fastapi import Depends, APIRouter
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..authentication.user_auth import get_current_user
-from app.database import get_db
-from ..models.user_model import User
+from ..authentication.user_auth import get_current_principal_async
+from app.database import get_async_db
+from ..schemas.user_schema import Principal
 from ..schemas.notification_schema import NotificationOut
 from app.crud import notification_crud
 
 router = APIRouter()
 
 @router.get("/notifications", response_model=List[NotificationOut])
-def get_notifications(
-    current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+async def get_notifications(
+    current_user: Annotated[Principal, Depends(get_current_principal_async)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     unread_only: bool = False,
 ) -> List[NotificationOut]:
-    return notification_crud.get_user_notifications(
+    return await notification_crud.get_user_notifications_async(
         db=db,
         user_id=current_user.id,
         unread_only=unread_only
@@ -4,8 +4,9 @@ from sqlalchemy.orm import Session
 from ..utils.age_cal import calculate_age
 from ..database import get_db
 from typing import Annotated
-from ..authentication.user_auth import get_current_user
-from ..models.user_model import User
+from ..authentication.user_auth import get_current_principal
+from ..authentication.principal_cache import invalidate_principal
+from ..schemas.user_schema import Principal
 from ..schemas.onboarding_schema import SportCategorySelect, SportSubCategorySelect, PersonalInfo, OnboardingCompleteData
 from ..crud.onboarding_crud import get_or_create_onboarding
 
@@ -20,7 +21,7 @@ router = APIRouter(
 def select_sport_category(
     data: SportCategorySelect,
     db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     onboarding = get_or_create_onboarding(db, current_user.id)
     onboarding.sport_category = data.sport_category
@@ -39,7 +40,7 @@ def select_sport_category(
 def select_sport_sub_category(
     data: SportSubCategorySelect,
     db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     onboarding = get_or_create_onboarding(db, current_user.id)
     if onboarding.sport_category != "Combat":
@@ -60,7 +61,7 @@ def select_sport_sub_category(
 def update_personal_info(
     data: PersonalInfo,
     db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     onboarding = get_or_create_onboarding(db, current_user.id)
 
@@ -81,16 +82,20 @@ def update_personal_info(
 def complete_onboarding(
     data: OnboardingCompleteData,
     db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     onboarding = get_or_create_onboarding(db, current_user.id)
 
-    onboarding.strength_levels = data.strength_levels
+    strength_levels = dict(data.strength_levels)
+    if data.strength_unit:
+        strength_levels["unit"] = data.strength_unit
+    onboarding.strength_levels = strength_levels
     onboarding.training_days = data.training_days
     onboarding.is_onboarded = True
     onboarding.completed_at = datetime.utcnow()
 
     db.commit()
     db.refresh(onboarding)
+    invalidate_principal(current_user.id)
 
     return {"message": "Onboarding completed successfully"}
\ No newline at end of file
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..database import get_db
-from ..authentication.user_auth import get_current_user
+from ..database import get_async_db
+from ..authentication.user_auth import get_current_principal_async
 from ..schemas.recovery_schema import RecoveryOut
 from ..crud import recovery_crud
 from typing import Annotated
-from ..models.user_model import User
+from ..schemas.user_schema import Principal
 
 
 
@@ -17,11 +17,11 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[RecoveryOut], status_code=status.HTTP_200_OK)
-def get_recoveries(
-    db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+async def get_recoveries(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal_async)]
 ):
-    recoveries = recovery_crud.get_user_recoveries(db, current_user.id)
+    recoveries = await recovery_crud.get_user_recoveries_async(db, current_user.id)
     return recoveries
 
 
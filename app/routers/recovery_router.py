@@ -7,7 +7,7 @@ from ..models.exercise_recovery_model import ExerciseRecovery
 from ..models.exercise_model import Exercise 
 from ..schemas.exercise_recovery_schema import ExerciseRecoveryCreate, ExerciseRecoveryOut
 from ..authentication.user_auth import get_current_admin_user
-from ..models.user_model import User
+from ..schemas.user_schema import Principal
 
 
 
@@ -21,7 +21,7 @@ router = APIRouter(
 def assign_recovery(
     data: ExerciseRecoveryCreate,
     db: Annotated[Session, Depends(get_db)],
-    current_admin: Annotated[User, Depends(get_current_admin_user)]
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
 ):
     existing = db.query(ExerciseRecovery).filter(
         ExerciseRecovery.exercise_id == data.exercise_id
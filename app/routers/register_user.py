@@ -4,6 +4,7 @@ from ..schemas import user_schema
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..utils import hashing
+from ..services.dashboard_stats import record_user_registered
 from typing import Annotated
 
 
@@ -29,6 +30,7 @@ def create_user(
     user.password = hashed_password
     new_user = user_model.User(**user.model_dump())
     db.add(new_user)
+    record_user_registered(db)
     db.commit()
     db.refresh(new_user)
     return new_user
@@ -6,7 +6,8 @@ from ..models.exercise_model import Exercise
 from ..models.sport_model import Sport, sport_exercises
 from ..schemas.sport_schema import SportCreate, SportOut
 from ..authentication.user_auth import get_current_admin_user
-from ..models.user_model import User
+from ..schemas.user_schema import Principal
+from ..services.exercise_index_sync import enqueue_exercise_reindex
 
 
 router = APIRouter(
@@ -23,7 +24,7 @@ router = APIRouter(
 def create_sport(
     sport: SportCreate,
     db: Annotated[Session, Depends(get_db)],
-    current_admin: Annotated[User, Depends(get_current_admin_user)]
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
 ):
     if db.query(Sport).filter(Sport.name.ilike(sport.name)).first():
         raise HTTPException(
@@ -62,6 +63,8 @@ def create_sport(
 
     db.commit()
     db.refresh(new_sport)
+    # the sport category is part of each assigned exercise's indexed text
+    enqueue_exercise_reindex(*(sport.exercise_ids or []))
 
     return new_sport
 
@@ -9,8 +9,10 @@ from ..schemas.subs_schema import CreateSubscriptionRequest, SubscriptionRespons
 from ..models.transaction_model import Transaction, TransactionStatus, TransactionType
 from ..database import get_db
 from ..models.user_model import User
-from ..authentication.user_auth import get_current_user, get_current_admin_user
+from ..authentication.user_auth import get_current_user, get_current_principal, get_current_admin_user
+from ..schemas.user_schema import Principal
 from ..models.subs_model import Subscription, SubscriptionStatus
+from ..services.dashboard_stats import is_premium, record_subscription_change
 from ..config import (
     DOMAIN,
     STRIPE_SECRET_KEY,
@@ -130,7 +132,7 @@ async def get_checkout_session(sessionId: str):
 
 @router.post("/customer-portal")
 async def customer_portal(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: Annotated[Session, Depends(get_db)]
 ):
     sub = db.query(Subscription).filter(Subscription.user_id == current_user.id).first()
@@ -201,6 +203,8 @@ async def stripe_webhook(request: Request, db: Annotated[Session, Depends(get_db
             Subscription.stripe_subscription_id == sub_id
         ).first()
 
+        was_premium = bool(sub) and is_premium(sub.status, sub.cancel_at_period_end)
+
         if not sub:
         
             sub = Subscription(
@@ -219,6 +223,7 @@ async def stripe_webhook(request: Request, db: Annotated[Session, Depends(get_db
                 sub.current_period_end   = datetime.fromtimestamp(stripe_sub.current_period_end)   if stripe_sub.current_period_end   else None
             sub.stripe_customer_id = session.customer or sub.stripe_customer_id
             sub.updated_at = datetime.utcnow()
+            record_subscription_change(db, was_premium, is_premium(sub.status, sub.cancel_at_period_end))
             db.commit()
             logger.info(f"Subscription activated: {sub_id} | user: {user_id}")
 
@@ -229,6 +234,7 @@ async def stripe_webhook(request: Request, db: Annotated[Session, Depends(get_db
 
         sub = db.query(Subscription).filter(Subscription.stripe_subscription_id == sub_id).first()
         if sub:
+            was_premium = is_premium(sub.status, sub.cancel_at_period_end)
             if event.type == "invoice.paid":
                 sub.status = SubscriptionStatus.ACTIVE
             elif event.type == "invoice.payment_failed":
@@ -243,6 +249,7 @@ async def stripe_webhook(request: Request, db: Annotated[Session, Depends(get_db
                 sub.current_period_start = datetime.fromtimestamp(obj.current_period_start) if obj.current_period_start else None
                 sub.current_period_end   = datetime.fromtimestamp(obj.current_period_end)   if obj.current_period_end   else None
 
+            record_subscription_change(db, was_premium, is_premium(sub.status, sub.cancel_at_period_end))
             db.commit()
             logger.info(f"Updated sub {sub_id} via {event.type}")
 
@@ -254,7 +261,7 @@ async def stripe_webhook(request: Request, db: Annotated[Session, Depends(get_db
 
 @router.get("/me", response_model=SubscriptionResponse | dict)
 def get_my_subscription(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: Annotated[Session, Depends(get_db)]
 ):
     sub = db.query(Subscription).filter(Subscription.user_id == current_user.id).first()
@@ -268,7 +275,7 @@ def get_my_subscription(
 
 @router.post("/cancel", status_code=status.HTTP_200_OK)
 def cancel_subscription(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: Annotated[Session, Depends(get_db)]
 ):
     sub = db.query(Subscription).filter(Subscription.user_id == current_user.id).first()
@@ -278,7 +285,9 @@ def cancel_subscription(
     try:
         logger.info(f"Cancelling subscription {sub.id} for user {current_user.id}")
         stripe.Subscription.modify(sub.id, cancel_at_period_end=True)
+        was_premium = is_premium(sub.status, sub.cancel_at_period_end)
         sub.cancel_at_period_end = True
+        record_subscription_change(db, was_premium, False)
         db.commit()
         return {"message": "Subscription will cancel at end of period"}
     except stripe.error.StripeError as e:
@@ -302,7 +311,7 @@ def cancel_subscription(
 def withdraw_earnings(
     amount: float,
     db: Annotated[Session, Depends(get_db)],
-    current_admin: Annotated[User , Depends(get_current_admin_user)]
+    current_admin: Annotated[Principal, Depends(get_current_admin_user)]
 ):
     try:
         payout = stripe.Payout.create(amount=amount * 100, currency="usd")
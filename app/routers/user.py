@@ -42,7 +42,7 @@ def login_user_access_token(
 
 
 @router.get("/", status_code=status.HTTP_200_OK)
-def user_schemas(user: Annotated[User, Depends(user_auth.get_current_user)]):
+async def user_schemas(user: Annotated[User, Depends(user_auth.get_current_user_async)]):
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
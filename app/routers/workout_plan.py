@@ -1,6 +1,10 @@
+import json
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Annotated
 from ..schemas.body_diagram_schema import BodyDiagramResponse
 from app.models.session_model import WorkoutSession
@@ -8,17 +12,22 @@ from app.models.session_model import WorkoutSession
 from ..crud.notification_crud import create_notification
 from ..models.workout_model import WorkoutPlan
 from ..schemas.notification_schema import NotificationCreate
-from ..schemas.session_schema import SessionCreate, SessionOut, SetLogCreate, SetLogOut
+from ..schemas.session_schema import (
+    SessionCreate, SessionOut, SetLogCreate, SetLogOut,
+    SetLogBulkCreate, SetLogSyncRequest, SetLogSyncResponse
+)
 from ..schemas.training_schema import TrainingPlanDay, TrainingPlanResponse
-from ..database import get_db
-from ..authentication.user_auth import get_current_user
-from ..models.user_model import User
-from ..schemas.workout_schema import WorkoutPlanOut, WorkoutGenerateRequest
-from ..services.workout_service import generate_workout_plan_service
-from ..services.recovery_tip_service import generate_recovery_tip
+from ..database import get_db, get_async_db
+from ..authentication.user_auth import get_current_user, get_current_principal, get_current_principal_async
+from ..schemas.user_schema import Principal
+from ..schemas.workout_schema import WorkoutPlanOut, WorkoutGenerateRequest, WorkoutRegenerateRequest, GenerationJobOut
+from ..services.workout_service import (
+    generate_workout_plan_service, stream_workout_plan_service, regenerate_workout_days_service
+)
+from ..services import generation_jobs
+from ..services.recovery_tip_library import resolve_recovery_tips
 from ..crud import workout_crud, session_crud, recovery_crud, notification_crud
 from ..utils import recovery
-from ..config import groq_client
 import logging
 
 
@@ -41,7 +50,8 @@ def generate_workout_plan(
 ):  
     """
     - Requires user to be onboarded.
-    - Uses Groq API + RAG (Chroma DB with exercises.xlsx).
+    - Uses Groq API + RAG (Chroma DB with exercises.xlsx), or the rule-based engine
+      with {"request": {"engine": "rules"}} (default for free-tier users).
     - Body is optional — send {} or nothing.
     """
    
@@ -52,7 +62,7 @@ def generate_workout_plan(
         )
 
     try:
-        created_plans = generate_workout_plan_service(current_user, db)
+        created_plans = generate_workout_plan_service(current_user, db, request.engine if request else None)
         
         create_notification(
             db,
@@ -78,17 +88,156 @@ def generate_workout_plan(
         )
     
 
+@router.post(
+    "/regenerate",
+    status_code=status.HTTP_200_OK,
+    response_model=List[WorkoutPlanOut]
+)
+def regenerate_workout_days(
+    request: WorkoutRegenerateRequest,
+    current_user: Session = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    - Regenerates only the given days of the current week, e.g. {"days": ["Wednesday"]}.
+    - Each day's existing plan row is updated in place (same id), so the week
+      keeps one row per day; days without a row are created.
+    """
+    if not current_user.onboarding or not current_user.onboarding.is_onboarded:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must complete onboarding first."
+        )
+
+    try:
+        return regenerate_workout_days_service(
+            current_user, db, request.days, request.instructions, request.engine
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except RuntimeError as re:
+        logger.error(f"Runtime error during day regeneration for user {current_user.id}: {str(re)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(re))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post(
+    "/generate/stream",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse
+)
+def generate_workout_plan_stream(
+    request: Annotated[WorkoutGenerateRequest | None, Body(embed=True, description="No body required (empty {} acceptable)")] = None,
+    current_user: Session = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    - Same as POST /workouts/generate, streamed as Server-Sent Events.
+    - `day` events carry each saved WorkoutPlanOut as soon as the model finishes it,
+      then a single `done` (or `error`) event closes the stream.
+    """
+    if not current_user.onboarding or not current_user.onboarding.is_onboarded:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must complete onboarding first."
+        )
+
+    try:
+        events = stream_workout_plan_service(current_user, db, request.engine if request else None)
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except Exception as e:
+        logger.exception(f"Could not start streaming generation for user {current_user.id}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected error during plan generation: {str(e)}"
+        )
+
+    return StreamingResponse(
+        (_sse(event, data) for event, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post(
+    "/generate/async",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=GenerationJobOut
+)
+def generate_workout_plan_async(
+    request: Annotated[WorkoutGenerateRequest | None, Body(embed=True, description="No body required (empty {} acceptable)")] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    - Queues plan generation and returns a job id immediately.
+    - Poll GET /workouts/generate/{job_id} for status and the saved plans.
+    """
+    if not current_user.is_onboarded:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User must complete onboarding first."
+        )
+
+    try:
+        job = generation_jobs.enqueue_generation_job(db, current_user.id, request.engine if request else None)
+    except generation_jobs.GenerationQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "10"}
+        )
+
+    return GenerationJobOut(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at
+    )
+
+
+@router.get(
+    "/generate/{job_id}",
+    response_model=GenerationJobOut,
+    status_code=status.HTTP_200_OK
+)
+def get_generation_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    job = generation_jobs.get_generation_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation job not found."
+        )
+
+    return GenerationJobOut(
+        job_id=job.id,
+        status=job.status,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        plans=[WorkoutPlanOut.from_orm(p) for p in generation_jobs.get_job_plans(db, job)]
+    )
+
+
 # get all workouts for current user
 @router.get(
     "/", 
     response_model=List[WorkoutPlanOut],
     status_code=status.HTTP_200_OK
 )
-def get_workouts(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_workouts(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
 ):
-    plans = workout_crud.get_workout_plans(db, current_user.id)
+    plans = await workout_crud.get_workout_plans_async(db, current_user.id)
     
     if not plans:
         return []
@@ -98,22 +247,22 @@ def get_workouts(
 
 
 @router.get("/plan", response_model=TrainingPlanResponse)
-def get_training_plan(
+async def get_training_plan(
     view: Annotated[str, Query(pattern="^(today|weekly)$")] = "today",
-    db: Session = Depends(get_db),
-    current_user: Session = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
 ):
     today = datetime.utcnow().strftime("%A")
 
-    query = db.query(WorkoutPlan).filter(
+    stmt = select(WorkoutPlan).where(
         WorkoutPlan.user_id == current_user.id,
-        WorkoutPlan.week == 1
+        WorkoutPlan.is_current.is_(True)
     )
 
     if view == "today":
-        query = query.filter(WorkoutPlan.day == today)
+        stmt = stmt.where(WorkoutPlan.day == today)
 
-    plans = query.order_by(WorkoutPlan.day).all()
+    plans = (await db.scalars(stmt.order_by(WorkoutPlan.day))).all()
 
     if not plans:
         return TrainingPlanResponse(
@@ -163,15 +312,15 @@ def get_training_plan(
     response_model=SessionOut,
     status_code=status.HTTP_201_CREATED
 )
-def start_session(
+async def start_session(
     session: SessionCreate,
-    db: Session = Depends(get_db),
-    current_user:Session = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
 ):
-    workout = db.query(WorkoutPlan).filter(
+    workout = await db.scalar(select(WorkoutPlan).where(
         WorkoutPlan.id == session.workout_id,
         WorkoutPlan.user_id == current_user.id
-    ).first()
+    ))
 
     if not workout:
         raise HTTPException(
@@ -179,7 +328,7 @@ def start_session(
             detail="Workout plan not found or does not belong to you."
         )
 
-    return session_crud.create_session(db, session, current_user.id)
+    return await session_crud.create_session_async(db, session, current_user.id)
 
 
 @router.put(
@@ -190,7 +339,7 @@ def start_session(
 def complete_session(
     session_id: int,
     db: Session = Depends(get_db),
-    current_user:Session = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     session = session_crud.update_session_end(db, session_id)
     if not session:
@@ -216,21 +365,11 @@ def complete_session(
 
     muscle_groups = [m.strip() for m in workout.muscle_group.split(",") if m.strip()]
 
-    for muscle in muscle_groups:
-        recovery_status, base_tip = recovery_crud.calculate_recovery(session.end_time)  # ← recovery_status নাম change
-
-        try:
-            prompt = f"Give a short recovery tip for {muscle} muscle group after intense workout. Max 50 words. Make it actionable."
-            response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.6,
-                max_tokens=100
-            )
-            llm_tip = response.choices[0].message.content.strip()
-        except Exception:
-            llm_tip = base_tip
-        recovery_crud.update_recovery(db, current_user.id, muscle, recovery_status, llm_tip)
+    if muscle_groups:
+        recovery_status, base_tip = recovery_crud.calculate_recovery(session.end_time)
+        tips = resolve_recovery_tips(db, muscle_groups, recovery_status, base_tip)
+        recovery_crud.update_recoveries(db, current_user.id, recovery_status, tips)
+
     notification_crud.create_notification(
         db,
         NotificationCreate(
@@ -241,41 +380,97 @@ def complete_session(
 
     return session
 
+
+async def _get_open_session_async(
+    db: AsyncSession,
+    session_id: int,
+    user_id: int,
+    allow_completed: bool = False
+) -> WorkoutSession:
+    stmt = select(WorkoutSession).where(
+        WorkoutSession.id == session_id,
+        WorkoutSession.user_id == user_id
+    )
+    if not allow_completed:
+        stmt = stmt.where(WorkoutSession.completed == False)
+    session = await db.scalar(stmt)
+
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found or not yours." if allow_completed
+            else "Session not found, not yours, or already completed."
+        )
+    return session
+
+
 @router.post(
     "/sessions/{session_id}/logs",
     response_model=SetLogOut,
     status_code=status.HTTP_201_CREATED,
-
 )
-def log_set(
+async def log_set(
     session_id: int,
     log: SetLogCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
 ):
-    session = db.query(WorkoutSession).filter(  
-        WorkoutSession.id == session_id,
-        WorkoutSession.user_id == current_user.id,
-        WorkoutSession.completed == False
-    ).first()
+    await _get_open_session_async(db, session_id, current_user.id)
+    return await session_crud.create_set_log_async(db, log, session_id)
+
+
+@router.post(
+    "/sessions/{session_id}/logs/bulk",
+    response_model=List[SetLogOut],
+    status_code=status.HTTP_201_CREATED,
+)
+async def log_sets_bulk(
+    session_id: int,
+    payload: SetLogBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """Log a whole batch of sets in one request / one transaction."""
+    await _get_open_session_async(db, session_id, current_user.id)
+    return await session_crud.create_set_logs_bulk_async(db, payload.sets, session_id)
 
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Session not found, not yours, or already completed."
-        )
 
-    return session_crud.create_set_log(db, log, session_id)
+@router.post(
+    "/sessions/{session_id}/logs/sync",
+    response_model=SetLogSyncResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def sync_set_logs(
+    session_id: int,
+    payload: SetLogSyncRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    """
+    Offline sync: safe to retry. Sets whose client_id was already stored for
+    this session are skipped and reported under `duplicates`. Completed
+    sessions are accepted too, so a retry after a lost response, or sets
+    logged offline before the session was completed, still go through.
+    """
+    await _get_open_session_async(db, session_id, current_user.id, allow_completed=True)
+    inserted = await session_crud.sync_set_logs_async(db, payload.sets, session_id)
+
+    stored = {log.client_id for log in inserted}
+    duplicates = list(dict.fromkeys(item.client_id for item in payload.sets if item.client_id not in stored))
+    return SetLogSyncResponse(
+        inserted=[SetLogOut.model_validate(log) for log in inserted],
+        duplicates=duplicates
+    )
 
 
 
 
 @router.get("/body_diagram", response_model=BodyDiagramResponse)
-def get_body_diagram(
-    db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+async def get_body_diagram(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[Principal, Depends(get_current_principal_async)]
 ):
-    recoveries = recovery_crud.get_user_recoveries(db, current_user.id)
+    recoveries = await recovery_crud.get_user_recoveries_async(db, current_user.id)
     front = {}
     back = {}
     tips = {}
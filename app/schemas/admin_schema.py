@@ -39,7 +39,7 @@ class SubscriptionInfo(BaseModel):
     status: str = Field(..., description="e.g. active, trialing, past_due, canceled")
     current_period_end: Optional[datetime] = Field(None, description="End of current billing period")
     cancel_at_period_end: bool = Field(False, description="Will cancel at end of period?")
-    plan_type: str
+    plan_type: Optional[str] = None
 
 
 class OnboardingInfo(BaseModel):
@@ -71,3 +71,32 @@ class UserListItem(BaseModel):
 class UserPage(Page[UserListItem]):
     """Paginated response of users"""
     pass
+
+
+class UserKeysetPage(BaseModel):
+    """Cursor-paginated response of users"""
+    items: List[UserListItem]
+    size: int
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
+
+
+class RevenueSummary(BaseModel):
+    total_revenue: float = Field(..., ge=0.0)
+    monthly_revenue: float = Field(..., ge=0.0, description="Last 30 days")
+    last_month_revenue: float = Field(..., ge=0.0, description="The 30 days before that")
+
+
+class RevenueBucket(BaseModel):
+    period: datetime = Field(..., description="Start of the day / week / month bucket")
+    type: str = Field(..., description="subscription_payment / subscription_renewal")
+    currency: str
+    amount: float
+    transactions: int
+
+
+class RevenueAnalytics(BaseModel):
+    granularity: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    summary: RevenueSummary
+    series: List[RevenueBucket] = Field(default_factory=list)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import date
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Literal
 
 
 class SportCategorySelect(BaseModel):
@@ -26,6 +26,7 @@ class StrengthLevels(BaseModel):
     overhead_press_1rm: Optional[float] = Field(None, description="Overhead Press 1RM in lbs or kg (optional)")
     pull_up_reps: Optional[int] = Field(None, description="Max pull-ups in one set")
     push_up_reps: Optional[int] = Field(None, description="Max push-ups in one set")
+    unit: Optional[Literal["kg", "lbs"]] = Field(None, description="Unit of the 1RM values; lbs when omitted")
     
     class Config:
         json_schema_extra = {
@@ -36,13 +37,15 @@ class StrengthLevels(BaseModel):
                 "vertical_jump_inches": 24.5,
                 "overhead_press_1rm": 135.0,
                 "pull_up_reps": 10,
-                "push_up_reps": 25
+                "push_up_reps": 25,
+                "unit": "lbs"
             }
         }
     
     
 class OnboardingCompleteData(BaseModel):
     strength_levels: Dict[str, float] = Field(...)
+    strength_unit: Optional[Literal["kg", "lbs"]] = Field(None, description="Unit of the 1RM values; lbs when omitted")
     training_days: List[str] = Field(...)
 
     @field_validator('training_days')
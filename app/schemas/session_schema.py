@@ -46,6 +46,24 @@ class SetLogCreate(BaseModel):
 class SetLogOut(SetLogCreate):
     id: int = Field(..., description="Database ID of the set log")
     session_id: int = Field(..., description="ID of the parent session")
+    client_id: Optional[str] = Field(None, description="Client-generated id (offline sync only)")
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class SetLogBulkCreate(BaseModel):
+    sets: List[SetLogCreate] = Field(..., min_length=1, max_length=100, description="Sets to log, in order")
+
+
+class SetLogSyncItem(SetLogCreate):
+    client_id: str = Field(..., min_length=1, max_length=64, description="Client-generated id, unique within the session")
+
+
+class SetLogSyncRequest(BaseModel):
+    sets: List[SetLogSyncItem] = Field(..., min_length=1, max_length=100, description="Sets recorded offline")
+
+
+class SetLogSyncResponse(BaseModel):
+    inserted: List[SetLogOut] = Field(default_factory=list, description="Sets stored by this request")
+    duplicates: List[str] = Field(default_factory=list, description="client_ids that were already stored")
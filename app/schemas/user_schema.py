@@ -50,5 +50,11 @@ class UserToken(BaseModel):
     
 class TokenData(BaseModel):
     id : Optional[int] = None
-    
-    
+
+
+class Principal(BaseModel):
+    """Authenticated user as seen by route dependencies (cached, no ORM relationships)."""
+    id: int
+    role: str = "user"
+    is_active: bool = True
+    is_onboarded: bool = False
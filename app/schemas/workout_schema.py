@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Literal, Union
 from datetime import datetime
 
+WeekDay = Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 
 class WorkoutGenerateRequest(BaseModel):
     """
@@ -9,7 +11,28 @@ class WorkoutGenerateRequest(BaseModel):
     Send empty JSON object {} — no fields required.
     All data is pulled from user's onboarding profile.
     """
-    pass  
+    engine: Optional[Literal["llm", "rules"]] = Field(
+        None,
+        description="'llm' (AI-generated) or 'rules' (instant, deterministic). Defaults to 'llm' (configurable per subscription tier)."
+    )
+
+class WorkoutRegenerateRequest(BaseModel):
+    """Regenerate some days of the current week; the other days are left as they are."""
+    days: List[WeekDay] = Field(..., min_length=1, max_length=7, description='e.g. ["Wednesday"]')
+    instructions: Optional[str] = Field(
+        None,
+        max_length=300,
+        description="Optional wish for the new days, e.g. 'no barbell, knee-friendly'"
+    )
+    engine: Optional[Literal["llm", "rules"]] = None
+
+    @field_validator("days", mode="before")
+    @classmethod
+    def normalize_days(cls, value):
+        if isinstance(value, list):
+            return [v.strip().title() if isinstance(v, str) else v for v in value]
+        return value
+
 
 class ExerciseDetail(BaseModel):
     name: str
@@ -25,6 +48,31 @@ class ExerciseDetail(BaseModel):
     image_url: Optional[str] = None
 
 
+class PlanDayPayload(BaseModel):
+    """One day of the LLM's `week_plan`; exercises are ids from the prompt table (or full dicts)."""
+    day: WeekDay
+    muscle_group: str = Field(min_length=1)
+    duration: int = Field(ge=0, le=240)
+    exercises: List[Union[str, dict]] = []
+    warm_up: str = ""
+    cool_down: str = ""
+    status: Optional[str] = None
+
+    @field_validator("day", mode="before")
+    @classmethod
+    def normalize_day(cls, value):
+        return value.strip().title() if isinstance(value, str) else value
+
+    @field_validator("warm_up", "cool_down", mode="before")
+    @classmethod
+    def none_to_empty(cls, value):
+        return value or ""
+
+
+class WeekPlanPayload(BaseModel):
+    week_plan: List[PlanDayPayload] = Field(min_length=1)
+
+
 class WorkoutPlanOut(BaseModel):
     id: int
     user_id: int
@@ -41,4 +89,13 @@ class WorkoutPlanOut(BaseModel):
     admin_edited: bool
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class GenerationJobOut(BaseModel):
+    job_id: str
+    status: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    plans: List[WorkoutPlanOut] = []
@@ -0,0 +1,181 @@
+import logging
+import threading
+from datetime import datetime, timedelta, date
+
+from sqlalchemy import func, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..database import seasionlocal
+from ..models.dashboard_stats_model import DashboardCounter, DailyRevenue
+from ..models.user_model import User
+from ..models.subs_model import Subscription, SubscriptionStatus
+from ..config import DASHBOARD_RECONCILE_INTERVAL_SECONDS
+from .revenue_analytics import revenue_series
+
+logger = logging.getLogger(__name__)
+
+TOTAL_USERS = "total_users"
+PREMIUM_USERS = "premium_users"
+TOTAL_REVENUE = "total_revenue"
+COUNTER_NAMES = (TOTAL_USERS, PREMIUM_USERS, TOTAL_REVENUE)
+# pg_advisory_xact_lock key, so only one worker process reconciles at a time
+RECONCILE_LOCK_KEY = 0x64617368  # "dash"
+
+PREMIUM_STATUSES = (SubscriptionStatus.ACTIVE, SubscriptionStatus.PAST_DUE)
+
+
+def is_premium(status, cancel_at_period_end) -> bool:
+    """Same rule as the dashboard query: active or past due, and not set to cancel."""
+    try:
+        status = SubscriptionStatus(status)
+    except ValueError:
+        # None, or a Stripe status this app has no enum member for (e.g. "unpaid")
+        return False
+    return status in PREMIUM_STATUSES and not cancel_at_period_end
+
+
+def _increment(db: Session, name: str, delta: float) -> None:
+    stmt = insert(DashboardCounter).values(name=name, value=delta, updated_at=datetime.utcnow())
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DashboardCounter.name],
+        set_={"value": DashboardCounter.value + delta, "updated_at": datetime.utcnow()}
+    ))
+
+
+# The record_* hooks only stage the update in the caller's session, so the counter
+# commits (or rolls back) together with the change it describes.
+
+def record_user_registered(db: Session) -> None:
+    _increment(db, TOTAL_USERS, 1)
+
+
+def record_subscription_change(db: Session, was_premium: bool, now_premium: bool) -> None:
+    """
+    Per-subscription approximation of the distinct premium-user count; a user
+    with several premium subscriptions is corrected by the next reconciliation.
+    """
+    if was_premium != now_premium:
+        _increment(db, PREMIUM_USERS, 1 if now_premium else -1)
+
+
+def _read_counters(db: Session) -> dict:
+    return {row.name: row.value for row in db.query(DashboardCounter).all()}
+
+
+def reconcile_dashboard_stats(db: Session) -> dict:
+    """
+    Recompute every counter and the daily revenue table from the source tables.
+    Every worker runs the loop; when another one is already reconciling, this
+    returns the stored counters instead of racing it.
+    """
+    if not db.execute(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_KEY))).scalar():
+        db.rollback()
+        logger.info("Dashboard stats reconciliation already running elsewhere; skipped")
+        return _read_counters(db)
+
+    total_users = db.query(func.count(User.id)).scalar() or 0
+
+    premium_users = (
+        db.query(func.count(User.id.distinct()))
+        .join(Subscription)
+        .filter(
+            Subscription.status.in_(PREMIUM_STATUSES),
+            Subscription.cancel_at_period_end.is_(False)
+        )
+        .scalar() or 0
+    )
+
+    daily_revenue: dict = {}
+    for bucket in revenue_series(db, "day"):
+        day = bucket["period"].date()
+        daily_revenue[day] = daily_revenue.get(day, 0.0) + bucket["amount"]
+    total_revenue = sum(daily_revenue.values())
+
+    now = datetime.utcnow()
+    # upsert plus a delete of vanished days, so readers never see a half-built table
+    if daily_revenue:
+        stmt = insert(DailyRevenue).values([{"day": day, "amount": amount} for day, amount in daily_revenue.items()])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyRevenue.day],
+            set_={"amount": stmt.excluded.amount}
+        ))
+    db.execute(delete(DailyRevenue).where(DailyRevenue.day.not_in(list(daily_revenue))))
+
+    counters = {TOTAL_USERS: total_users, PREMIUM_USERS: premium_users, TOTAL_REVENUE: total_revenue}
+    for name, value in counters.items():
+        stmt = insert(DashboardCounter).values(name=name, value=value, updated_at=now)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DashboardCounter.name],
+            set_={"value": value, "updated_at": now}
+        ))
+
+    db.commit()
+    logger.info(f"Dashboard stats reconciled: {counters}")
+    return counters
+
+
+def read_dashboard_stats(db: Session) -> dict:
+    """
+    Precomputed totals plus last-30-day / previous-30-day revenue summed from
+    daily buckets. Reconciles first if any counter has never been built: the
+    record_* hooks upsert single counters (e.g. total_users=1 on a fresh table),
+    so a non-empty table is not enough.
+    """
+    counters = _read_counters(db)
+    if not all(name in counters for name in COUNTER_NAMES):
+        counters = reconcile_dashboard_stats(db)
+
+    today = datetime.utcnow().date()
+
+    def revenue_between(start: date, end: date) -> float:
+        return db.query(func.coalesce(func.sum(DailyRevenue.amount), 0.0)).filter(
+            DailyRevenue.day >= start,
+            DailyRevenue.day < end
+        ).scalar() or 0.0
+
+    tomorrow = today + timedelta(days=1)
+    month_start = tomorrow - timedelta(days=30)
+
+    return {
+        TOTAL_USERS: int(counters.get(TOTAL_USERS, 0)),
+        PREMIUM_USERS: int(counters.get(PREMIUM_USERS, 0)),
+        TOTAL_REVENUE: counters.get(TOTAL_REVENUE, 0.0),
+        "monthly_revenue": revenue_between(month_start, tomorrow),
+        "last_month_revenue": revenue_between(month_start - timedelta(days=30), month_start),
+    }
+
+
+def _reconcile_once() -> None:
+    db = seasionlocal()
+    try:
+        reconcile_dashboard_stats(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Dashboard stats reconciliation failed")
+    finally:
+        db.close()
+
+
+_stop_reconciliation = threading.Event()
+
+
+def start_reconciliation_loop(interval_seconds: int = DASHBOARD_RECONCILE_INTERVAL_SECONDS) -> None:
+    """Periodically recompute the stats in a daemon thread (no-op when the interval is 0)."""
+    if interval_seconds <= 0:
+        return
+
+    def loop():
+        while not _stop_reconciliation.wait(interval_seconds):
+            _reconcile_once()
+
+    threading.Thread(target=loop, name="dashboard-reconcile", daemon=True).start()
+
+
+def stop_reconciliation_loop() -> None:
+    _stop_reconciliation.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    _reconcile_once()
@@ -0,0 +1,42 @@
+"""
+Standalone embedding server shared by all API workers on a host.
+
+    python -m app.services.embedding_sidecar
+
+Then start the API with EMBEDDING_SERVICE_URL=http://127.0.0.1:8765 so workers
+call this process instead of each loading the model.
+"""
+from typing import List
+
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from ..config import EMBEDDING_SIDECAR_HOST, EMBEDDING_SIDECAR_PORT
+from .vector_store import load_local_embeddings
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+class EmbedResponse(BaseModel):
+    embeddings: List[List[float]]
+
+
+app = FastAPI(title="Iron-Ready embedding sidecar")
+embeddings = load_local_embeddings()
+
+
+@app.post("/embed", response_model=EmbedResponse)
+def embed(request: EmbedRequest):
+    return EmbedResponse(embeddings=embeddings.embed_documents(request.texts))
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=EMBEDDING_SIDECAR_HOST, port=EMBEDDING_SIDECAR_PORT)
@@ -0,0 +1,126 @@
+"""
+Keeps the exercise vector index in step with the `exercises` table.
+
+Admin writes (exercise create/update/delete, sport assignment) call
+`enqueue_exercise_reindex`; a single background worker then re-embeds only the
+affected exercises, so the request never waits on the embedding model.
+
+    python -m app.services.exercise_index_sync   # full sync of every DB exercise
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+from langchain_core.documents import Document
+from sqlalchemy.orm import Session, selectinload
+
+from ..database import seasionlocal
+from ..models.exercise_model import Exercise
+from ..config import EXERCISE_INDEX_SYNC_ENABLED
+from .exercise_rag import build_exercise_document, sync_documents, upsert_documents, delete_documents
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DB = "db"
+
+# One worker: index writes are serialized anyway, and ordering keeps the latest edit last
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exercise-index")
+_pending: set[int] = set()
+_pending_lock = threading.Lock()
+
+
+def exercise_db_doc_id(exercise_id: int) -> str:
+    """Keyed by primary key, so renaming an exercise replaces its document instead of adding one."""
+    return f"exercise-db-{exercise_id}"
+
+
+def _enum_value(value) -> str:
+    return value.value if hasattr(value, "value") else (value or "")
+
+
+def exercise_document(exercise: Exercise) -> Document:
+    """Render a DB exercise with the same template as the CSV rows."""
+    sports = {(s.category or s.name).strip().lower() for s in exercise.sports if s.category or s.name}
+    _, document = build_exercise_document({
+        "name": exercise.name,
+        # like the CSV: one sport, or "both" for exercises shared across sports
+        "sport_category": sports.pop() if len(sports) == 1 else "both",
+        "movement_pattern": exercise.category,
+        "primary_muscles": exercise.primary_muscle,
+        "secondary_muscles": exercise.secondary_muscle,
+        "cns_load": _enum_value(exercise.cns_load),
+        "skill_level": _enum_value(exercise.skill_level),
+        "injury_risk": _enum_value(exercise.injury_risk),
+        "equipment": exercise.equipment,
+        "description": exercise.description,
+    }, SOURCE_DB)
+    document.metadata["exercise_id"] = exercise.id
+    return document
+
+
+def reindex_exercises(db: Session, exercise_ids: Iterable[int]) -> None:
+    """Upsert documents for the given ids; ids that no longer exist are removed from the index."""
+    exercise_ids = set(exercise_ids)
+    exercises = (
+        db.query(Exercise)
+        .options(selectinload(Exercise.sports))
+        .filter(Exercise.id.in_(exercise_ids))
+        .all()
+    )
+    documents: Dict[str, Document] = {exercise_db_doc_id(ex.id): exercise_document(ex) for ex in exercises}
+    missing = [exercise_db_doc_id(ex_id) for ex_id in exercise_ids - {ex.id for ex in exercises}]
+
+    embedded = upsert_documents(documents, SOURCE_DB) if documents else 0
+    if missing:
+        delete_documents(missing)
+    logger.info(f"Exercise index: {embedded} re-embedded, {len(missing)} removed")
+
+
+def _run_reindex() -> None:
+    with _pending_lock:
+        exercise_ids = set(_pending)
+        _pending.clear()
+    if not exercise_ids:
+        return
+
+    db = seasionlocal()
+    try:
+        reindex_exercises(db, exercise_ids)
+    except Exception:
+        logger.exception(f"Exercise index sync failed for {sorted(exercise_ids)}")
+    finally:
+        db.close()
+
+
+def enqueue_exercise_reindex(*exercise_ids: int) -> None:
+    """
+    Schedule re-embedding of these exercises after the caller's commit.
+    Ids queued while a run is pending are folded into that run.
+    """
+    if not EXERCISE_INDEX_SYNC_ENABLED or not exercise_ids:
+        return
+    with _pending_lock:
+        schedule = not _pending
+        _pending.update(exercise_ids)
+    if schedule:
+        _executor.submit(_run_reindex)
+
+
+def sync_database_exercises(db: Session) -> dict:
+    """Full sync: index every exercise in the table and drop DB documents for deleted rows."""
+    exercises = db.query(Exercise).options(selectinload(Exercise.sports)).all()
+    return sync_documents({exercise_db_doc_id(ex.id): exercise_document(ex) for ex in exercises}, SOURCE_DB)
+
+
+def shutdown_index_sync() -> None:
+    _executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    session = seasionlocal()
+    try:
+        print(f"Exercise index updated: {sync_database_exercises(session)}")
+    finally:
+        session.close()
@@ -1,58 +1,342 @@
-import pandas as pd
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import CharacterTextSplitter
-from langchain_core.documents import Document
-import os
-from ..config import EXCEL_PATH
-
-
-
-def load_and_index_exercises():
-    if not os.path.exists(EXCEL_PATH):
-        raise FileNotFoundError(f"Exercise data file not found at path: {EXCEL_PATH}")
-    
-    print(f"Loading exercise data from {EXCEL_PATH}...")
-    
-    df = pd.read_csv(EXCEL_PATH)
-    
-    documents = []
-    for idx, row in df.iterrows():
-        text = f"""
-Exercise: {row.get('name', 'Unknown')}
-Sport Category: {row.get('sport_category', '')}
-Movement Pattern: {row.get('movement_pattern', '')}
-Primary Muscles: {row.get('primary_muscles', '')}
-Secondary Muscles: {row.get('secondary_muscles', '')}
-CNS Load: {row.get('cns_load', '')}
-Skill Level: {row.get('skill_level', '')}
-Injury Risk: {row.get('injury_risk', '')}
-Equipment: {row.get('equipment', '')}
-Description: {row.get('description', '')}
 """
-        documents.append(
-            Document(
-                page_content=text.strip(),
-                metadata={"exercise_name": row.get('name', 'Unknown'), "row_id": idx}
+Incremental exercise indexer.
+
+    python -m app.services.exercise_rag          # index changes in data/exercises.csv
+    python -m app.services.exercise_rag --full   # re-embed every CSV exercise
+
+Every exercise becomes one document with a stable id (`exercise:<slug>`). A
+manifest next to the Chroma files records the sha256 of each document's text,
+so a run only embeds new or changed exercises (in batches) and deletes the ones
+that disappeared from the source.
+
+Exercises from the `exercises` table (app.services.exercise_index_sync) are a
+second source and take precedence: a CSV row whose name matches one of them is
+not indexed, so retrieval never sees the same exercise twice.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: in-process locking only
+    fcntl = None
+
+from langchain_core.documents import Document
+
+from ..config import EXCEL_PATH, CHROMA_PERSIST_DIR, EXERCISE_INDEX_BATCH_SIZE, VECTOR_BACKEND
+from .vector_store import get_vectorstore, bump_index_version
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = os.path.join(CHROMA_PERSIST_DIR, "index_manifest.json")
+LOCK_PATH = os.path.join(CHROMA_PERSIST_DIR, "index.lock")
+SOURCE_CSV = "csv"
+
+# The CSV grades skill as low/medium/high, the exercises table as beginner/intermediate/advanced
+SKILL_RANKS = {"low": 0, "beginner": 0, "medium": 1, "intermediate": 1, "high": 2, "advanced": 2}
+
+_thread_lock = threading.Lock()
+
+
+@contextmanager
+def _index_lock():
+    """
+    Serializes manifest read-modify-write across threads and processes (the CLI
+    and every uvicorn worker) with an flock on LOCK_PATH.
+    """
+    with _thread_lock:
+        os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
+        with open(LOCK_PATH, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def exercise_doc_id(name: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", (name or "").strip().lower()).strip("-")
+    return f"exercise:{slug or 'unknown'}"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _clean(value) -> str:
+    return str(value).strip() if value is not None else ""
+
+
+def render_exercise_text(row: Dict[str, str]) -> str:
+    return f"""
+Exercise: {_clean(row.get('name')) or 'Unknown'}
+Sport Category: {_clean(row.get('sport_category'))}
+Movement Pattern: {_clean(row.get('movement_pattern'))}
+Primary Muscles: {_clean(row.get('primary_muscles'))}
+Secondary Muscles: {_clean(row.get('secondary_muscles'))}
+CNS Load: {_clean(row.get('cns_load'))}
+Skill Level: {_clean(row.get('skill_level'))}
+Injury Risk: {_clean(row.get('injury_risk'))}
+Equipment: {_clean(row.get('equipment'))}
+Description: {_clean(row.get('description'))}
+""".strip()
+
+
+def _normalize_list(value) -> str:
+    """'"{barbell, bench}"' -> 'barbell,bench' (Chroma metadata must be scalar)."""
+    items = _clean(value).strip('"').strip("{}").split(",")
+    return ",".join(item.strip().strip('"').lower() for item in items if item.strip())
+
+
+def exercise_metadata(row: Dict[str, str]) -> dict:
+    """Structured, normalized fields used as retrieval filters."""
+    skill_level = _clean(row.get("skill_level")).lower()
+    return {
+        "sport_category": _clean(row.get("sport_category")).lower() or "both",
+        "movement_pattern": _clean(row.get("movement_pattern")).lower(),
+        "cns_load": _clean(row.get("cns_load")).lower(),
+        "skill_level": skill_level,
+        "skill_rank": SKILL_RANKS.get(skill_level, 1),
+        "injury_risk": _clean(row.get("injury_risk")).lower(),
+        "equipment": _normalize_list(row.get("equipment")),
+    }
+
+
+def build_exercise_document(row: Dict[str, str], source: str) -> tuple[str, Document]:
+    """(stable id, Document) for one exercise row; the content hash is stored in metadata."""
+    text = render_exercise_text(row)
+    name = _clean(row.get("name")) or "Unknown"
+    metadata = {"exercise_name": name, "source": source, **exercise_metadata(row)}
+    # metadata is hashed too, so a change to the filter fields re-embeds the document
+    metadata["content_hash"] = content_hash(text + json.dumps(metadata, sort_keys=True))
+    return exercise_doc_id(name), Document(page_content=text, metadata=metadata)
+
+
+def read_csv_documents(path: str = EXCEL_PATH) -> Dict[str, Document]:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Exercise data file not found at path: {path}")
+
+    documents: Dict[str, Document] = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            if not _clean(row.get("name")):
+                continue
+            doc_id, document = build_exercise_document(row, SOURCE_CSV)
+            if doc_id in documents:
+                logger.warning(f"Duplicate exercise '{document.metadata['exercise_name']}' in {path}; keeping the last row")
+            documents[doc_id] = document
+    return documents
+
+
+def load_manifest() -> Dict[str, dict]:
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable index manifest ({e}); treating the index as empty")
+        return {}
+
+
+def save_manifest(manifest: Dict[str, dict]) -> None:
+    os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def _upsert_in_batches(vectorstore, documents: Dict[str, Document], batch_size: int) -> None:
+    ids = list(documents)
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        # Chroma upserts by id, so changed documents replace their old vectors
+        vectorstore.add_documents([documents[i] for i in batch_ids], ids=batch_ids)
+
+
+def _remove_untracked(vectorstore, manifest: Dict[str, dict]) -> None:
+    """
+    Delete documents the manifest does not know, i.e. ones left by the old
+    from_documents indexer with random ids, which would otherwise be duplicates.
+    """
+    untracked = [doc_id for doc_id in vectorstore.get(include=[])["ids"] if doc_id not in manifest]
+    if untracked:
+        vectorstore.delete(ids=untracked)
+        logger.info(f"Removed {len(untracked)} documents that were not tracked by the manifest")
+
+
+def _partition(documents: Dict[str, Document], manifest: Dict[str, dict]) -> tuple[Dict[str, Document], int, int]:
+    """Split into (changed documents, how many of them are new, unchanged count)."""
+    changed: Dict[str, Document] = {}
+    added = unchanged = 0
+    for doc_id, document in documents.items():
+        entry = manifest.get(doc_id)
+        if entry and entry.get("hash") == document.metadata["content_hash"]:
+            unchanged += 1
+        else:
+            added += entry is None
+            changed[doc_id] = document
+    return changed, added, unchanged
+
+
+def _apply(
+    vectorstore,
+    manifest: Dict[str, dict],
+    changed: Dict[str, Document],
+    removed: List[str],
+    source: str,
+    batch_size: int
+) -> None:
+    if changed:
+        _upsert_in_batches(vectorstore, changed, batch_size)
+    if removed:
+        vectorstore.delete(ids=removed)
+
+    for doc_id, document in changed.items():
+        manifest[doc_id] = {
+            "hash": document.metadata["content_hash"],
+            "source": source,
+            "name_id": exercise_doc_id(document.metadata["exercise_name"]),
+        }
+    for doc_id in removed:
+        manifest.pop(doc_id, None)
+
+
+def _shadowed_csv_ids(manifest: Dict[str, dict], documents: Dict[str, Document], source: str) -> List[str]:
+    """
+    CSV documents replaced by an exercise of another source with the same name:
+    the exercises table supersedes the CSV, and indexing both would return the
+    exercise twice.
+    """
+    if source == SOURCE_CSV:
+        return []
+    name_ids = {exercise_doc_id(document.metadata["exercise_name"]) for document in documents.values()}
+    return [doc_id for doc_id in name_ids if manifest.get(doc_id, {}).get("source") == SOURCE_CSV]
+
+
+def _publish(vectorstore) -> str:
+    """Export the NumPy copy (when that backend serves queries), then bump the index version."""
+    if VECTOR_BACKEND == "numpy":
+        from .numpy_index import export_numpy_index
+
+        export_numpy_index(vectorstore)
+    return bump_index_version()
+
+
+def sync_documents(
+    documents: Dict[str, Document],
+    source: str,
+    batch_size: int = EXERCISE_INDEX_BATCH_SIZE,
+    full: bool = False
+) -> dict:
+    """
+    Make the collection's `source` documents match `documents`: embed new or
+    changed ones, delete ids of that source that are gone, leave the rest alone.
+    With `full`, every document of `source` is dropped and re-embedded; other
+    sources (e.g. exercises synced from the database) are kept.
+    Bumps the index version (invalidating retrieval caches) only if something changed.
+    """
+    with _index_lock():
+        vectorstore = get_vectorstore()
+        manifest = load_manifest()
+        if full:
+            manifest = {doc_id: entry for doc_id, entry in manifest.items() if entry.get("source") != source}
+        _remove_untracked(vectorstore, manifest)
+
+        if source == SOURCE_CSV:
+            shadowed = {
+                entry.get("name_id") for entry in manifest.values()
+                if entry.get("source") != SOURCE_CSV
+            }
+            documents = {doc_id: doc for doc_id, doc in documents.items() if doc_id not in shadowed}
+
+        changed, added, unchanged = _partition(documents, manifest)
+        removed = [
+            doc_id for doc_id, entry in manifest.items()
+            if entry.get("source") == source and doc_id not in documents
+        ] + _shadowed_csv_ids(manifest, documents, source)
+        _apply(vectorstore, manifest, changed, removed, source, batch_size)
+        # entries written before name_id existed are filled in without re-embedding
+        labelled = 0
+        for doc_id, document in documents.items():
+            entry = manifest.get(doc_id)
+            if entry is not None and "name_id" not in entry:
+                entry["name_id"] = exercise_doc_id(document.metadata["exercise_name"])
+                labelled += 1
+
+        stats = {
+            "added": added,
+            "updated": len(changed) - added,
+            "deleted": len(removed),
+            "unchanged": unchanged,
+        }
+        if changed or removed or full:
+            save_manifest(manifest)
+            stats["index_version"] = _publish(vectorstore)
+        elif labelled:
+            save_manifest(manifest)
+
+    logger.info(f"Exercise index sync ({source}): {stats}")
+    return stats
+
+
+def upsert_documents(
+    documents: Dict[str, Document],
+    source: str,
+    batch_size: int = EXERCISE_INDEX_BATCH_SIZE
+) -> int:
+    """
+    Embed just these documents if their content changed; other documents are
+    untouched, except CSV documents they replace. Skipped until the CSV has been
+    indexed by this indexer: until then the collection may still hold the old
+    random-id documents, which only a full sync_documents run may clear.
+    """
+    with _index_lock():
+        manifest = load_manifest()
+        if not any(entry.get("source") == SOURCE_CSV for entry in manifest.values()):
+            logger.warning(
+                "Exercise index has no CSV documents in its manifest; skipping the incremental update. "
+                "Run `python -m app.services.exercise_rag` first."
             )
-        )
-        
-    text_splitter = CharacterTextSplitter(chunk_size=600, chunk_overlap=100)
-    split_docs = text_splitter.split_documents(documents)
-    
-    embeddings = HuggingFaceEmbeddings(
-        model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    )
-    
-    vectorstore = Chroma.from_documents(
-        documents=split_docs,
-        embedding=embeddings,
-        collection_name="iron_ready_exercises",
-        persist_directory="./chroma_db_exercise"
-    )
-    
-    print(f"Successfully indexed {len(documents)} exercises into Chroma DB!")
-    return vectorstore
+            return 0
+        changed, _, _ = _partition(documents, manifest)
+        removed = _shadowed_csv_ids(manifest, documents, source)
+        if not changed and not removed:
+            return 0
+        vectorstore = get_vectorstore()
+        _apply(vectorstore, manifest, changed, removed, source, batch_size)
+        save_manifest(manifest)
+        _publish(vectorstore)
+    return len(changed)
+
+
+def delete_documents(doc_ids: List[str]) -> None:
+    with _index_lock():
+        manifest = load_manifest()
+        vectorstore = get_vectorstore()
+        _apply(vectorstore, manifest, {}, list(doc_ids), source="", batch_size=EXERCISE_INDEX_BATCH_SIZE)
+        save_manifest(manifest)
+        _publish(vectorstore)
+
+
+def load_and_index_exercises(full: bool = False, batch_size: int = EXERCISE_INDEX_BATCH_SIZE) -> dict:
+    """Index data/exercises.csv incrementally (or from scratch with `full`)."""
+    logger.info(f"Loading exercise data from {EXCEL_PATH}...")
+    return sync_documents(read_csv_documents(EXCEL_PATH), SOURCE_CSV, batch_size=batch_size, full=full)
+
 
 if __name__ == "__main__":
-    load_and_index_exercises()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    result = load_and_index_exercises(full="--full" in sys.argv[1:])
+    print(f"Exercise index updated: {result}")
@@ -0,0 +1,208 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from ..database import seasionlocal
+from ..models.generation_job_model import WorkoutGenerationJob
+from ..models.user_model import User
+from ..models.workout_model import WorkoutPlan
+from ..crud.notification_crud import create_notification
+from ..schemas.notification_schema import NotificationCreate
+from ..config import (
+    WORKOUT_GENERATION_WORKERS,
+    WORKOUT_GENERATION_MAX_PENDING,
+    WORKOUT_GENERATION_JOB_TIMEOUT_SECONDS,
+)
+from .workout_service import generate_workout_plan_service
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+STALE_JOB_ERROR = "Job was interrupted (server restart or timeout). Please try again."
+
+_executor = ThreadPoolExecutor(
+    max_workers=WORKOUT_GENERATION_WORKERS,
+    thread_name_prefix="plan-gen"
+)
+# Caps queued + running jobs so a burst cannot pile up unbounded work in memory.
+_slots = threading.BoundedSemaphore(WORKOUT_GENERATION_MAX_PENDING)
+
+
+class GenerationQueueFull(RuntimeError):
+    """Raised when the background generation pool has no free slots."""
+
+
+def enqueue_generation_job(db: Session, user_id: int, engine: str | None = None) -> WorkoutGenerationJob:
+    """
+    Persist a pending generation job and hand it to the background worker pool.
+
+    Returns the job row immediately; retrieval, the LLM call and saving the
+    WorkoutPlan rows happen on a pool thread.
+    """
+    if not _slots.acquire(blocking=False):
+        raise GenerationQueueFull("Workout generation queue is full. Try again shortly.")
+
+    try:
+        job = WorkoutGenerationJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status=JOB_PENDING,
+            created_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        _executor.submit(_run_generation_job, job.id, user_id, engine)
+    except Exception:
+        _slots.release()
+        raise
+
+    logger.info(f"Queued workout generation job {job.id} for user {user_id}")
+    return job
+
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=WORKOUT_GENERATION_JOB_TIMEOUT_SECONDS)
+
+
+def _stale_condition():
+    """Pending jobs age from creation, running jobs from when a worker picked them up."""
+    cutoff = _stale_before()
+    return or_(
+        and_(WorkoutGenerationJob.status == JOB_PENDING, WorkoutGenerationJob.created_at < cutoff),
+        and_(
+            WorkoutGenerationJob.status == JOB_RUNNING,
+            func.coalesce(WorkoutGenerationJob.started_at, WorkoutGenerationJob.created_at) < cutoff
+        ),
+    )
+
+
+def _failed_values(error: str) -> dict:
+    return {
+        WorkoutGenerationJob.status: JOB_FAILED,
+        WorkoutGenerationJob.error: error,
+        WorkoutGenerationJob.finished_at: datetime.utcnow(),
+    }
+
+
+def _transition(db: Session, job_id: str, from_status: str, values: dict) -> bool:
+    """
+    Compare-and-set on the job's status, committed; False if the job is no longer
+    in `from_status` (e.g. a poll marked it failed, or it disappeared).
+    """
+    count = db.query(WorkoutGenerationJob).filter(
+        WorkoutGenerationJob.id == job_id,
+        WorkoutGenerationJob.status == from_status
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return count == 1
+
+
+def get_generation_job(db: Session, job_id: str, user_id: int) -> WorkoutGenerationJob | None:
+    """The job; one still pending/running past the timeout is marked failed so clients stop polling."""
+    job = db.query(WorkoutGenerationJob).filter(
+        WorkoutGenerationJob.id == job_id,
+        WorkoutGenerationJob.user_id == user_id
+    ).first()
+    if job is None or job.status not in (JOB_PENDING, JOB_RUNNING):
+        return job
+
+    stale = db.query(WorkoutGenerationJob.id).filter(
+        WorkoutGenerationJob.id == job_id,
+        _stale_condition()
+    ).first()
+    if stale and _transition(db, job_id, job.status, _failed_values(STALE_JOB_ERROR)):
+        logger.warning(f"Generation job {job_id} timed out; marked failed")
+    db.refresh(job)
+    return job
+
+
+def fail_stale_jobs() -> int:
+    """
+    Startup hook: mark pending/running jobs older than the timeout as failed.
+    Only old jobs are touched, since other workers may still be running recent ones.
+    """
+    db = seasionlocal()
+    try:
+        count = db.query(WorkoutGenerationJob).filter(
+            _stale_condition()
+        ).update(_failed_values(STALE_JOB_ERROR), synchronize_session=False)
+        db.commit()
+        if count:
+            logger.info(f"Marked {count} stale generation jobs as failed")
+        return count
+    except Exception:
+        db.rollback()
+        logger.exception("Could not fail stale generation jobs")
+        return 0
+    finally:
+        db.close()
+
+
+def get_job_plans(db: Session, job: WorkoutGenerationJob) -> list[WorkoutPlan]:
+    if job.status != JOB_COMPLETED or not job.plan_ids:
+        return []
+    return db.query(WorkoutPlan).filter(WorkoutPlan.id.in_(job.plan_ids)).order_by(WorkoutPlan.id).all()
+
+
+def _run_generation_job(job_id: str, user_id: int, engine: str | None = None) -> None:
+    db = seasionlocal()
+    try:
+        started = _transition(db, job_id, JOB_PENDING, {
+            WorkoutGenerationJob.status: JOB_RUNNING,
+            WorkoutGenerationJob.started_at: datetime.utcnow(),
+        })
+        if not started:
+            logger.warning(f"Generation job {job_id} is gone or no longer pending; skipping")
+            return
+
+        try:
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user:
+                raise ValueError("User not found.")
+
+            created_plans = generate_workout_plan_service(user, db, engine)
+
+            completed = _transition(db, job_id, JOB_RUNNING, {
+                WorkoutGenerationJob.status: JOB_COMPLETED,
+                WorkoutGenerationJob.plan_ids: [p.id for p in created_plans],
+                WorkoutGenerationJob.finished_at: datetime.utcnow(),
+            })
+            if not completed:
+                logger.warning(f"Generation job {job_id} finished after it was marked failed; leaving it failed")
+                return
+
+            create_notification(
+                db,
+                NotificationCreate(message="New workout plan generated! Check your plan now."),
+                user_id
+            )
+            logger.info(f"Generation job {job_id} completed with {len(created_plans)} plans")
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Generation job {job_id} failed: {e}")
+            _transition(db, job_id, JOB_RUNNING, _failed_values(str(e)))
+
+    except Exception:
+        logger.exception(f"Could not update generation job {job_id}")
+    finally:
+        db.close()
+        _slots.release()
+
+
+def shutdown_generation_pool() -> None:
+    """
+    Stop accepting work; queued jobs that have not started are dropped (their rows
+    are failed by get_generation_job / fail_stale_jobs once they time out).
+    """
+    _executor.shutdown(wait=False, cancel_futures=True)
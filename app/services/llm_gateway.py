@@ -0,0 +1,374 @@
+"""
+Single entry point for chat completions.
+
+Every LLM call in the app goes through `get_llm_gateway()`, which adds:
+
+- a process-wide concurrency limit (LLM_MAX_CONCURRENCY in-flight calls),
+- single-flight coalescing: identical requests already in flight share one call,
+- retries with jittered exponential backoff on 429, 5xx and connection errors,
+- a deadline per call covering the queue wait, every attempt and the backoff sleeps,
+- Prometheus metrics per `caller` tag (app.utils.llm_metrics) and sampled JSONL logging.
+
+LLM_BACKEND=stub swaps Groq for a local backend that answers instantly (or after
+LLM_STUB_LATENCY_SECONDS) without network access, for tests and load runs.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Iterator, List
+
+from ..config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    LLM_BACKEND,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_DEFAULT_TIMEOUT_SECONDS,
+    LLM_STUB_LATENCY_SECONDS,
+)
+
+from ..utils.llm_metrics import record_llm_call, should_log_sample, log_llm_sample
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_gateway = None
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class LLMTimeoutError(LLMError):
+    """The call's deadline passed while queued, in flight or backing off."""
+
+
+def _error_class(error: BaseException) -> str:
+    """Metrics label: the backend's exception rather than the LLMError wrapping it."""
+    if type(error) is LLMError and error.__cause__ is not None:
+        error = error.__cause__
+    return type(error).__name__
+
+
+def _usage_counts(usage) -> tuple[int, int]:
+    if usage is None:
+        return 0, 0
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+@dataclass
+class LLMRequest:
+    messages: List[dict]
+    model: str
+    temperature: float = 0.7
+    max_tokens: int = 512
+    top_p: float | None = None
+    json_mode: bool = False
+
+    def key(self) -> str:
+        payload = json.dumps([self.messages, self.model, self.temperature, self.max_tokens, self.top_p, self.json_mode])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class GroqBackend:
+    """Groq's OpenAI-compatible API. The SDK's own retries are off; the gateway retries."""
+
+    def __init__(self):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, max_retries=0)
+
+    def _params(self, request: LLMRequest) -> dict:
+        params = {
+            "model": request.model,
+            "messages": request.messages,
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        }
+        if request.top_p is not None:
+            params["top_p"] = request.top_p
+        if request.json_mode:
+            params["response_format"] = {"type": "json_object"}
+        return params
+
+    def complete(self, request: LLMRequest, timeout: float) -> LLMResponse:
+        response = self.client.chat.completions.create(**self._params(request), timeout=timeout)
+        prompt_tokens, completion_tokens = _usage_counts(response.usage)
+        return LLMResponse(
+            text=(response.choices[0].message.content or "").strip(),
+            model=response.model or request.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+    def stream(self, request: LLMRequest, timeout: float, usage: dict) -> Iterator[str]:
+        """Text deltas; token counts from the final chunk are written into `usage`."""
+        # JSON mode is not combined with streaming
+        params = self._params(request)
+        params.pop("response_format", None)
+        stream = self.client.chat.completions.create(**params, stream=True, timeout=timeout)
+
+        def deltas() -> Iterator[str]:
+            for chunk in stream:
+                # Groq reports usage on the last chunk, under x_groq
+                chunk_usage = chunk.usage or ((chunk.model_extra or {}).get("x_groq") or {}).get("usage")
+                if chunk_usage:
+                    usage["prompt_tokens"], usage["completion_tokens"] = _usage_counts(chunk_usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        return deltas()
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        import openai
+
+        if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class StubBackend:
+    """
+    Offline stand-in. JSON requests get a week plan built from the exercise ids
+    in the prompt's table (rows starting with "E<n>|"); others get a fixed tip.
+    """
+
+    def __init__(self, latency: float = LLM_STUB_LATENCY_SECONDS):
+        self.latency = latency
+
+    def _text(self, request: LLMRequest) -> str:
+        prompt = request.messages[-1]["content"]
+        if not request.json_mode:
+            return "Stretch gently, hydrate and get 8 hours of sleep tonight."
+
+        ids = re.findall(r"^(E\d+)\|", prompt, flags=re.MULTILINE) or ["E1"]
+        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        return json.dumps({"week_plan": [
+            {
+                "day": day,
+                "muscle_group": "Full Body" if i % 2 == 0 else "Rest",
+                "duration": 60 if i % 2 == 0 else 0,
+                "exercises": ids[:4] if i % 2 == 0 else [],
+                "warm_up": "5 min light cardio",
+                "cool_down": "5 min stretching",
+                "status": "Pending" if i % 2 == 0 else "Rest",
+            }
+            for i, day in enumerate(days)
+        ]})
+
+    def complete(self, request: LLMRequest, timeout: float) -> LLMResponse:
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+        text = self._text(request)
+        prompt_chars = sum(len(m["content"]) for m in request.messages)
+        return LLMResponse(text=text, model=request.model, prompt_tokens=prompt_chars // 4, completion_tokens=len(text) // 4)
+
+    def stream(self, request: LLMRequest, timeout: float, usage: dict) -> Iterator[str]:
+        response = self.complete(request, timeout)
+        usage["prompt_tokens"], usage["completion_tokens"] = response.prompt_tokens, response.completion_tokens
+        text = response.text
+        return iter([text[i:i + 40] for i in range(0, len(text), 40)])
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        return False
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        backend,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base: float = LLM_RETRY_BASE_SECONDS,
+        default_timeout: float = LLM_DEFAULT_TIMEOUT_SECONDS
+    ):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.default_timeout = default_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def complete(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        top_p: float | None = None,
+        json_mode: bool = False,
+        timeout: float | None = None,
+        caller: str = "unknown"
+    ) -> LLMResponse:
+        """
+        One completion. Raises LLMTimeoutError once `timeout` seconds (default
+        LLM_DEFAULT_TIMEOUT_SECONDS) have passed, LLMError for anything else.
+        `caller` tags the call in the metrics.
+        """
+        request = LLMRequest(messages, model, temperature, max_tokens, top_p, json_mode)
+        started = time.monotonic()
+        deadline = started + (timeout or self.default_timeout)
+
+        key = request.key()
+        with self._inflight_lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                future = self._inflight[key] = Future()
+
+        if shared is not None:
+            # Same request already in flight: wait for its result instead of calling again
+            try:
+                response = shared.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                self._observe(request, caller, started, "LLMTimeoutError")
+                raise LLMTimeoutError("Deadline exceeded waiting for a coalesced LLM call")
+            except Exception as e:
+                self._observe(request, caller, started, _error_class(e))
+                raise
+            # no tokens: the leader already accounted for them
+            self._observe(request, caller, started, "coalesced", response.text)
+            return response
+
+        try:
+            response = self._call_with_retries(request, deadline)
+            future.set_result(response)
+        except BaseException as e:
+            future.set_exception(e)
+            self._observe(request, caller, started, _error_class(e))
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+        self._observe(request, caller, started, "ok", response.text, response.prompt_tokens, response.completion_tokens)
+        return response
+
+    def stream(
+        self,
+        messages: List[dict],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        json_mode: bool = False,
+        timeout: float | None = None,
+        caller: str = "unknown"
+    ) -> Iterator[str]:
+        """
+        Streamed completion as text deltas. Holds a concurrency slot until the
+        stream is exhausted or closed; only opening the stream is retried.
+        `json_mode` describes the expected output (the Groq backend cannot enforce it while streaming).
+        """
+        request = LLMRequest(messages, model, temperature, max_tokens, json_mode=json_mode)
+        started = time.monotonic()
+        deadline = started + (timeout or self.default_timeout)
+        usage: dict = {}
+        try:
+            self._acquire(deadline)
+        except LLMTimeoutError:
+            self._observe(request, caller, started, "LLMTimeoutError")
+            raise
+        try:
+            deltas = self._with_retries(lambda remaining: self.backend.stream(request, remaining, usage), deadline)
+        except BaseException as e:
+            self._slots.release()
+            self._observe(request, caller, started, _error_class(e))
+            raise
+
+        def guarded() -> Iterator[str]:
+            parts = []
+            outcome = "ok"
+            try:
+                for delta in deltas:
+                    parts.append(delta)
+                    yield delta
+            except BaseException as e:
+                outcome = "ok" if isinstance(e, GeneratorExit) else _error_class(e)
+                raise
+            finally:
+                self._slots.release()
+                self._observe(
+                    request, caller, started, outcome, "".join(parts),
+                    usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+                )
+        return guarded()
+
+    def _observe(
+        self,
+        request: LLMRequest,
+        caller: str,
+        started: float,
+        outcome: str,
+        output: str | None = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0
+    ) -> None:
+        seconds = time.monotonic() - started
+        record_llm_call(caller, request.model, seconds, outcome, prompt_tokens, completion_tokens)
+        if should_log_sample():
+            log_llm_sample(caller, request.model, request.messages, output, seconds, outcome)
+
+    def _acquire(self, deadline: float) -> None:
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise LLMTimeoutError("Deadline exceeded waiting for an LLM slot")
+
+    def _call_with_retries(self, request: LLMRequest, deadline: float) -> LLMResponse:
+        self._acquire(deadline)
+        try:
+            return self._with_retries(lambda remaining: self.backend.complete(request, remaining), deadline)
+        finally:
+            self._slots.release()
+
+    def _with_retries(self, call, deadline: float):
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError("Deadline exceeded before the LLM answered")
+            try:
+                return call(remaining)
+            except Exception as e:
+                if not self.backend.is_retryable(e) or attempt >= self.max_retries:
+                    if isinstance(e, LLMError):
+                        raise
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+
+                # full jitter: sleep somewhere in [0, base * 2^attempt]
+                delay = random.uniform(0, self.retry_base * 2 ** attempt)
+                if time.monotonic() + delay >= deadline:
+                    raise LLMTimeoutError(f"Deadline exceeded retrying after {type(e).__name__}") from e
+                logger.warning(f"LLM call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway, created on first use."""
+    global _gateway
+    if _gateway is None:
+        with _lock:
+            if _gateway is None:
+                if LLM_BACKEND == "stub":
+                    logger.info("Using the stub LLM backend")
+                    _gateway = LLMGateway(StubBackend())
+                else:
+                    _gateway = LLMGateway(GroqBackend())
+    return _gateway
@@ -0,0 +1,224 @@
+"""
+In-process exercise index backed by a float32 NumPy matrix.
+
+The corpus is small (tens to hundreds of exercises), so a single matrix-vector
+product over L2-normalized embeddings is enough for exact top-k. The matrix is
+exported from the Chroma collection (the source of truth) after every index
+change and memory-mapped by each worker, so they share the same pages.
+
+    python -m app.services.numpy_index   # export the current Chroma collection
+
+Enable with VECTOR_BACKEND=numpy; it is a drop-in for the Chroma store behind
+CachedRetriever (same search methods, same metadata filter syntax).
+"""
+import json
+import logging
+import os
+import threading
+from typing import List, NamedTuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ..config import NUMPY_INDEX_DIR, NUMPY_INDEX_MMAP
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_PATH = os.path.join(NUMPY_INDEX_DIR, "embeddings.npy")
+DOCUMENTS_PATH = os.path.join(NUMPY_INDEX_DIR, "documents.json")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_numpy_index(vectorstore) -> int:
+    """Write every document of the Chroma collection to the .npy / .json pair; returns the row count."""
+    data = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+    ids = list(data["ids"])
+    embeddings = data["embeddings"]
+    matrix = np.asarray(embeddings if embeddings is not None and len(ids) else np.empty((0, 0)), dtype=np.float32)
+    if len(ids):
+        matrix = np.ascontiguousarray(_normalize(matrix), dtype=np.float32)
+
+    os.makedirs(NUMPY_INDEX_DIR, exist_ok=True)
+    # embeddings first: readers key off documents.json and check the row count
+    tmp_embeddings = f"{EMBEDDINGS_PATH}.tmp.npy"
+    np.save(tmp_embeddings, matrix)
+    os.replace(tmp_embeddings, EMBEDDINGS_PATH)
+
+    tmp_documents = f"{DOCUMENTS_PATH}.tmp"
+    with open(tmp_documents, "w") as f:
+        json.dump({
+            "rows": len(ids),
+            "ids": ids,
+            "documents": list(data["documents"] or []),
+            "metadatas": [m or {} for m in (data["metadatas"] or [])],
+        }, f)
+    os.replace(tmp_documents, DOCUMENTS_PATH)
+
+    logger.info(f"Exported {len(ids)} exercise embeddings to {NUMPY_INDEX_DIR}")
+    return len(ids)
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    """Evaluate a Chroma-style `where` filter against one metadata dict."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, sub) for sub in condition):
+                return False
+        else:
+            value = metadata.get(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+    return True
+
+
+class _Snapshot(NamedTuple):
+    """One loaded export; replaced as a whole so a query never mixes two exports."""
+    mtime: float | None
+    matrix: np.ndarray
+    documents: List[Document]
+    masks: dict
+
+
+class NumpyExerciseIndex:
+    """
+    Exact cosine search over the exported matrix. Reloads itself when the
+    export changes on disk (checked with one stat() per search).
+    """
+
+    def __init__(self, mmap: bool = NUMPY_INDEX_MMAP):
+        self.mmap = mmap
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot(None, np.empty((0, 0), dtype=np.float32), [], {})
+
+    def _ensure_current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        try:
+            mtime = os.stat(DOCUMENTS_PATH).st_mtime
+        except FileNotFoundError:
+            return snapshot
+        if mtime == snapshot.mtime:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if mtime == snapshot.mtime:
+                return snapshot
+            with open(DOCUMENTS_PATH) as f:
+                data = json.load(f)
+            matrix = np.load(EMBEDDINGS_PATH, mmap_mode="r" if self.mmap else None)
+            if matrix.shape[0] != data["rows"]:
+                # caught between the two writes of an export; keep the previous copy
+                logger.warning("Exercise index export in progress; serving the previous copy")
+                return snapshot
+
+            documents = [
+                Document(page_content=text, metadata=metadata)
+                for text, metadata in zip(data["documents"], data["metadatas"])
+            ]
+            snapshot = _Snapshot(mtime, matrix, documents, {})
+            self._snapshot = snapshot
+            logger.info(f"Loaded {len(documents)} exercise embeddings from {EMBEDDINGS_PATH}")
+            return snapshot
+
+    def _candidate_rows(self, snapshot: _Snapshot, filter: dict | None) -> np.ndarray | None:
+        if not filter:
+            return None
+        key = json.dumps(filter, sort_keys=True)
+        rows = snapshot.masks.get(key)
+        if rows is None:
+            rows = np.fromiter(
+                (i for i, doc in enumerate(snapshot.documents) if _matches(doc.metadata, filter)),
+                dtype=np.intp
+            )
+            with self._lock:
+                rows = snapshot.masks.setdefault(key, rows)
+        return rows
+
+    def _scores(self, snapshot: _Snapshot, embedding: List[float], filter: dict | None) -> tuple[np.ndarray, np.ndarray]:
+        """(row numbers, cosine scores) of the snapshot's documents passing `filter`."""
+        matrix = snapshot.matrix
+        if not len(snapshot.documents):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        rows = self._candidate_rows(snapshot, filter)
+        if rows is None:
+            return np.arange(matrix.shape[0]), matrix @ query
+        return rows, matrix[rows] @ query
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k best scores, best first."""
+        if len(scores) <= k:
+            return np.argsort(-scores)
+        top = np.argpartition(-scores, k)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: dict | None = None, **kwargs) -> List[Document]:
+        snapshot = self._ensure_current()
+        rows, scores = self._scores(snapshot, embedding, filter)
+        return [snapshot.documents[rows[i]] for i in self._top(scores, k)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: dict | None = None,
+        **kwargs
+    ) -> List[Document]:
+        snapshot = self._ensure_current()
+        rows, scores = self._scores(snapshot, embedding, filter)
+        candidates = rows[self._top(scores, fetch_k)]
+        if not len(candidates):
+            return []
+
+        vectors = np.asarray(snapshot.matrix[candidates])
+        relevance = vectors @ _normalize(np.asarray(embedding, dtype=np.float32))
+        similarity = vectors @ vectors.T
+
+        selected = [0]
+        remaining = list(range(1, len(candidates)))
+        while remaining and len(selected) < k:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+            mmr = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+            best = remaining[int(np.argmax(mmr))]
+            selected.append(best)
+            remaining.remove(best)
+        return [snapshot.documents[candidates[i]] for i in selected]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from .vector_store import get_vectorstore
+
+    print(f"Exported {export_numpy_index(get_vectorstore())} exercises")
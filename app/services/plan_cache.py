@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from ..database import get_redis
+from ..models.onboarding_model import Onboarding
+from ..utils.llm_metrics import record_cache_lookup
+from ..config import (
+    PLAN_CACHE_ENABLED,
+    PLAN_CACHE_TTL_SECONDS,
+    PLAN_CACHE_MAX_ENTRIES,
+    PLAN_CACHE_USE_REDIS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt or plan shape changes so stale plans are not served.
+PLAN_CACHE_VERSION = 1
+REDIS_KEY_PATTERN = "workout_plan_cache:{}"
+
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Bucket width per strength metric; anything unknown falls back to DEFAULT_STRENGTH_STEP.
+STRENGTH_STEPS = {
+    "bench_press_1rm": 25,
+    "back_squat_1rm": 25,
+    "deadlift_1rm": 25,
+    "overhead_press_1rm": 20,
+    "vertical_jump_inches": 4,
+    "pull_up_reps": 5,
+    "push_up_reps": 10,
+}
+DEFAULT_STRENGTH_STEP = 25
+AGE_BAND_YEARS = 10
+WEIGHT_BAND_KG = 10
+
+
+class PlanCache:
+    """
+    Two-level (in-process LRU + Redis) cache of parsed `week_plan` lists.
+    Entries expire after `ttl_seconds`; the local level also evicts least-recently-used keys.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, use_redis: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self._entries: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "redis_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: str) -> list | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+        week_plan = self._redis_get(key)
+        with self._lock:
+            if week_plan is not None:
+                self._stats["redis_hits"] += 1
+                self._put_local(key, week_plan, now)
+            else:
+                self._stats["misses"] += 1
+        return week_plan
+
+    def set(self, key: str, week_plan: list) -> None:
+        with self._lock:
+            self._put_local(key, week_plan, time.monotonic())
+            self._stats["stores"] += 1
+        self._redis_set(key, week_plan)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["redis_hits"] + self._stats["misses"]
+            hit_ratio = (self._stats["hits"] + self._stats["redis_hits"]) / lookups if lookups else 0.0
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_ratio": round(hit_ratio, 4),
+            }
+
+    def _put_local(self, key: str, week_plan: list, now: float) -> None:
+        self._entries[key] = (now + self.ttl_seconds, week_plan)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _redis_get(self, key: str) -> list | None:
+        if not self.use_redis:
+            return None
+        try:
+            raw = get_redis().get(REDIS_KEY_PATTERN.format(key))
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Plan cache Redis read failed: {e}")
+            return None
+
+    def _redis_set(self, key: str, week_plan: list) -> None:
+        if not self.use_redis:
+            return
+        try:
+            get_redis().set_with_expiry(
+                REDIS_KEY_PATTERN.format(key),
+                json.dumps(week_plan, ensure_ascii=False),
+                self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Plan cache Redis write failed: {e}")
+
+
+plan_cache = PlanCache(PLAN_CACHE_TTL_SECONDS, PLAN_CACHE_MAX_ENTRIES, PLAN_CACHE_USE_REDIS)
+
+
+def _band(value, width):
+    if value is None:
+        return None
+    low = int(float(value) // width) * width
+    return f"{low}-{low + width - 1}"
+
+
+def profile_cache_key(onboarding: Onboarding) -> str:
+    """
+    Canonical key for an onboarding profile: users who land in the same
+    sport / training days / coarse strength, age and weight bands share a plan.
+    """
+    training_days = onboarding.training_days or ["Monday", "Wednesday", "Friday"]
+    days = sorted(
+        {d.strip().title() for d in training_days},
+        key=lambda d: DAY_ORDER.index(d) if d in DAY_ORDER else len(DAY_ORDER)
+    )
+
+    strength = {}
+    for name, value in sorted((onboarding.strength_levels or {}).items()):
+        try:
+            strength[name] = _band(value, STRENGTH_STEPS.get(name, DEFAULT_STRENGTH_STEP))
+        except (TypeError, ValueError):
+            continue
+
+    profile = {
+        "v": PLAN_CACHE_VERSION,
+        "sport": (onboarding.sport_category or "general fitness").strip().lower(),
+        "sub": (onboarding.sport_sub_category or "").strip().lower(),
+        "days": days,
+        "strength": strength,
+        "unit": str((onboarding.strength_levels or {}).get("unit") or "lbs"),
+        "age": _band(onboarding.age, AGE_BAND_YEARS),
+        "weight": _band(onboarding.weight_kg, WEIGHT_BAND_KG),
+        "gender": (onboarding.gender or "").strip().lower(),
+    }
+    return hashlib.sha1(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def redate_week_plan(week_plan: list) -> list:
+    """
+    Copy a cached plan for reuse this week. Only "Rest" survives from the
+    cached status; Today/Done/Pending are recomputed from the current date on save.
+    """
+    redated = []
+    for day_plan in week_plan:
+        day_plan = dict(day_plan)
+        if day_plan.get("status") != "Rest":
+            day_plan.pop("status", None)
+        redated.append(day_plan)
+    return redated
+
+
+def get_cached_week_plan(onboarding: Onboarding) -> list | None:
+    if not PLAN_CACHE_ENABLED:
+        return None
+    week_plan = plan_cache.get(profile_cache_key(onboarding))
+    record_cache_lookup("plan", week_plan is not None)
+    return redate_week_plan(week_plan) if week_plan else None
+
+
+def store_week_plan(onboarding: Onboarding, week_plan: list) -> None:
+    store_week_plan_for_key(profile_cache_key(onboarding), week_plan)
+
+
+def store_week_plan_for_key(cache_key: str, week_plan: list) -> None:
+    """Like store_week_plan, for callers that computed the key while the profile was at hand."""
+    if PLAN_CACHE_ENABLED and week_plan:
+        plan_cache.set(cache_key, week_plan)
+
+
+def get_plan_cache_stats() -> dict:
+    return {"enabled": PLAN_CACHE_ENABLED, **plan_cache.stats()}
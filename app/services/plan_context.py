@@ -0,0 +1,153 @@
+"""
+Compact exercise context for plan generation.
+
+Retrieved exercises are rendered as one table row each, keyed by a short id
+(E1, E2, ...), and rows are added in relevance order until the token budget is
+spent. The model answers with those ids only; `PlanContext.expand_day` turns
+them back into full exercise dicts, read from the `exercises` table where the
+exercise exists there and from the retrieved document otherwise. A training
+day left without any known id is dropped, so it is regenerated like a missing
+day and never cached.
+"""
+import logging
+from typing import Dict, List
+
+from langchain_core.documents import Document
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from ..models.exercise_model import Exercise
+from ..config import PLAN_CONTEXT_TOKEN_BUDGET
+from .rule_based_plan import exercise_detail
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_HEADER = "id|name|pattern|primary|secondary|cns|skill|risk|equipment"
+# Rough size of a token for English/CSV-like text; good enough for a budget
+CHARS_PER_TOKEN = 4
+
+# "Label: value" lines of the indexed document text -> exercise dict keys
+DOCUMENT_FIELDS = {
+    "Exercise": "name",
+    "Sport Category": "sport_category",
+    "Movement Pattern": "movement_pattern",
+    "Primary Muscles": "primary_muscles",
+    "Secondary Muscles": "secondary_muscles",
+    "CNS Load": "cns_load",
+    "Skill Level": "skill_level",
+    "Injury Risk": "injury_risk",
+    "Equipment": "equipment",
+    "Description": "description",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _cell(value) -> str:
+    """Single-line, pipe-free table cell; '{a, b}' lists are flattened to 'a,b'."""
+    text = str(value or "").replace("|", "/").replace("\n", " ").strip().strip('"').strip("{}")
+    return ",".join(part.strip().strip('"') for part in text.split(",")) if "," in text else text
+
+
+def document_detail(doc: Document) -> dict:
+    """Full exercise dict parsed from an indexed document (fallback when the exercise is not in the DB)."""
+    detail = {key: "" for key in DOCUMENT_FIELDS.values()}
+    for line in doc.page_content.splitlines():
+        label, sep, value = line.partition(":")
+        key = DOCUMENT_FIELDS.get(label.strip())
+        if sep and key:
+            detail[key] = value.strip()
+    detail["name"] = detail["name"] or doc.metadata.get("exercise_name", "Unknown")
+    return detail
+
+
+def is_rest_day(day_plan: dict) -> bool:
+    return (
+        day_plan.get("status") == "Rest"
+        or str(day_plan.get("muscle_group", "")).strip().lower() == "rest"
+        or not day_plan.get("duration")
+    )
+
+
+class PlanContext:
+    """The prompt table plus the short id -> exercise dict map used to expand the answer."""
+
+    def __init__(self, table: str, details: Dict[str, dict]):
+        self.table = table
+        self.details = details
+
+    def expand_exercises(self, exercises) -> List[dict]:
+        """Known ids -> copies of their exercise detail; other fields the model adds are ignored."""
+        expanded = []
+        for item in exercises if isinstance(exercises, list) else []:
+            ref = item.get("id") if isinstance(item, dict) else item
+            detail = self.details.get(str(ref).strip().upper())
+            if detail is None:
+                logger.warning(f"Dropping unknown exercise id from LLM output: {item!r}")
+                continue
+            expanded.append(dict(detail))
+        return expanded
+
+    def expand_day(self, day_plan: dict) -> dict | None:
+        """
+        The day with its exercises expanded, or None for a training day none of
+        whose ids are known, so the caller treats it as missing.
+        """
+        exercises = self.expand_exercises(day_plan.get("exercises"))
+        if not exercises and not is_rest_day(day_plan):
+            logger.warning(f"No known exercise ids for {day_plan.get('day')}; treating the day as missing")
+            return None
+        return {**day_plan, "exercises": exercises}
+
+
+def _load_exercises(db: Session, docs: List[Document]) -> tuple[Dict[int, Exercise], Dict[str, Exercise]]:
+    """One query for every retrieved exercise, matched by id (DB documents) or by name (CSV documents)."""
+    ids = {doc.metadata["exercise_id"] for doc in docs if doc.metadata.get("exercise_id")}
+    names = {doc.metadata.get("exercise_name", "").lower() for doc in docs} - {""}
+    if not ids and not names:
+        return {}, {}
+
+    exercises = db.query(Exercise).filter(or_(
+        Exercise.id.in_(ids),
+        func.lower(Exercise.name).in_(names)
+    )).all()
+    return {ex.id: ex for ex in exercises}, {ex.name.lower(): ex for ex in exercises}
+
+
+def build_plan_context(db: Session, docs: List[Document], token_budget: int = PLAN_CONTEXT_TOKEN_BUDGET) -> PlanContext:
+    """Render `docs` (most relevant first) as a compact table that fits in `token_budget` tokens."""
+    by_id, by_name = _load_exercises(db, docs)
+
+    rows = [CONTEXT_HEADER]
+    used = estimate_tokens(CONTEXT_HEADER)
+    details: Dict[str, dict] = {}
+    seen = set()
+    for doc in docs:
+        fallback = document_detail(doc)
+        exercise = by_id.get(doc.metadata.get("exercise_id")) or by_name.get(fallback["name"].lower())
+        if exercise is not None:
+            detail = exercise_detail(exercise, doc.metadata.get("sport_category") or fallback["sport_category"])
+        else:
+            detail = fallback
+
+        if detail["name"].lower() in seen:
+            continue
+
+        short_id = f"E{len(details) + 1}"
+        row = "|".join([short_id] + [_cell(detail.get(key)) for key in (
+            "name", "movement_pattern", "primary_muscles", "secondary_muscles",
+            "cns_load", "skill_level", "injury_risk", "equipment"
+        )])
+        cost = estimate_tokens(row)
+        if used + cost > token_budget:
+            logger.info(f"Context budget of {token_budget} tokens reached after {len(details)} exercises")
+            break
+
+        rows.append(row)
+        used += cost
+        details[short_id] = detail
+        seen.add(detail["name"].lower())
+
+    return PlanContext("\n".join(rows), details)
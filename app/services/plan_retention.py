@@ -0,0 +1,164 @@
+"""
+Bounded storage for workout plans.
+
+Every generation saves its rows under a new `plan_version_id` and clears
+`is_current` on the previous version, so workout_plans keeps growing with
+superseded weeks. This job keeps the current version plus the newest
+PLAN_VERSIONS_RETAINED superseded versions per user and moves older ones to
+workout_plans_archive. Rows still referenced by a workout session stay put.
+
+The app backfills legacy rows at startup (run_backfill); the retention pass
+runs every PLAN_RETENTION_INTERVAL_SECONDS, or once with
+`python -m app.services.plan_retention`.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, delete
+from sqlalchemy.orm import Session
+
+from ..database import seasionlocal
+from ..models.workout_model import WorkoutPlan, WorkoutPlanArchive
+from ..models.session_model import WorkoutSession
+from ..config import PLAN_VERSIONS_RETAINED, PLAN_RETENTION_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+LEGACY_VERSION_PREFIX = "legacy"
+ARCHIVE_BATCH_SIZE = 500
+
+ARCHIVED_COLUMNS = (
+    "id", "user_id", "plan_version_id", "day", "plan_datetime", "muscle_group", "duration",
+    "exercises", "status", "warm_up", "cool_down", "generated_at", "admin_edited",
+)
+
+
+def backfill_current_plans(db: Session, user_id: int | None = None) -> int:
+    """
+    Rows saved before versioning have no current version: for each such user (or
+    only `user_id`) the newest row per weekday becomes current, under one
+    "legacy…" version id.
+    """
+    has_current = select(WorkoutPlan.user_id).where(WorkoutPlan.is_current.is_(True))
+    query = db.query(WorkoutPlan).filter(WorkoutPlan.user_id.not_in(has_current))
+    if user_id is not None:
+        query = query.filter(WorkoutPlan.user_id == user_id)
+    rows = query.order_by(WorkoutPlan.user_id, WorkoutPlan.id.desc()).all()
+
+    newest = {}
+    for row in rows:
+        newest.setdefault((row.user_id, row.day), row)
+    for row in newest.values():
+        row.plan_version_id = f"{LEGACY_VERSION_PREFIX}{row.user_id}"
+        row.is_current = True
+
+    db.commit()
+    if newest:
+        logger.info(f"Marked {len(newest)} legacy plan rows as current")
+    return len(newest)
+
+
+def superseded_versions(db: Session, keep_versions: int = PLAN_VERSIONS_RETAINED) -> list[tuple[int, str | None]]:
+    """(user_id, plan_version_id) of superseded versions beyond the newest `keep_versions` per user."""
+    versions = db.query(
+        WorkoutPlan.user_id,
+        WorkoutPlan.plan_version_id,
+        func.max(WorkoutPlan.generated_at).label("latest")
+    ).filter(
+        WorkoutPlan.is_current.is_(False)
+    ).group_by(WorkoutPlan.user_id, WorkoutPlan.plan_version_id).all()
+
+    by_user = defaultdict(list)
+    for user_id, version, latest in versions:
+        by_user[user_id].append((latest, version))
+
+    expired = []
+    for user_id, user_versions in by_user.items():
+        # rows without a version predate versioning and sort as the oldest
+        user_versions.sort(key=lambda item: (item[1] is not None, item[0] or datetime.min), reverse=True)
+        expired.extend((user_id, version) for _, version in user_versions[keep_versions:])
+    return expired
+
+
+def archive_superseded_plans(db: Session, keep_versions: int = PLAN_VERSIONS_RETAINED) -> int:
+    """Copy expired superseded rows into workout_plans_archive and delete them; returns the row count."""
+    expired = superseded_versions(db, keep_versions)
+    if not expired:
+        return 0
+
+    in_use = select(WorkoutSession.workout_id)
+    ids = []
+    for user_id, version in expired:
+        version_filter = WorkoutPlan.plan_version_id.is_(None) if version is None \
+            else WorkoutPlan.plan_version_id == version
+        ids.extend(db.scalars(select(WorkoutPlan.id).where(
+            WorkoutPlan.user_id == user_id,
+            WorkoutPlan.is_current.is_(False),
+            version_filter,
+            WorkoutPlan.id.not_in(in_use)
+        )))
+
+    archived = 0
+    for start in range(0, len(ids), ARCHIVE_BATCH_SIZE):
+        batch = ids[start:start + ARCHIVE_BATCH_SIZE]
+        columns = [getattr(WorkoutPlan, name) for name in ARCHIVED_COLUMNS]
+        db.execute(insert(WorkoutPlanArchive).from_select(
+            list(ARCHIVED_COLUMNS),
+            select(*columns).where(WorkoutPlan.id.in_(batch))
+        ))
+        db.execute(delete(WorkoutPlan).where(WorkoutPlan.id.in_(batch)))
+        db.commit()
+        archived += len(batch)
+
+    logger.info(f"Archived {archived} superseded plan rows from {len(expired)} versions")
+    return archived
+
+
+def run_backfill() -> None:
+    """Startup hook: legacy plans must be current before GET /workouts/plan serves them."""
+    db = seasionlocal()
+    try:
+        backfill_current_plans(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Plan backfill failed")
+    finally:
+        db.close()
+
+
+def _run_retention_once() -> None:
+    db = seasionlocal()
+    try:
+        backfill_current_plans(db)
+        archive_superseded_plans(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Plan retention failed")
+    finally:
+        db.close()
+
+
+_stop_retention = threading.Event()
+
+
+def start_retention_loop(interval_seconds: int = PLAN_RETENTION_INTERVAL_SECONDS) -> None:
+    """Periodically archive superseded plan versions in a daemon thread (no-op when the interval is 0)."""
+    if interval_seconds <= 0:
+        return
+
+    def loop():
+        while not _stop_retention.wait(interval_seconds):
+            _run_retention_once()
+
+    threading.Thread(target=loop, name="plan-retention", daemon=True).start()
+
+
+def stop_retention_loop() -> None:
+    _stop_retention.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    _run_retention_once()
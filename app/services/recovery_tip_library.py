@@ -0,0 +1,225 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from ..database import seasionlocal
+from ..models.muscle_group_model import MuscleGroup
+from ..models.recovery_tip_model import RecoveryTip
+from ..config import (
+    RECOVERY_TIP_MODE,
+    RECOVERY_TIP_LIBRARY_RELOAD_SECONDS,
+    RECOVERY_TIPS_PER_COMBO,
+)
+from ..utils.llm_metrics import record_cache_lookup
+from .recovery_tip_service import request_recovery_tip, generate_recovery_tips
+
+logger = logging.getLogger(__name__)
+
+RECOVERY_STATUSES = ["red", "yellow", "green"]
+INTENSITIES = ["intense", "moderate", "light"]
+DEFAULT_MUSCLE_GROUPS = [
+    "Chest", "Back", "Shoulders", "Biceps", "Triceps", "Forearms", "Abs", "Core",
+    "Quads", "Hamstrings", "Glutes", "Calves", "Lower Back", "Traps", "Neck",
+]
+
+
+def _pool_key(muscle_group: str, recovery_status: str, intensity: str) -> tuple:
+    return (muscle_group.strip().lower(), recovery_status, intensity)
+
+
+class RecoveryTipLibrary:
+    """
+    In-memory copy of the recovery_tips table. Tips are served round-robin per
+    (muscle group, status, intensity); the pool is reloaded from the DB every
+    `reload_seconds` so batch runs in another process become visible.
+    """
+
+    def __init__(self, reload_seconds: int):
+        self.reload_seconds = reload_seconds
+        self._pool: Dict[tuple, List[str]] = {}
+        self._cursors: Dict[tuple, itertools.count] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def get_tip(self, muscle_group: str, recovery_status: str, intensity: str) -> str | None:
+        self._ensure_loaded()
+        key = _pool_key(muscle_group, recovery_status, intensity)
+        tips = self._pool.get(key)
+        if not tips:
+            return None
+        cursor = self._cursors.setdefault(key, itertools.count())
+        return tips[next(cursor) % len(tips)]
+
+    def add(self, muscle_group: str, recovery_status: str, intensity: str, tip: str) -> None:
+        with self._lock:
+            self._pool.setdefault(_pool_key(muscle_group, recovery_status, intensity), []).append(tip)
+
+    def reload(self) -> None:
+        db = seasionlocal()
+        try:
+            rows = db.query(
+                RecoveryTip.muscle_group,
+                RecoveryTip.recovery_status,
+                RecoveryTip.intensity,
+                RecoveryTip.tip
+            ).all()
+        finally:
+            db.close()
+
+        pool: Dict[tuple, List[str]] = {}
+        for row in rows:
+            pool.setdefault(_pool_key(row.muscle_group, row.recovery_status, row.intensity), []).append(row.tip)
+
+        with self._lock:
+            self._pool = pool
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(rows)} recovery tips into the library")
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.reload_seconds:
+            return
+        try:
+            self.reload()
+        except Exception as e:
+            logger.warning(f"Could not load recovery tip library: {e}")
+            # keep serving whatever is already in memory; retry after the next interval
+            self._loaded_at = time.monotonic()
+
+
+tip_library = RecoveryTipLibrary(RECOVERY_TIP_LIBRARY_RELOAD_SECONDS)
+
+
+def resolve_recovery_tips(
+    db: Session,
+    muscle_groups: List[str],
+    recovery_status: str,
+    base_tip: str,
+    intensity: str = "intense"
+) -> Dict[str, str]:
+    """
+    Tips for a completed session, served from the pre-generated library.
+
+    In "refresh" mode combos missing from the library are fetched from the LLM
+    (concurrently, with the usual timeout) and stored for future requests;
+    otherwise they get `base_tip`.
+    """
+    tips = {}
+    missing = []
+    for muscle in muscle_groups:
+        tip = tip_library.get_tip(muscle, recovery_status, intensity)
+        record_cache_lookup("recovery_tip_library", bool(tip))
+        if tip:
+            tips[muscle] = tip
+        else:
+            missing.append(muscle)
+
+    if not missing:
+        return tips
+
+    if RECOVERY_TIP_MODE != "refresh":
+        tips.update({muscle: base_tip for muscle in missing})
+        return tips
+
+    live_tips = generate_recovery_tips(
+        missing, fallback_tip=base_tip, intensity=intensity, recovery_status=recovery_status
+    )
+    tips.update(live_tips)
+
+    fresh = {muscle: tip for muscle, tip in live_tips.items() if tip != base_tip}
+    if fresh:
+        try:
+            db.add_all([
+                RecoveryTip(
+                    muscle_group=muscle,
+                    recovery_status=recovery_status,
+                    intensity=intensity,
+                    tip=tip,
+                    source="live"
+                )
+                for muscle, tip in fresh.items()
+            ])
+            db.commit()
+            for muscle, tip in fresh.items():
+                tip_library.add(muscle, recovery_status, intensity, tip)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not store live recovery tips: {e}")
+
+    return tips
+
+
+def build_tip_library(
+    db: Session,
+    tips_per_combo: int = RECOVERY_TIPS_PER_COMBO,
+    replace: bool = True
+) -> int:
+    """
+    Offline batch job: generate `tips_per_combo` tips for every
+    muscle group x recovery status x intensity and store them.
+
+    Muscle groups come from the muscle_groups table plus DEFAULT_MUSCLE_GROUPS.
+    With `replace`, previously batch-generated tips for a combo are swapped out
+    once its new tips are ready.
+
+    Returns:
+        int: number of tips stored
+    """
+    names = {name for (name,) in db.query(MuscleGroup.name).all()}
+    muscle_groups = sorted(names | set(DEFAULT_MUSCLE_GROUPS))
+
+    stored = 0
+    for muscle, recovery_status, intensity in itertools.product(muscle_groups, RECOVERY_STATUSES, INTENSITIES):
+        tips = []
+        for _ in range(tips_per_combo):
+            try:
+                tip = request_recovery_tip(
+                    muscle, intensity, 50,
+                    recovery_status=recovery_status, temperature=0.9, caller="recovery_tip_library"
+                )
+            except Exception as e:
+                logger.warning(f"Tip generation failed for {muscle}/{recovery_status}/{intensity}: {e}")
+                continue
+            if tip not in tips:
+                tips.append(tip)
+
+        if not tips:
+            continue
+
+        if replace:
+            db.query(RecoveryTip).filter(
+                RecoveryTip.muscle_group == muscle,
+                RecoveryTip.recovery_status == recovery_status,
+                RecoveryTip.intensity == intensity,
+                RecoveryTip.source == "batch"
+            ).delete(synchronize_session=False)
+
+        db.add_all([
+            RecoveryTip(
+                muscle_group=muscle,
+                recovery_status=recovery_status,
+                intensity=intensity,
+                tip=tip,
+                source="batch"
+            )
+            for tip in tips
+        ])
+        db.commit()
+        stored += len(tips)
+
+    logger.info(f"Recovery tip library built: {stored} tips for {len(muscle_groups)} muscle groups")
+    return stored
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    session = seasionlocal()
+    try:
+        count = build_tip_library(session)
+        print(f"Stored {count} recovery tips")
+    finally:
+        session.close()
@@ -1,12 +1,66 @@
-from openai import OpenAI
-import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List
+import logging
+from ..config import RECOVERY_TIP_CONCURRENCY, RECOVERY_TIP_TIMEOUT_SECONDS
+from .llm_gateway import get_llm_gateway
 
-groq_client = OpenAI(
-    api_key=os.getenv("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1",
+logger = logging.getLogger(__name__)
+
+# Shared across requests so the number of in-flight tip calls stays bounded process-wide.
+_tip_executor = ThreadPoolExecutor(
+    max_workers=RECOVERY_TIP_CONCURRENCY,
+    thread_name_prefix="recovery-tip"
 )
 
 
+RECOVERY_STATUS_CONTEXT = {
+    "red": "The muscle was trained within the last 24 hours and needs full rest.",
+    "yellow": "The muscle is partially recovered; only light work is advised.",
+    "green": "The muscle is recovered and ready to train again.",
+}
+
+
+def request_recovery_tip(
+    muscle_group: str,
+    intensity: str,
+    max_words: int,
+    timeout: float | None = None,
+    recovery_status: str | None = None,
+    temperature: float = 0.6,
+    caller: str = "recovery_tip"
+) -> str:
+    """One tip from the LLM, cut to `max_words`; raises on failure (callers pick the fallback)."""
+    status_context = RECOVERY_STATUS_CONTEXT.get(recovery_status, "")
+    prompt = f"""
+You are a certified sports recovery specialist.
+Give ONE short, highly actionable recovery tip for the {muscle_group} muscle group 
+after a {intensity} workout. {status_context}
+Focus on practical steps the user can take immediately.
+Keep it under {max_words} words.
+Be specific, motivational, and evidence-based.
+Output ONLY the tip text — no introduction, no quotes, no extra words.
+"""
+
+    response = get_llm_gateway().complete(
+        model="llama-3.1-8b-instant",  
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=80,                
+        top_p=0.9,
+        timeout=timeout,
+        caller=caller
+    )
+
+    tip = response.text
+    
+    
+    words = tip.split()
+    if len(words) > max_words:
+        tip = " ".join(words[:max_words]) + "..."
+
+    return tip
+
+
 def generate_recovery_tip(
     muscle_group: str,
     intensity: str = "intense",
@@ -23,36 +77,49 @@ def generate_recovery_tip(
     Returns:
         str: Recovery tip (fallback if API fails)
     """
-    prompt = f"""
-You are a certified sports recovery specialist.
-Give ONE short, highly actionable recovery tip for the {muscle_group} muscle group 
-after a {intensity} workout. 
-Focus on practical steps the user can take immediately.
-Keep it under {max_words} words.
-Be specific, motivational, and evidence-based.
-Output ONLY the tip text — no introduction, no quotes, no extra words.
-"""
-
     try:
-        response = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",  
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.6,              
-            max_tokens=80,                
-            top_p=0.9
-        )
-
-        tip = response.choices[0].message.content.strip()
-        
-        
-        words = tip.split()
-        if len(words) > max_words:
-            tip = " ".join(words[:max_words]) + "..."
-
-        return tip
+        return request_recovery_tip(muscle_group, intensity, max_words)
 
     except Exception as e:
         return (
             f"Prioritize rest for {muscle_group}. "
             f"Hydrate well, do light stretching, and eat protein-rich food within 2 hours."
-        )
\ No newline at end of file
+        )
+
+
+def generate_recovery_tips(
+    muscle_groups: List[str],
+    fallback_tip: str,
+    intensity: str = "intense",
+    max_words: int = 50,
+    timeout: float = RECOVERY_TIP_TIMEOUT_SECONDS,
+    recovery_status: str | None = None
+) -> Dict[str, str]:
+    """
+    Fetch tips for several muscle groups concurrently.
+
+    Calls run on a bounded shared pool; any call that fails or is still running
+    after `timeout` seconds gets `fallback_tip` instead. `recovery_status`
+    ("red"/"yellow"/"green") adds the matching context to the prompt.
+
+    Returns:
+        dict: muscle group -> tip
+    """
+    futures = {
+        muscle: _tip_executor.submit(request_recovery_tip, muscle, intensity, max_words, timeout, recovery_status)
+        for muscle in muscle_groups
+    }
+    wait(futures.values(), timeout=timeout)
+
+    tips = {}
+    for muscle, future in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning(f"Recovery tip for {muscle} timed out after {timeout}s")
+            tips[muscle] = fallback_tip
+        elif future.exception():
+            logger.warning(f"Recovery tip for {muscle} failed: {future.exception()}")
+            tips[muscle] = fallback_tip
+        else:
+            tips[muscle] = future.result()
+    return tips
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import Session
+
+from ..models.transaction_model import Transaction, TransactionStatus, TransactionType
+
+REVENUE_TYPES = (TransactionType.SUBSCRIPTION_PAYMENT, TransactionType.SUBSCRIPTION_RENEWAL)
+GRANULARITIES = ("day", "week", "month")
+
+
+def _revenue_filter():
+    # Leading status/type equality + created_at range matches ix_transactions_revenue
+    return and_(
+        Transaction.status == TransactionStatus.COMPLETED,
+        Transaction.type.in_(REVENUE_TYPES),
+        Transaction.amount > 0
+    )
+
+
+def _sum_between(start: datetime | None, end: datetime | None):
+    conditions = []
+    if start is not None:
+        conditions.append(Transaction.created_at >= start)
+    if end is not None:
+        conditions.append(Transaction.created_at < end)
+    amount = case((and_(*conditions), Transaction.amount), else_=0.0) if conditions else Transaction.amount
+    return func.coalesce(func.sum(amount), 0.0)
+
+
+def revenue_summary(db: Session, now: datetime | None = None) -> dict:
+    """Total, last-30-day and previous-30-day revenue in one scan (conditional aggregation)."""
+    now = now or datetime.utcnow()
+    month_start = now - timedelta(days=30)
+
+    row = db.query(
+        _sum_between(None, None).label("total_revenue"),
+        _sum_between(month_start, None).label("monthly_revenue"),
+        _sum_between(month_start - timedelta(days=30), month_start).label("last_month_revenue"),
+    ).filter(_revenue_filter()).one()
+
+    return {
+        "total_revenue": float(row.total_revenue),
+        "monthly_revenue": float(row.monthly_revenue),
+        "last_month_revenue": float(row.last_month_revenue),
+    }
+
+
+def revenue_series(
+    db: Session,
+    granularity: str = "day",
+    start: datetime | None = None,
+    end: datetime | None = None
+) -> List[dict]:
+    """
+    Revenue per `granularity` bucket (Postgres date_trunc), split by transaction
+    type and currency, oldest bucket first.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+
+    period = func.date_trunc(granularity, Transaction.created_at).label("period")
+    query = db.query(
+        period,
+        Transaction.type,
+        Transaction.currency,
+        func.sum(Transaction.amount).label("amount"),
+        func.count().label("transactions"),
+    ).filter(_revenue_filter())
+
+    if start is not None:
+        query = query.filter(Transaction.created_at >= start)
+    if end is not None:
+        query = query.filter(Transaction.created_at < end)
+
+    rows = (
+        query.group_by(period, Transaction.type, Transaction.currency)
+        .order_by(period, Transaction.type, Transaction.currency)
+        .all()
+    )
+    return [
+        {
+            "period": row.period,
+            "type": TransactionType(row.type).value,
+            "currency": row.currency,
+            "amount": float(row.amount or 0.0),
+            "transactions": row.transactions,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,282 @@
+"""
+Deterministic, LLM-free week plan builder.
+
+Picks exercises from the `exercises` table (restricted to the user's sport via
+`sport_exercises` when any are linked) and lays them out over the user's
+training days. The output has the same shape as the LLM's `week_plan`, so it is
+saved and returned through the same path as generated plans.
+"""
+import logging
+from typing import Dict, List
+
+from sqlalchemy import or_, func
+from sqlalchemy.orm import Session
+
+from ..models.exercise_model import Exercise, CNSEnum, SkillEnum, InjuryRiskEnum
+from ..models.onboarding_model import Onboarding
+from ..models.sport_model import Sport
+
+logger = logging.getLogger(__name__)
+
+DAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_TRAINING_DAYS = ["Monday", "Wednesday", "Friday"]
+
+SKILL_RANK = {SkillEnum.BEGINNER: 0, SkillEnum.INTERMEDIATE: 1, SkillEnum.ADVANCED: 2}
+LEVEL_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Highest injury risk allowed per skill level
+MAX_INJURY_RISK = {
+    SkillEnum.BEGINNER: InjuryRiskEnum.MEDIUM,
+    SkillEnum.INTERMEDIATE: InjuryRiskEnum.HIGH,
+    SkillEnum.ADVANCED: InjuryRiskEnum.HIGH,
+}
+# High-CNS exercises allowed on a heavy day; light days (after a heavy one) get none
+MAX_HIGH_CNS_PER_DAY = {SkillEnum.BEGINNER: 1, SkillEnum.INTERMEDIATE: 2, SkillEnum.ADVANCED: 2}
+
+# Strength benchmarks as (intermediate, advanced); 1RMs are ratios to body weight (both in kg)
+STRENGTH_BENCHMARKS = {
+    "bench_press_1rm": (0.75, 1.25),
+    "back_squat_1rm": (1.0, 1.75),
+    "deadlift_1rm": (1.25, 2.0),
+    "overhead_press_1rm": (0.5, 0.8),
+    "pull_up_reps": (5, 15),
+    "push_up_reps": (20, 45),
+    "vertical_jump_inches": (20, 28),
+}
+RATIO_METRICS = {"bench_press_1rm", "back_squat_1rm", "deadlift_1rm", "overhead_press_1rm"}
+# Higher ratios are typos or a wrong unit and are ignored
+MAX_PLAUSIBLE_RATIO = {"bench_press_1rm": 2.5, "back_squat_1rm": 3.5, "deadlift_1rm": 4.0, "overhead_press_1rm": 1.6}
+# 1RMs are entered in lbs or kg (StrengthLevels); without a "unit" entry they are read as lbs,
+# the smaller interpretation, so an unlabelled kg value can only under-rate the user
+STRENGTH_UNIT_KEY = "unit"
+KG_PER_UNIT = {"kg": 1.0, "lbs": 0.45359237}
+DEFAULT_STRENGTH_UNIT = "lbs"
+
+REGION_KEYWORDS = {
+    "upper": ["chest", "pec", "back", "lat", "trap", "shoulder", "delt", "bicep", "tricep", "forearm", "arm", "neck"],
+    "lower": ["quad", "hamstring", "glute", "calf", "calves", "leg", "hip", "adductor", "abductor"],
+    "core": ["core", "abs", "abdominal", "oblique", "lower back", "spine"],
+}
+# Focus rotation per number of training days
+SPLITS = {
+    1: ["full"],
+    2: ["full", "full"],
+    3: ["full", "full", "full"],
+    4: ["upper", "lower", "upper", "lower"],
+    5: ["upper", "lower", "full", "upper", "lower"],
+    6: ["upper", "lower", "full", "upper", "lower", "full"],
+    7: ["upper", "lower", "full", "upper", "lower", "full", "core"],
+}
+FOCUS_LABELS = {"upper": "Upper Body", "lower": "Lower Body", "full": "Full Body", "core": "Core & Conditioning"}
+
+EXERCISES_PER_DAY = {SkillEnum.BEGINNER: 4, SkillEnum.INTERMEDIATE: 5, SkillEnum.ADVANCED: 6}
+MINUTES_PER_EXERCISE = 9
+WARM_UP_COOL_DOWN_MINUTES = 15
+
+
+def _enum_value(value) -> str:
+    return value.value if hasattr(value, "value") else str(value)
+
+
+def estimate_skill_level(onboarding: Onboarding) -> SkillEnum:
+    """
+    Map onboarding strength levels to a skill level. Unknown or missing data
+    counts as beginner, so the engine errs on the safe side; so do 1RMs in an
+    unknown unit (read as lbs) and implausible ratios (ignored).
+    """
+    body_weight = onboarding.weight_kg or 0
+    levels = dict(onboarding.strength_levels or {})
+    unit = str(levels.pop(STRENGTH_UNIT_KEY, "") or "").strip().lower()
+    kg_per_unit = KG_PER_UNIT.get(unit, KG_PER_UNIT[DEFAULT_STRENGTH_UNIT])
+    scores = []
+    for name, value in levels.items():
+        benchmarks = STRENGTH_BENCHMARKS.get(name)
+        if not benchmarks:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if name in RATIO_METRICS:
+            if body_weight <= 0:
+                continue
+            value = value * kg_per_unit / body_weight
+            if value > MAX_PLAUSIBLE_RATIO[name]:
+                logger.warning(f"Ignoring implausible {name} of {value:.2f}x body weight")
+                continue
+        intermediate, advanced = benchmarks
+        scores.append(2 if value >= advanced else 1 if value >= intermediate else 0)
+
+    if not scores:
+        return SkillEnum.BEGINNER
+    average = sum(scores) / len(scores)
+    if average >= 1.5:
+        return SkillEnum.ADVANCED
+    if average >= 0.75:
+        return SkillEnum.INTERMEDIATE
+    return SkillEnum.BEGINNER
+
+
+def _region(exercise: Exercise) -> str:
+    muscle = (exercise.primary_muscle or "").lower()
+    for region in ("core", "lower", "upper"):
+        if any(keyword in muscle for keyword in REGION_KEYWORDS[region]):
+            return region
+    return "full"
+
+
+def _candidate_exercises(db: Session, onboarding: Onboarding) -> tuple[List[Exercise], str]:
+    """Exercises linked to the user's sport, or the whole library when none are linked."""
+    names = [n.strip().lower() for n in (onboarding.sport_sub_category, onboarding.sport_category) if n]
+    if names:
+        exercises = (
+            db.query(Exercise)
+            .join(Exercise.sports)
+            .filter(or_(
+                func.lower(Sport.name).in_(names),
+                func.lower(Sport.category).in_(names),
+                func.lower(Sport.sub_category).in_(names)
+            ))
+            .order_by(Exercise.id)
+            .distinct()
+            .all()
+        )
+        if exercises:
+            return exercises, onboarding.sport_category or names[0]
+
+    return db.query(Exercise).order_by(Exercise.id).all(), "both"
+
+
+def exercise_detail(exercise: Exercise, sport_label: str) -> dict:
+    return {
+        "name": exercise.name,
+        "sport_category": sport_label,
+        "movement_pattern": exercise.category,
+        "primary_muscles": exercise.primary_muscle,
+        "secondary_muscles": exercise.secondary_muscle,
+        "cns_load": _enum_value(exercise.cns_load),
+        "skill_level": _enum_value(exercise.skill_level),
+        "injury_risk": _enum_value(exercise.injury_risk),
+        "equipment": exercise.equipment,
+        "description": exercise.description,
+        "image_url": exercise.image_url,
+    }
+
+
+def _pick_for_day(
+    pool: List[Exercise],
+    focus: str,
+    count: int,
+    max_high_cns: int,
+    used: Dict[int, int]
+) -> List[Exercise]:
+    """
+    Prefer exercises matching the day's focus, spread over movement patterns and
+    used least so far this week; ties break on id so the result is stable.
+    High-CNS picks are capped at `max_high_cns`.
+    """
+    def matches(ex: Exercise) -> bool:
+        region = _region(ex)
+        return focus == "full" or region == focus or region == "full"
+
+    ordered = sorted(pool, key=lambda ex: (used.get(ex.id, 0), ex.id))
+    on_focus = [ex for ex in ordered if matches(ex)]
+    off_focus = [ex for ex in ordered if not matches(ex)]
+
+    picked: List[Exercise] = []
+    high_cns = 0
+
+    def take(candidates: List[Exercise], distinct_patterns: bool) -> None:
+        nonlocal high_cns
+        patterns = {ex.category for ex in picked}
+        for exercise in candidates:
+            if len(picked) >= count:
+                return
+            if exercise in picked:
+                continue
+            is_high = _enum_value(exercise.cns_load) == CNSEnum.HIGH.value
+            if is_high and high_cns >= max_high_cns:
+                continue
+            if distinct_patterns and exercise.category in patterns:
+                continue
+            picked.append(exercise)
+            patterns.add(exercise.category)
+            high_cns += is_high
+
+    # one per movement pattern first, then fill from the focus, then from anything allowed
+    take(on_focus, distinct_patterns=True)
+    take(on_focus, distinct_patterns=False)
+    take(off_focus, distinct_patterns=False)
+
+    for exercise in picked:
+        used[exercise.id] = used.get(exercise.id, 0) + 1
+    # heavy (high-CNS) work first, while the athlete is fresh
+    return sorted(picked, key=lambda ex: -LEVEL_RANK.get(_enum_value(ex.cns_load), 0))
+
+
+def build_rule_based_week_plan(db: Session, onboarding: Onboarding) -> list:
+    """
+    Build a 7-day `week_plan` (same dict shape the LLM returns) without any model call.
+
+    - Only exercises at or below the estimated skill level and within its
+      injury-risk ceiling are used.
+    - High-CNS work is capped per day and skipped on a training day that
+      directly follows another training day with high-CNS work.
+    - Non-training days are "Rest" days.
+    """
+    skill = estimate_skill_level(onboarding)
+    exercises, sport_label = _candidate_exercises(db, onboarding)
+
+    max_risk = LEVEL_RANK[MAX_INJURY_RISK[skill].value]
+    pool = [
+        ex for ex in exercises
+        if SKILL_RANK.get(SkillEnum(_enum_value(ex.skill_level)), 0) <= SKILL_RANK[skill]
+        and LEVEL_RANK.get(_enum_value(ex.injury_risk), 0) <= max_risk
+    ]
+    if not pool:
+        raise ValueError("No exercises available for this profile.")
+
+    training_days = {d.strip().title() for d in (onboarding.training_days or DEFAULT_TRAINING_DAYS)}
+    training_days = [d for d in DAY_ORDER if d in training_days] or DEFAULT_TRAINING_DAYS
+    split = SPLITS[len(training_days)]
+    per_day = EXERCISES_PER_DAY[skill]
+
+    used: Dict[int, int] = {}
+    week_plan = []
+    previous_was_heavy = False
+    previous_index = None
+    training_index = 0
+    for index, day in enumerate(DAY_ORDER):
+        if day not in training_days:
+            week_plan.append({
+                "day": day,
+                "muscle_group": "Rest",
+                "duration": 0,
+                "exercises": [{"name": "Rest & recovery", "description": "Light walking, mobility and stretching"}],
+                "warm_up": "",
+                "cool_down": "",
+                "status": "Rest",
+            })
+            continue
+
+        focus = split[training_index]
+        back_to_back = previous_index is not None and index - previous_index == 1
+        max_high_cns = 0 if (back_to_back and previous_was_heavy) else MAX_HIGH_CNS_PER_DAY[skill]
+
+        picked = _pick_for_day(pool, focus, per_day, max_high_cns, used)
+        previous_was_heavy = any(_enum_value(ex.cns_load) == CNSEnum.HIGH.value for ex in picked)
+        previous_index = index
+        training_index += 1
+
+        week_plan.append({
+            "day": day,
+            "muscle_group": FOCUS_LABELS[focus],
+            "duration": WARM_UP_COOL_DOWN_MINUTES + MINUTES_PER_EXERCISE * len(picked),
+            "exercises": [exercise_detail(ex, sport_label) for ex in picked],
+            "warm_up": "5-10 min light cardio + dynamic mobility for the day's muscle groups",
+            "cool_down": "5 min easy cardio + static stretching",
+            "status": "Pending",
+        })
+
+    logger.info(f"Rule-based plan: {len(training_days)} training days, skill {skill.value}, pool {len(pool)}")
+    return week_plan
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from ..config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_SERVICE_URL,
+    EMBEDDING_SERVICE_TIMEOUT,
+    CHROMA_PERSIST_DIR,
+    CHROMA_COLLECTION_NAME,
+    RETRIEVER_TOP_K,
+    RETRIEVER_FETCH_K,
+    RETRIEVER_MMR_LAMBDA,
+    RETRIEVAL_CACHE_ENABLED,
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+    VECTOR_BACKEND,
+)
+
+logger = logging.getLogger(__name__)
+
+# torch / sentence-transformers / chromadb are only imported inside the loaders below,
+# so importing this module (and app.main) stays cheap.
+_lock = threading.RLock()
+_embeddings: Embeddings | None = None
+_vectorstore = None
+_numpy_index = None
+_retriever = None
+
+INDEX_VERSION_FILE = os.path.join(CHROMA_PERSIST_DIR, "index_version")
+_index_version_cache: tuple[float, str] | None = None
+
+
+class RemoteEmbeddings(Embeddings):
+    """
+    Embeddings served by the local sidecar process (app.services.embedding_sidecar),
+    so every uvicorn worker shares one loaded model instead of holding its own copy.
+    """
+
+    def __init__(self, base_url: str, timeout: float = EMBEDDING_SERVICE_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        request = urllib.request.Request(
+            f"{self.base_url}/embed",
+            data=json.dumps({"texts": texts}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["embeddings"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+
+def load_local_embeddings() -> Embeddings:
+    """Load the sentence-transformers model into this process."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    logger.info(f"Loading embedding model {EMBEDDING_MODEL_NAME}...")
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+
+def get_embeddings() -> Embeddings:
+    """Process-wide embeddings, created on first use."""
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                if EMBEDDING_SERVICE_URL:
+                    logger.info(f"Using embedding sidecar at {EMBEDDING_SERVICE_URL}")
+                    _embeddings = RemoteEmbeddings(EMBEDDING_SERVICE_URL)
+                else:
+                    _embeddings = load_local_embeddings()
+    return _embeddings
+
+
+def get_vectorstore():
+    """Process-wide Chroma store over the exercise collection, created on first use."""
+    global _vectorstore
+    if _vectorstore is None:
+        with _lock:
+            if _vectorstore is None:
+                from langchain_chroma import Chroma
+
+                _vectorstore = Chroma(
+                    collection_name=CHROMA_COLLECTION_NAME,
+                    embedding_function=get_embeddings(),
+                    persist_directory=CHROMA_PERSIST_DIR
+                )
+    return _vectorstore
+
+
+def get_numpy_index():
+    """Process-wide in-process index over the matrix exported from Chroma (VECTOR_BACKEND=numpy)."""
+    global _numpy_index
+    if _numpy_index is None:
+        with _lock:
+            if _numpy_index is None:
+                from .numpy_index import NumpyExerciseIndex
+
+                _numpy_index = NumpyExerciseIndex()
+    return _numpy_index
+
+
+def get_index_version() -> str:
+    """
+    Version stamp written by the indexer after every rebuild. Re-read only when
+    the file's mtime changes, so checking it on each retrieval costs one stat().
+    """
+    global _index_version_cache
+    try:
+        mtime = os.stat(INDEX_VERSION_FILE).st_mtime
+    except FileNotFoundError:
+        return "0"
+
+    cached = _index_version_cache
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(INDEX_VERSION_FILE) as f:
+        version = f.read().strip() or "0"
+    _index_version_cache = (mtime, version)
+    return version
+
+
+def bump_index_version() -> str:
+    """Record that the exercise index was rebuilt; invalidates retrieval caches in every worker."""
+    os.makedirs(CHROMA_PERSIST_DIR, exist_ok=True)
+    version = str(time.time_ns())
+    with open(INDEX_VERSION_FILE, "w") as f:
+        f.write(version)
+    return version
+
+
+def diversify_by_pattern(docs: List[Document], k: int) -> List[Document]:
+    """
+    Round-robin over movement patterns (keeping relevance order within each),
+    so k documents cover as many patterns as the candidates allow.
+    """
+    groups: OrderedDict[str, List[Document]] = OrderedDict()
+    for doc in docs:
+        groups.setdefault(doc.metadata.get("movement_pattern") or "", []).append(doc)
+
+    diversified: List[Document] = []
+    while len(diversified) < k and any(groups.values()):
+        for pattern_docs in groups.values():
+            if pattern_docs and len(diversified) < k:
+                diversified.append(pattern_docs.pop(0))
+    return diversified
+
+
+class CachedRetriever:
+    """
+    Memoizing front for the vector store (Chroma or the NumPy index). Query embeddings are cached by query text;
+    results are cached by (query text, k, metadata filter) and dropped whenever the index version changes.
+
+    Search is MMR over `fetch_k` candidates matching the filter, followed by a
+    round-robin pass across movement patterns.
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        embeddings: Embeddings,
+        k: int,
+        max_entries: int,
+        fetch_k: int = RETRIEVER_FETCH_K,
+        lambda_mult: float = RETRIEVER_MMR_LAMBDA
+    ):
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.k = k
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._query_embeddings: OrderedDict[str, List[float]] = OrderedDict()
+        self._results: OrderedDict[tuple, List[Document]] = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "embedding_hits": 0, "invalidations": 0}
+
+    def invoke(self, query: str, filter: dict | None = None, k: int | None = None) -> List[Document]:
+        k = k or self.k
+        key = (query, k, json.dumps(filter, sort_keys=True) if filter else None)
+        version = get_index_version()
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self._stats["invalidations"] += 1
+                self._results.clear()
+                self._version = version
+
+            docs = self._results.get(key)
+            if docs is not None:
+                self._results.move_to_end(key)
+                self._stats["hits"] += 1
+                return list(docs)
+            self._stats["misses"] += 1
+
+        # MMR keeps 2k diverse candidates so the pattern pass has something to choose from
+        candidates = self.vectorstore.max_marginal_relevance_search_by_vector(
+            self.embed_query(query),
+            k=min(self.fetch_k, k * 2),
+            fetch_k=self.fetch_k,
+            lambda_mult=self.lambda_mult,
+            filter=filter
+        )
+        docs = diversify_by_pattern(candidates, k)
+
+        with self._lock:
+            if version == self._version:
+                self._remember(self._results, key, docs)
+        return list(docs)
+
+    def embed_query(self, query: str) -> List[float]:
+        with self._lock:
+            embedding = self._query_embeddings.get(query)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+                self._stats["embedding_hits"] += 1
+                return embedding
+
+        embedding = self.embeddings.embed_query(query)
+        with self._lock:
+            self._remember(self._query_embeddings, query, embedding)
+        return embedding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._query_embeddings.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "index_version": self._version,
+                "cached_results": len(self._results),
+                "cached_embeddings": len(self._query_embeddings),
+            }
+
+    def _remember(self, store: OrderedDict, key, value) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+
+def get_retriever() -> CachedRetriever:
+    """Process-wide exercise retriever, created on first use."""
+    global _retriever
+    if _retriever is None:
+        with _lock:
+            if _retriever is None:
+                _retriever = CachedRetriever(
+                    get_numpy_index() if VECTOR_BACKEND == "numpy" else get_vectorstore(),
+                    get_embeddings(),
+                    k=RETRIEVER_TOP_K,
+                    # with the cache disabled every entry is evicted as soon as it is stored
+                    max_entries=RETRIEVAL_CACHE_MAX_ENTRIES if RETRIEVAL_CACHE_ENABLED else 0
+                )
+    return _retriever
+
+
+def get_retrieval_cache_stats() -> dict:
+    if not RETRIEVAL_CACHE_ENABLED:
+        return {"enabled": False}
+    if _retriever is None:
+        return {"enabled": True, "loaded": False}
+    return {"enabled": True, "loaded": True, **_retriever.stats()}
+
+
+def warm_up_retriever() -> None:
+    """Load the model and store ahead of the first request (optional startup hook)."""
+    get_retriever()
+    get_embeddings().embed_query("warm up")
+    logger.info("Exercise retriever warmed up")
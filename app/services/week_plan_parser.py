@@ -0,0 +1,70 @@
+"""
+Parsing of the LLM's `week_plan` JSON.
+
+The whole payload is validated in one pass with `WeekPlanPayload.model_validate_json`
+(pydantic-core's JSON parser, no intermediate `json.loads`). When that fails —
+usually output cut off at max_tokens or one malformed day — the complete day
+objects are salvaged one by one, so the caller only has to regenerate the days
+that are still missing.
+"""
+import logging
+from typing import List
+
+from pydantic import ValidationError
+
+from ..schemas.workout_schema import PlanDayPayload, WeekPlanPayload
+from ..utils.json_stream import JsonArrayStreamParser
+
+logger = logging.getLogger(__name__)
+
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def validate_day(item: dict) -> dict | None:
+    """The validated day as a plain dict, or None if it does not match PlanDayPayload."""
+    try:
+        return PlanDayPayload.model_validate(item).model_dump()
+    except ValidationError as e:
+        logger.warning(f"Dropping invalid day {item.get('day')!r}: {e.error_count()} error(s)")
+        return None
+
+
+def salvage_days(raw_output: str) -> List[dict]:
+    """Every complete, valid day object in `raw_output`, even if the JSON is truncated."""
+    parser = JsonArrayStreamParser("week_plan")
+    days = []
+    for item in parser.feed(raw_output):
+        day = validate_day(item)
+        if day is not None:
+            days.append(day)
+    return days
+
+
+def merge_days(*batches: List[dict]) -> List[dict]:
+    """One entry per weekday (the first one seen wins), in week order."""
+    by_day = {}
+    for batch in batches:
+        for day in batch:
+            by_day.setdefault(day["day"], day)
+    return [by_day[name] for name in WEEK_DAYS if name in by_day]
+
+
+def missing_days(days: List[dict]) -> List[str]:
+    present = {day["day"] for day in days}
+    return [name for name in WEEK_DAYS if name not in present]
+
+
+def parse_week_plan(raw_output: str) -> List[dict]:
+    """
+    Validated days of `raw_output`, one per weekday, in week order. May return
+    fewer than 7 days (or none) when the output had to be salvaged.
+    """
+    try:
+        payload = WeekPlanPayload.model_validate_json(raw_output)
+        return merge_days([day.model_dump() for day in payload.week_plan])
+    except ValidationError as e:
+        logger.warning(f"week_plan failed validation ({e.error_count()} error(s)); salvaging complete days")
+
+    days = merge_days(salvage_days(raw_output))
+    logger.info(f"Salvaged {len(days)} of 7 days from the LLM output")
+    return days
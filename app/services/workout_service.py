@@ -1,46 +1,94 @@
 import json
 import logging
-from datetime import datetime, timedelta
-from typing import List
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Iterator, Tuple
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
 
+from ..database import seasionlocal
 from ..models.user_model import User
+from ..models.onboarding_model import Onboarding
 from ..models.workout_model import WorkoutPlan
 from ..schemas.workout_schema import WorkoutPlanOut
-from ..utils.prompts import WORKOUT_GENERATION_PROMPT
-from ..config import groq_client
+from ..schemas.notification_schema import NotificationCreate
+from ..crud.notification_crud import create_notification
+from ..utils.prompts import WORKOUT_GENERATION_PROMPT, MISSING_DAYS_PROMPT, DAY_REGENERATION_PROMPT
+from ..utils.json_stream import JsonArrayStreamParser
+from ..models.subs_model import Subscription
+from ..config import (
+    PLAN_ENGINE_FREE_TIER_DEFAULT,
+    PLAN_ENGINE_PREMIUM_DEFAULT,
+    PLAN_ENGINE_RULES_FALLBACK,
+    PLAN_LLM_TIMEOUT_SECONDS,
+    PLAN_REPAIR_MIN_SECONDS,
+    PLAN_CONTEXT_TOKEN_BUDGET,
+    PLAN_DAY_CONTEXT_TOKEN_BUDGET,
+    RETRIEVER_MIN_FILTERED_RESULTS,
+)
+from .vector_store import get_retriever
+from .llm_gateway import get_llm_gateway
+from .dashboard_stats import is_premium
+from .rule_based_plan import build_rule_based_week_plan, estimate_skill_level
+from .exercise_rag import SKILL_RANKS
+from .week_plan_parser import parse_week_plan, validate_day, missing_days, merge_days, WEEK_DAYS
+from .plan_context import build_plan_context, PlanContext, CONTEXT_HEADER
+from .plan_retention import backfill_current_plans
+from .plan_cache import get_cached_week_plan, store_week_plan, store_week_plan_for_key, profile_cache_key
 
 logger = logging.getLogger(__name__)
 
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-vectorstore = Chroma(
-    collection_name="iron_ready_exercises",
-    embedding_function=embeddings,
-    persist_directory="./chroma_db_exercise"
-)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 10})
 
+SYSTEM_PROMPT = "Output ONLY valid JSON. No explanations, no markdown, no extra text."
+GENERATION_MODEL = "llama-3.1-8b-instant"
+# The model answers with exercise ids only, so a week fits in far fewer tokens
+GENERATION_MAX_TOKENS = 1200
+PLAN_ENGINES = ("llm", "rules")
+INSTRUCTIONS_MAX_CHARS = 300
 
-def generate_workout_plan_service(
-    current_user: User,
-    db: Session
-) -> List[WorkoutPlanOut]:
-    """
-    Generate and save personalized 7-day workout plan with full exercise details.
-    """
-    if not current_user.onboarding or not current_user.onboarding.is_onboarded:
-        raise ValueError("User must complete onboarding first.")
+DAY_TO_INDEX = {
+    "Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3,
+    "Friday": 4, "Saturday": 5, "Sunday": 6
+}
 
-    onboarding = current_user.onboarding
 
-    age = onboarding.age or 25
-    gender = onboarding.gender or "not specified"
-    height_cm = onboarding.height_cm or 170.0
-    weight_kg = onboarding.weight_kg or 70.0
-    
+def exercise_filters(onboarding: Onboarding) -> List[dict | None]:
+    """
+    Chroma metadata filters from strictest to loosest: sport + skill, sport only,
+    then no filter. The caller stops at the first that returns enough documents.
+    """
+    sport = (onboarding.sport_category or "").strip().lower()
+    skill_rank = SKILL_RANKS[estimate_skill_level(onboarding).value]
+
+    sport_filter = {"sport_category": {"$in": [sport, "both"]}} if sport else None
+    skill_filter = {"skill_rank": {"$lte": skill_rank}}
+
+    filters = []
+    if sport_filter:
+        filters.append({"$and": [sport_filter, skill_filter]})
+        filters.append(sport_filter)
+    else:
+        filters.append(skill_filter)
+    filters.append(None)
+    return filters
+
+
+def retrieve_exercise_docs(query: str, onboarding: Onboarding) -> list:
+    retriever = get_retriever()
+    docs = []
+    for metadata_filter in exercise_filters(onboarding):
+        docs = retriever.invoke(query, filter=metadata_filter)
+        if len(docs) >= RETRIEVER_MIN_FILTERED_RESULTS:
+            break
+        logger.info(f"Only {len(docs)} exercises matched {metadata_filter}; relaxing the filter")
+    return docs
+
+
+def profile_fields(onboarding: Onboarding) -> dict:
+    """Onboarding profile as the placeholders shared by the plan prompts."""
     sport_category = onboarding.sport_category or "general fitness"
     sport_sub_category = onboarding.sport_sub_category or None
     sport = sport_category
@@ -50,113 +98,342 @@ def generate_workout_plan_service(
     training_days = onboarding.training_days or ["Monday", "Wednesday", "Friday"]
     strength_levels = onboarding.strength_levels or {}
 
+    return {
+        "age": onboarding.age or 25,
+        "gender": onboarding.gender or "not specified",
+        "height_cm": onboarding.height_cm or 170.0,
+        "weight_kg": onboarding.weight_kg or 70.0,
+        "sport": sport,
+        "training_days": ", ".join(training_days),
+        "strength_levels_json": json.dumps(strength_levels, ensure_ascii=False),
+    }
+
+
+def retrieve_plan_context(
+    current_user: User,
+    onboarding: Onboarding,
+    db: Session,
+    token_budget: int = PLAN_CONTEXT_TOKEN_BUDGET
+) -> PlanContext:
+    profile = profile_fields(onboarding)
     query = (
-        f"Exercises for {sport} sport, training days: {', '.join(training_days)}, "
+        f"Exercises for {profile['sport']} sport, training days: {profile['training_days']}, "
         f"patterns: press, hinge, squat, pull, jump, rotate, carry"
     )
-    docs = retriever.invoke(query)
-    context = "\n\n".join([doc.page_content for doc in docs])
-
-    logger.info(f"Retrieved {len(docs)} exercises for user {current_user.id}")
-
-    formatted_prompt = WORKOUT_GENERATION_PROMPT.format(
-        age=age,
-        gender=gender,
-        height_cm=height_cm,
-        weight_kg=weight_kg,
-        sport=sport,
-        training_days=", ".join(training_days),
-        strength_levels_json=json.dumps(strength_levels, ensure_ascii=False),
-        context=context
-    )
+    docs = retrieve_exercise_docs(query, onboarding)
+    context = build_plan_context(db, docs, token_budget)
+
+    logger.info(f"Retrieved {len(docs)} exercises for user {current_user.id}, {len(context.details)} in context")
+    return context
+
+
+def build_workout_prompt(current_user: User, onboarding: Onboarding, db: Session) -> tuple[str, PlanContext]:
+    """
+    Retrieve exercises and fill WORKOUT_GENERATION_PROMPT from the onboarding profile.
+    Returns the prompt and the context needed to expand the exercise ids in the answer.
+    """
+    context = retrieve_plan_context(current_user, onboarding, db)
+    return WORKOUT_GENERATION_PROMPT.format(
+        **profile_fields(onboarding),
+        context_header=CONTEXT_HEADER,
+        context=context.table
+    ), context
 
+
+def _request_plan_text(prompt: str, timeout: float, caller: str) -> str:
     try:
-        response = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        response = get_llm_gateway().complete(
+            model=GENERATION_MODEL,
             messages=[
-                {"role": "system", "content": "Output ONLY valid JSON. No explanations, no markdown, no extra text."},
-                {"role": "user", "content": formatted_prompt}
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
             ],
             temperature=0.35,
-            max_tokens=3000,
-            response_format={"type": "json_object"}
+            max_tokens=GENERATION_MAX_TOKENS,
+            json_mode=True,
+            timeout=timeout,
+            caller=caller
         )
+    except Exception as e:
+        logger.error(f"Groq error: {e}")
+        raise RuntimeError(f"Generation failed: {e}")
+
+    logger.debug(f"Groq raw output (first 500 chars): {response.text[:500]}...")
+    return response.text
+
 
-        raw_output = response.choices[0].message.content.strip()
-        logger.debug(f"Groq raw output (first 500 chars): {raw_output[:500]}...")
+def expand_days(days: List[dict], context: PlanContext) -> List[dict]:
+    """Expand exercise ids; days the context cannot fill are dropped (and so count as missing)."""
+    expanded = (context.expand_day(day) for day in days)
+    return [day for day in expanded if day is not None]
 
-        plan_data = json.loads(raw_output)
-        week_plan = plan_data.get("week_plan", [])
 
-        if not week_plan or not isinstance(week_plan, list):
-            raise ValueError("No valid 'week_plan' list in response")
+def request_missing_days(formatted_prompt: str, context: PlanContext, days: List[str], timeout: float) -> List[dict]:
+    """Ask for just `days` of the plan; returns the valid, expanded ones that came back."""
+    prompt = MISSING_DAYS_PROMPT.format(prompt=formatted_prompt, days=", ".join(days))
+    week_plan = parse_week_plan(_request_plan_text(prompt, timeout, "workout_plan_repair"))
+    return expand_days([day for day in week_plan if day["day"] in days], context)
 
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parse error: {e} | Raw output: {raw_output}")
-        raise ValueError("LLM output is not valid JSON")
+
+def complete_week_plan(formatted_prompt: str, context: PlanContext, week_plan: List[dict], deadline: float) -> List[dict]:
+    """
+    Fill in days missing from a salvaged plan with one extra call, if the deadline
+    leaves time for it. On failure the partial plan is returned as is.
+    """
+    missing = missing_days(week_plan)
+    if not missing:
+        return week_plan
+
+    remaining = deadline - time.monotonic()
+    if remaining < PLAN_REPAIR_MIN_SECONDS:
+        logger.warning(f"No time left to regenerate {missing}; keeping {len(week_plan)} days")
+        return week_plan
+
+    logger.info(f"Regenerating missing days {missing}")
+    try:
+        repaired = request_missing_days(formatted_prompt, context, missing, remaining)
+    except RuntimeError as e:
+        logger.warning(f"Could not regenerate {missing}: {e}")
+        return week_plan
+    return merge_days(week_plan, repaired)
+
+
+def request_week_days(
+    formatted_prompt: str,
+    context: PlanContext,
+    days: List[str],
+    timeout: float = PLAN_LLM_TIMEOUT_SECONDS
+) -> List[dict]:
+    """Completion for a prompt that asks for just `days`; other days in the answer are ignored."""
+    week_plan = parse_week_plan(_request_plan_text(formatted_prompt, timeout, "workout_day"))
+    week_plan = expand_days([day for day in week_plan if day["day"] in days], context)
+    if not week_plan:
+        raise ValueError("No valid days in response")
+    return week_plan
+
+
+def request_week_plan(formatted_prompt: str, context: PlanContext, timeout: float = PLAN_LLM_TIMEOUT_SECONDS) -> list:
+    """
+    Single blocking completion; returns the validated `week_plan` days with their
+    exercises expanded. Days lost to truncated or invalid output (or without any
+    known exercise id) are requested again in one follow-up call.
+    """
+    deadline = time.monotonic() + timeout
+    week_plan = expand_days(parse_week_plan(_request_plan_text(formatted_prompt, timeout, "workout_plan")), context)
+    if not week_plan:
+        raise ValueError("No valid 'week_plan' days in response")
+    return complete_week_plan(formatted_prompt, context, week_plan, deadline)
+
+
+def stream_week_plan(
+    formatted_prompt: str,
+    context: PlanContext,
+    timeout: float = PLAN_LLM_TIMEOUT_SECONDS
+) -> Iterator[dict]:
+    """
+    Streaming completion; yields each `week_plan` day as soon as its JSON object closes.
+    `json_mode=True` only describes the expected output: the Groq backend cannot enforce
+    JSON mode while streaming, so the array is located by key in the raw text.
+    Invalid days are skipped, and days missing when the stream ends are requested in one follow-up call.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        deltas = get_llm_gateway().stream(
+            model=GENERATION_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": formatted_prompt}
+            ],
+            temperature=0.35,
+            max_tokens=GENERATION_MAX_TOKENS,
+            json_mode=True,  # not enforced when streaming; see the docstring
+            timeout=timeout,
+            caller="workout_plan_stream"
+        )
     except Exception as e:
         logger.error(f"Groq error: {e}")
         raise RuntimeError(f"Generation failed: {e}")
 
-    created_plans = []
+    parser = JsonArrayStreamParser("week_plan")
+    streamed: List[dict] = []
     try:
-        today = datetime.utcnow().date()
-        weekday = today.weekday()
-        week_start_date = today - timedelta(days=weekday)
+        for delta in deltas:
+            for item in parser.feed(delta):
+                day = validate_day(item)
+                if day is not None:
+                    day = context.expand_day(day)
+                if day is not None and day["day"] not in {d["day"] for d in streamed}:
+                    streamed.append(day)
+                    yield day
+            if parser.finished:
+                break
+    finally:
+        deltas.close()
 
-        day_to_index = {
-            "Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3,
-            "Friday": 4, "Saturday": 5, "Sunday": 6
-        }
+    if streamed:
+        yield from (day for day in complete_week_plan(formatted_prompt, context, streamed, deadline) if day not in streamed)
 
-        for day_plan in week_plan:
-            required = {"day", "muscle_group", "duration", "exercises"}
-            missing = required - set(day_plan.keys())
-            if missing:
-                logger.warning(f"Skipping day '{day_plan.get('day')}': missing {missing}")
-                continue
 
-            day_name = day_plan["day"]
-            if day_name not in day_to_index:
-                logger.warning(f"Invalid day: {day_name}")
-                continue
+def current_week_start() -> tuple[date, date]:
+    today = datetime.utcnow().date()
+    return today, today - timedelta(days=today.weekday())
+
+
+def new_plan_version() -> str:
+    return uuid.uuid4().hex
+
+
+def supersede_current_plans(db: Session, user_id: int, plan_version_id: str) -> int:
+    """
+    Clear `is_current` on the user's rows from any other version. Only staged in
+    `db`, so the switch commits together with the new version's rows.
+    """
+    return db.query(WorkoutPlan).filter(
+        WorkoutPlan.user_id == user_id,
+        WorkoutPlan.is_current.is_(True),
+        or_(WorkoutPlan.plan_version_id.is_(None), WorkoutPlan.plan_version_id != plan_version_id)
+    ).update({WorkoutPlan.is_current: False}, synchronize_session=False)
+
+
+def activate_plan_version(db: Session, user_id: int, plan_version_id: str) -> None:
+    """Make every row of `plan_version_id` current and supersede the rest (staged, not committed)."""
+    supersede_current_plans(db, user_id, plan_version_id)
+    db.query(WorkoutPlan).filter(
+        WorkoutPlan.user_id == user_id,
+        WorkoutPlan.plan_version_id == plan_version_id
+    ).update({WorkoutPlan.is_current: True}, synchronize_session=False)
+
+
+def build_plan_row(
+    user_id: int,
+    day_plan: dict,
+    today: date,
+    week_start_date: date,
+    plan_version_id: str | None = None
+) -> WorkoutPlan | None:
+    """
+    Validate one LLM/cached day and build its (unsaved) WorkoutPlan; None if unusable.
+    Rows built with a `plan_version_id` are marked current.
+    """
+    if not isinstance(day_plan, dict):
+        logger.warning(f"Skipping non-object day: {day_plan!r}")
+        return None
+
+    required = {"day", "muscle_group", "duration", "exercises"}
+    missing = required - set(day_plan.keys())
+    if missing:
+        logger.warning(f"Skipping day '{day_plan.get('day')}': missing {missing}")
+        return None
+
+    day_name = day_plan["day"]
+    if day_name not in DAY_TO_INDEX:
+        logger.warning(f"Invalid day: {day_name}")
+        return None
+
+    day_offset = DAY_TO_INDEX[day_name]
+    plan_date = week_start_date + timedelta(days=day_offset)
+    plan_datetime = datetime.combine(plan_date, datetime.min.time())
+
+    status = "Today" if plan_date == today else \
+             "Done" if plan_date < today else \
+             day_plan.get("status") or "Pending"
+
+    exercises = day_plan.get("exercises", [])
+
+    if not isinstance(exercises, list) or not exercises:
+        exercises = [{"name": "No exercises provided"}]
+    elif not all(isinstance(ex, dict) for ex in exercises):
+        logger.warning("Invalid exercises format from LLM")
+        exercises = [{"name": "Invalid exercise data"}]
+
+    return WorkoutPlan(
+        user_id=user_id,
+        week=plan_date.isocalendar().week,
+        day=day_name,
+        plan_datetime=plan_datetime,
+        muscle_group=day_plan["muscle_group"],
+        duration=day_plan.get("duration", 45),
+        exercises=exercises,  
+        warm_up=day_plan.get("warm_up", ""),
+        cool_down=day_plan.get("cool_down", ""),
+        status=status,
+        generated_at=datetime.utcnow(),
+        plan_version_id=plan_version_id,
+        is_current=plan_version_id is not None
+    )
 
-            day_offset = day_to_index[day_name]
-            plan_date = week_start_date + timedelta(days=day_offset)
-            plan_datetime = datetime.combine(plan_date, datetime.min.time())
-
-            status = "Today" if plan_date == today else \
-                     "Done" if plan_date < today else \
-                     day_plan.get("status") or "Pending"
-
-           
-            exercises = day_plan.get("exercises", [])
-
-            
-            if not isinstance(exercises, list) or not exercises:
-                exercises = [{"name": "No exercises provided"}]
-            elif not all(isinstance(ex, dict) for ex in exercises):
-                logger.warning("Invalid exercises format from LLM")
-                exercises = [{"name": "Invalid exercise data"}]
-
-            db_plan = WorkoutPlan(
-                user_id=current_user.id,
-                week=1,
-                day=day_name,
-                plan_datetime=plan_datetime,
-                muscle_group=day_plan["muscle_group"],
-                duration=day_plan.get("duration", 45),
-                exercises=exercises,  
-                warm_up=day_plan.get("warm_up", ""),
-                cool_down=day_plan.get("cool_down", ""),
-                status=status,
-                generated_at=datetime.utcnow()
-            )
 
+def has_premium_subscription(db: Session, user_id: int) -> bool:
+    subscriptions = db.query(Subscription.status, Subscription.cancel_at_period_end).filter(
+        Subscription.user_id == user_id
+    ).all()
+    return any(is_premium(sub.status, sub.cancel_at_period_end) for sub in subscriptions)
+
+
+def resolve_plan_engine(db: Session, user_id: int, requested: str | None = None) -> str:
+    """The engine asked for in the request, else the default for the user's tier."""
+    if requested:
+        if requested not in PLAN_ENGINES:
+            raise ValueError(f"Unknown plan engine '{requested}'. Use one of: {', '.join(PLAN_ENGINES)}")
+        return requested
+    if has_premium_subscription(db, user_id):
+        return PLAN_ENGINE_PREMIUM_DEFAULT
+    return PLAN_ENGINE_FREE_TIER_DEFAULT
+
+
+def generate_workout_plan_service(
+    current_user: User,
+    db: Session,
+    engine: str | None = None
+) -> List[WorkoutPlanOut]:
+    """
+    Generate and save personalized 7-day workout plan with full exercise details.
+
+    `engine` is "llm" or "rules"; when omitted it is picked by subscription tier.
+    A failed or timed-out LLM call falls back to the rule-based engine if
+    PLAN_ENGINE_RULES_FALLBACK is set.
+    """
+    if not current_user.onboarding or not current_user.onboarding.is_onboarded:
+        raise ValueError("User must complete onboarding first.")
+
+    onboarding = current_user.onboarding
+    engine = resolve_plan_engine(db, current_user.id, engine)
+
+    if engine == "rules":
+        week_plan = build_rule_based_week_plan(db, onboarding)
+    else:
+        week_plan = get_cached_week_plan(onboarding)
+        if week_plan is not None:
+            logger.info(f"Plan cache hit for user {current_user.id}")
+        else:
+            try:
+                formatted_prompt, context = build_workout_prompt(current_user, onboarding, db)
+                week_plan = request_week_plan(formatted_prompt, context)
+            except (ValueError, RuntimeError) as e:
+                if not PLAN_ENGINE_RULES_FALLBACK:
+                    raise
+                logger.warning(f"LLM generation failed for user {current_user.id}, using rule-based plan: {e}")
+                week_plan = build_rule_based_week_plan(db, onboarding)
+            else:
+                # a plan still missing days after repair is served once, not cached
+                if not missing_days(week_plan):
+                    store_week_plan(onboarding, week_plan)
+
+    created_plans = []
+    try:
+        today, week_start_date = current_week_start()
+        plan_version_id = new_plan_version()
+
+        for day_plan in week_plan:
+            db_plan = build_plan_row(current_user.id, day_plan, today, week_start_date, plan_version_id)
+            if db_plan is None:
+                continue
             db.add(db_plan)
             created_plans.append(db_plan)
 
-        if not created_plans:
+        if created_plans:
+            supersede_current_plans(db, current_user.id, plan_version_id)
+        else:
             logger.warning("No valid days saved")
 
         db.commit()
@@ -170,4 +447,209 @@ def generate_workout_plan_service(
     except Exception as e:
         db.rollback()
         logger.error(f"DB error: {str(e)}")
-        raise RuntimeError(f"Failed to save plans: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to save plans: {str(e)}")
+
+
+def _current_rows(db: Session, user_id: int) -> Dict[str, WorkoutPlan]:
+    """The user's current plan row per weekday (ix_workout_plans_current)."""
+    rows = db.query(WorkoutPlan).filter(
+        WorkoutPlan.user_id == user_id,
+        WorkoutPlan.is_current.is_(True)
+    ).order_by(WorkoutPlan.id).all()
+    return {row.day: row for row in rows}
+
+
+def sanitize_instructions(text: str | None) -> str:
+    """
+    User wishes for DAY_REGENERATION_PROMPT: one line, without braces, brackets,
+    quotes or backticks, so they cannot open JSON or close the delimited block.
+    """
+    if not text:
+        return ""
+    cleaned = re.sub(r"[{}\[\]<>`\"]", " ", text)
+    return " ".join(cleaned.split())[:INSTRUCTIONS_MAX_CHARS]
+
+
+def build_day_prompt(
+    current_user: User,
+    onboarding: Onboarding,
+    db: Session,
+    days: List[str],
+    existing: Dict[str, WorkoutPlan],
+    instructions: str | None = None
+) -> tuple[str, PlanContext]:
+    """DAY_REGENERATION_PROMPT for `days`, with the rest of the week summarized to keep the plan balanced."""
+    context = retrieve_plan_context(current_user, onboarding, db, PLAN_DAY_CONTEXT_TOKEN_BUDGET)
+    other_days = [
+        f"- {name}: {existing[name].muscle_group}"
+        for name in WEEK_DAYS if name in existing and name not in days
+    ]
+    return DAY_REGENERATION_PROMPT.format(
+        **profile_fields(onboarding),
+        days=", ".join(days),
+        context_header=CONTEXT_HEADER,
+        context=context.table,
+        week_summary="\n".join(other_days) or "- (no other days planned)",
+        instructions=sanitize_instructions(instructions) or "(none)"
+    ), context
+
+
+def regenerate_workout_days_service(
+    current_user: User,
+    db: Session,
+    days: List[str],
+    instructions: str | None = None,
+    engine: str | None = None
+) -> List[WorkoutPlanOut]:
+    """
+    Regenerate only `days` of the current plan and upsert them: the current row
+    for each day is updated in place (new rows only for days without one), so
+    ids referenced by sessions stay valid and the week keeps one row per day.
+
+    The LLM prompt covers just these days, with a smaller exercise table.
+    """
+    if not current_user.onboarding or not current_user.onboarding.is_onboarded:
+        raise ValueError("User must complete onboarding first.")
+
+    days = [name for name in WEEK_DAYS if name in set(days)]
+    if not days:
+        raise ValueError(f"Days must be among: {', '.join(WEEK_DAYS)}")
+
+    onboarding = current_user.onboarding
+    engine = resolve_plan_engine(db, current_user.id, engine)
+    today, week_start_date = current_week_start()
+    existing = _current_rows(db, current_user.id)
+    if not existing and backfill_current_plans(db, current_user.id):
+        # rows from before versioning; without this the new days would hide the rest of the week
+        existing = _current_rows(db, current_user.id)
+
+    day_plans = None
+    if engine == "llm":
+        try:
+            formatted_prompt, context = build_day_prompt(current_user, onboarding, db, days, existing, instructions)
+            day_plans = request_week_days(formatted_prompt, context, days)
+        except (ValueError, RuntimeError) as e:
+            if not PLAN_ENGINE_RULES_FALLBACK:
+                raise
+            logger.warning(f"LLM day regeneration failed for user {current_user.id}, using rule-based plan: {e}")
+    if day_plans is None:
+        day_plans = [day for day in build_rule_based_week_plan(db, onboarding) if day["day"] in days]
+
+    # Regenerated days join the current version; without one they start a new version
+    versions = {row.plan_version_id for row in existing.values()}
+    plan_version_id = versions.pop() if len(versions) == 1 and None not in versions else new_plan_version()
+
+    saved = []
+    try:
+        for day_plan in day_plans:
+            new_row = build_plan_row(current_user.id, day_plan, today, week_start_date, plan_version_id)
+            if new_row is None:
+                continue
+            row = existing.get(new_row.day)
+            if row is None:
+                db.add(new_row)
+                row = new_row
+            else:
+                for field in ("week", "plan_datetime", "muscle_group", "duration", "exercises", "warm_up", "cool_down",
+                              "status", "generated_at", "plan_version_id"):
+                    setattr(row, field, getattr(new_row, field))
+                row.admin_edited = False
+            saved.append(row)
+
+        if saved:
+            supersede_current_plans(db, current_user.id, plan_version_id)
+
+        db.commit()
+        for row in saved:
+            db.refresh(row)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"DB error: {str(e)}")
+        raise RuntimeError(f"Failed to save plans: {str(e)}")
+
+    logger.info(f"Regenerated {[row.day for row in saved]} for user {current_user.id} ({engine})")
+    return [WorkoutPlanOut.from_orm(row) for row in saved]
+
+
+def stream_workout_plan_service(
+    current_user: User,
+    db: Session,
+    engine: str | None = None
+) -> Iterator[Tuple[str, dict]]:
+    """
+    Streaming counterpart of generate_workout_plan_service.
+
+    Validation, engine selection, the plan cache lookup (or the rule-based plan)
+    and retrieval run eagerly, so errors surface before the response starts. The
+    returned generator then yields ("day", WorkoutPlanOut dict) for each day as
+    it is parsed and saved, followed by
+    ("done", {...}) or ("error", {...}). Rows are committed one day at a time in
+    the generator's own session, since it outlives the request's session; the
+    new version only becomes current once the last day is saved.
+    """
+    if not current_user.onboarding or not current_user.onboarding.is_onboarded:
+        raise ValueError("User must complete onboarding first.")
+
+    onboarding = current_user.onboarding
+    user_id = current_user.id
+    engine = resolve_plan_engine(db, user_id, engine)
+
+    formatted_prompt = None
+    if engine == "rules":
+        days = iter(build_rule_based_week_plan(db, onboarding))
+    else:
+        cached_plan = get_cached_week_plan(onboarding)
+        if cached_plan is not None:
+            logger.info(f"Plan cache hit for user {user_id}")
+            days = iter(cached_plan)
+        else:
+            formatted_prompt, context = build_workout_prompt(current_user, onboarding, db)
+            days = stream_week_plan(formatted_prompt, context)
+
+    # The onboarding row belongs to the request's session, so take the key now
+    cache_key = profile_cache_key(onboarding)
+
+    def events() -> Iterator[Tuple[str, dict]]:
+        db = seasionlocal()
+        week_plan = []
+        saved = 0
+        plan_version_id = new_plan_version()
+        try:
+            today, week_start_date = current_week_start()
+            for day_plan in days:
+                week_plan.append(day_plan)
+                db_plan = build_plan_row(user_id, day_plan, today, week_start_date, plan_version_id)
+                if db_plan is None:
+                    continue
+                # the new week stays hidden until its last day is saved, so a broken
+                # stream leaves the previous version current
+                db_plan.is_current = False
+                db.add(db_plan)
+                db.commit()
+                db.refresh(db_plan)
+                saved += 1
+                yield "day", WorkoutPlanOut.from_orm(db_plan).model_dump(mode="json")
+
+            # only a complete week is cached; a truncated stream would be served to the whole profile bucket
+            if formatted_prompt is not None and week_plan and not missing_days(week_plan):
+                store_week_plan_for_key(cache_key, week_plan)
+            if saved:
+                activate_plan_version(db, user_id, plan_version_id)
+                db.commit()
+                create_notification(
+                    db,
+                    NotificationCreate(message="New workout plan generated! Check your plan now."),
+                    user_id
+                )
+
+            logger.info(f"Streamed and saved {saved} plans for user {user_id}")
+            yield "done", {"saved": saved, "engine": engine, "cached": engine == "llm" and formatted_prompt is None}
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Streaming generation failed for user {user_id}: {e}")
+            yield "error", {"detail": str(e), "saved": saved}
+        finally:
+            db.close()
+
+    return events()
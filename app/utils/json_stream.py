@@ -0,0 +1,101 @@
+import json
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStreamParser:
+    """
+    Incrementally pulls complete objects out of a JSON array that is still
+    being streamed, e.g. the "week_plan" list of an LLM response:
+
+        parser = JsonArrayStreamParser("week_plan")
+        for chunk in stream:
+            for day in parser.feed(chunk):
+                ...
+
+    Only brace depth and string/escape state are tracked, so each character
+    is scanned once; an object is handed to json.loads when its closing brace arrives.
+    """
+
+    def __init__(self, array_key: str):
+        self._key = f'"{array_key}"'
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start: int | None = None
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing bracket of the array has been seen."""
+        return self._done
+
+    def feed(self, chunk: str) -> List[dict]:
+        self._buffer += chunk
+        items: List[dict] = []
+
+        if not self._in_array and not self._done:
+            if not self._find_array_start():
+                return items
+
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer) and not self._done:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    item = self._parse(buffer[self._object_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._object_start = None
+            elif ch == "]" and self._depth == 0:
+                self._done = True
+            i += 1
+
+        # Drop everything before the object in progress so the buffer stays small
+        keep_from = self._object_start if self._object_start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._object_start is not None:
+            self._object_start = 0
+        return items
+
+    def _find_array_start(self) -> bool:
+        key_at = self._buffer.find(self._key)
+        if key_at == -1:
+            return False
+        bracket_at = self._buffer.find("[", key_at + len(self._key))
+        if bracket_at == -1:
+            return False
+        self._in_array = True
+        self._buffer = self._buffer[bracket_at + 1:]
+        self._pos = 0
+        return True
+
+    @staticmethod
+    def _parse(text: str) -> dict | None:
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping unparseable streamed item: {e}")
+            return None
+        return item if isinstance(item, dict) else None
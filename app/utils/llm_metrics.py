@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from prometheus_client import Counter, Histogram
+
+from ..config import LLM_LOG_SAMPLE_RATE, LLM_LOG_PATH
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens; unknown models are counted at zero cost
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency, including queueing and retries",
+    ["caller", "model", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),
+)
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "LLM calls by outcome: ok, coalesced (shared another call's result) or the error class",
+    ["caller", "model", "outcome"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported in response.usage",
+    ["caller", "model", "kind"],
+)
+LLM_COST = Counter(
+    "llm_cost_usd_total",
+    "Estimated spend from token usage and MODEL_PRICES",
+    ["caller", "model"],
+)
+CACHE_LOOKUPS = Counter(
+    "llm_cache_lookups_total",
+    "Lookups in caches that stand in front of LLM calls",
+    ["cache", "result"],
+)
+
+_log_lock = threading.Lock()
+
+
+def record_llm_call(
+    caller: str,
+    model: str,
+    seconds: float,
+    outcome: str = "ok",
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0
+) -> None:
+    LLM_LATENCY.labels(caller, model, outcome).observe(seconds)
+    LLM_REQUESTS.labels(caller, model, outcome).inc()
+    if prompt_tokens or completion_tokens:
+        LLM_TOKENS.labels(caller, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(caller, model, "completion").inc(completion_tokens)
+        prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        LLM_COST.labels(caller, model).inc((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def should_log_sample() -> bool:
+    return LLM_LOG_SAMPLE_RATE > 0 and random.random() < LLM_LOG_SAMPLE_RATE
+
+
+def log_llm_sample(caller: str, model: str, messages: list, output: str | None, seconds: float, outcome: str) -> None:
+    """Append one call to the JSONL sample log (LLM_LOG_PATH) for offline analysis."""
+    record = {
+        "ts": time.time(),
+        "caller": caller,
+        "model": model,
+        "outcome": outcome,
+        "latency_seconds": round(seconds, 4),
+        "messages": messages,
+        "output": output,
+    }
+    try:
+        directory = os.path.dirname(LLM_LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False)
+        with _log_lock, open(LLM_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write LLM sample log: {e}")
@@ -0,0 +1,70 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Checkout wait-time histogram and timeout counter for one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)  # last bucket is +Inf
+        self._wait_sum = 0.0
+        self._checkouts = 0
+        self._timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound), len(WAIT_BUCKETS))
+        with self._lock:
+            self._bucket_counts[index] += 1
+            self._wait_sum += seconds
+            self._checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self, pool: Pool) -> dict:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(list(WAIT_BUCKETS) + ["+Inf"], self._bucket_counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+
+            return {
+                "pool": self.name,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "checkouts": self._checkouts,
+                "checkout_timeouts": self._timeouts,
+                "wait_seconds_sum": round(self._wait_sum, 6),
+                "wait_seconds_buckets": buckets,
+            }
+
+
+def instrumented_pool_class(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    """
+    Subclass `base` so every checkout is timed into `metrics`.
+    Metrics live on the class, so pools recreated by SQLAlchemy (dispose, invalidation) keep reporting.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+    return type(f"Instrumented{base.__name__}", (base,), {"metrics": metrics, "_do_get": _do_get})
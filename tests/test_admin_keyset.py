@@ -0,0 +1,26 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.admin_dashboard import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 3, 14, 9, 26, 53, 589793)
+
+    assert _decode_cursor(_encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_cursor_is_url_safe():
+    cursor = _encode_cursor(datetime(2026, 1, 1, 23, 59, 59), 10 ** 9)
+
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bm90LWEtZGF0ZXw0Mg==", "MjAyNi0wMS0wMXxhYmM=", "//79"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        _decode_cursor(cursor)
+
+    assert raised.value.status_code == 400
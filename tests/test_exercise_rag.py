@@ -0,0 +1,172 @@
+import pytest
+
+from app.services import exercise_rag as rag
+from app.services.exercise_index_sync import SOURCE_DB, exercise_db_doc_id
+
+
+class FakeVectorStore:
+    """The slice of the Chroma API the indexer uses."""
+
+    def __init__(self, ids=()):
+        self.docs = dict.fromkeys(ids)
+        self.added = []
+
+    def get(self, include):
+        return {"ids": list(self.docs)}
+
+    def add_documents(self, documents, ids):
+        self.added.extend(ids)
+        self.docs.update(zip(ids, documents))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    vectorstore = FakeVectorStore()
+    monkeypatch.setattr(rag, "CHROMA_PERSIST_DIR", str(tmp_path))
+    monkeypatch.setattr(rag, "MANIFEST_PATH", str(tmp_path / "index_manifest.json"))
+    monkeypatch.setattr(rag, "LOCK_PATH", str(tmp_path / "index.lock"))
+    monkeypatch.setattr(rag, "get_vectorstore", lambda: vectorstore)
+    monkeypatch.setattr(rag, "bump_index_version", lambda: "v1")
+    return vectorstore
+
+
+def documents(source=rag.SOURCE_CSV, **descriptions) -> dict:
+    rows = [{"name": name.replace("_", " "), "description": text} for name, text in descriptions.items()]
+    return dict(rag.build_exercise_document(row, source) for row in rows)
+
+
+def test_partition_splits_new_changed_and_unchanged():
+    docs = documents(squat="legs", bench="chest", row="back")
+    manifest = {
+        "exercise:squat": {"hash": docs["exercise:squat"].metadata["content_hash"]},
+        "exercise:bench": {"hash": "outdated"},
+    }
+
+    changed, added, unchanged = rag._partition(docs, manifest)
+
+    assert set(changed) == {"exercise:bench", "exercise:row"}
+    assert (added, unchanged) == (1, 1)
+
+
+def test_content_hash_covers_metadata():
+    plain = documents(squat="legs")["exercise:squat"]
+    graded = rag.build_exercise_document({"name": "squat", "description": "legs", "skill_level": "High"}, rag.SOURCE_CSV)[1]
+
+    assert plain.metadata["content_hash"] != graded.metadata["content_hash"]
+
+
+def test_sync_embeds_only_what_changed(store):
+    assert rag.sync_documents(documents(squat="legs", bench="chest"), rag.SOURCE_CSV)["added"] == 2
+    store.added.clear()
+
+    stats = rag.sync_documents(documents(squat="legs", bench="chest press", row="back"), rag.SOURCE_CSV)
+
+    assert (stats["added"], stats["updated"], stats["unchanged"], stats["deleted"]) == (1, 1, 1, 0)
+    assert sorted(store.added) == ["exercise:bench", "exercise:row"]
+
+
+def test_unchanged_sync_does_not_publish(store):
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+
+    assert "index_version" not in rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+
+
+def test_sync_deletes_documents_gone_from_the_source(store):
+    rag.sync_documents(documents(squat="legs", bench="chest"), rag.SOURCE_CSV)
+
+    stats = rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+
+    assert stats["deleted"] == 1
+    assert set(store.docs) == {"exercise:squat"}
+    assert set(rag.load_manifest()) == {"exercise:squat"}
+
+
+def test_sync_leaves_other_sources_alone(store):
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+    rag.sync_documents({exercise_db_doc_id(1): documents(SOURCE_DB, lunge="legs")["exercise:lunge"]}, SOURCE_DB)
+
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV, full=True)
+
+    assert set(store.docs) == {"exercise:squat", exercise_db_doc_id(1)}
+    assert rag.load_manifest()[exercise_db_doc_id(1)]["source"] == SOURCE_DB
+
+
+def test_full_sync_reembeds_the_source(store):
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+    store.added.clear()
+
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV, full=True)
+
+    assert store.added == ["exercise:squat"]
+
+
+def test_sync_removes_untracked_legacy_documents(store):
+    store.docs.update(dict.fromkeys(["3f2a-random-uuid", "9b1c-random-uuid"]))
+
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+
+    assert set(store.docs) == {"exercise:squat"}
+
+
+def test_unreadable_manifest_counts_as_empty(store):
+    with open(rag.MANIFEST_PATH, "w") as f:
+        f.write("{not json")
+
+    assert rag.load_manifest() == {}
+
+
+def db_documents(**descriptions) -> dict:
+    """Documents as exercise_index_sync builds them, keyed by primary key (1, 2, ...)."""
+    docs = documents(SOURCE_DB, **descriptions).values()
+    return {exercise_db_doc_id(pk): doc for pk, doc in enumerate(docs, 1)}
+
+
+def test_upsert_is_skipped_until_the_csv_is_indexed(store):
+    store.docs.update(dict.fromkeys(["3f2a-random-uuid"]))
+
+    assert rag.upsert_documents(db_documents(lunge="legs"), SOURCE_DB) == 0
+    assert set(store.docs) == {"3f2a-random-uuid"}
+    assert rag.load_manifest() == {}
+
+
+def test_upsert_embeds_changed_documents_only(store):
+    rag.sync_documents(documents(squat="legs"), rag.SOURCE_CSV)
+
+    assert rag.upsert_documents(db_documents(lunge="legs"), SOURCE_DB) == 1
+    assert rag.upsert_documents(db_documents(lunge="legs"), SOURCE_DB) == 0
+    assert set(store.docs) == {"exercise:squat", exercise_db_doc_id(1)}
+
+
+def test_database_exercise_replaces_csv_row_of_the_same_name(store):
+    rag.sync_documents(documents(back_squat="legs", bench="chest"), rag.SOURCE_CSV)
+
+    rag.upsert_documents(db_documents(Back_Squat="edited by an admin"), SOURCE_DB)
+
+    assert set(store.docs) == {"exercise:bench", exercise_db_doc_id(1)}
+    assert "exercise:back-squat" not in rag.load_manifest()
+
+
+def test_csv_sync_skips_exercises_owned_by_the_database(store):
+    rag.sync_documents(documents(back_squat="legs"), rag.SOURCE_CSV)
+    rag.sync_documents(db_documents(back_squat="edited by an admin"), SOURCE_DB)
+    store.added.clear()
+
+    stats = rag.sync_documents(documents(back_squat="legs", bench="chest"), rag.SOURCE_CSV)
+
+    assert store.added == ["exercise:bench"]
+    assert stats["added"] == 1
+    assert set(store.docs) == {"exercise:bench", exercise_db_doc_id(1)}
+
+
+def test_manifest_entries_without_name_id_are_backfilled(store):
+    docs = documents(squat="legs")
+    rag.save_manifest({"exercise:squat": {"hash": docs["exercise:squat"].metadata["content_hash"], "source": rag.SOURCE_CSV}})
+
+    rag.sync_documents(docs, rag.SOURCE_CSV)
+
+    assert rag.load_manifest()["exercise:squat"]["name_id"] == "exercise:squat"
+    assert store.added == []
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.generation_job_model import WorkoutGenerationJob
+from app.models.user_model import User
+from app.services import generation_jobs as jobs
+from app.config import WORKOUT_GENERATION_JOB_TIMEOUT_SECONDS
+
+LONG_AGO = timedelta(seconds=WORKOUT_GENERATION_JOB_TIMEOUT_SECONDS + 60)
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    WorkoutGenerationJob.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(jobs, "seasionlocal", factory)
+    monkeypatch.setattr(jobs, "create_notification", lambda *args, **kwargs: None)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    session.add(User(id=1, email="athlete@example.com", name="Athlete", password="x", created_at=datetime.utcnow()))
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_job(db, status, created_at=None, started_at=None, job_id="job1"):
+    db.add(WorkoutGenerationJob(
+        id=job_id,
+        user_id=1,
+        status=status,
+        created_at=created_at or datetime.utcnow(),
+        started_at=started_at
+    ))
+    db.commit()
+
+
+def test_old_pending_job_is_failed_on_poll(db):
+    add_job(db, jobs.JOB_PENDING, created_at=datetime.utcnow() - LONG_AGO)
+
+    job = jobs.get_generation_job(db, "job1", user_id=1)
+
+    assert job.status == jobs.JOB_FAILED
+    assert job.error == jobs.STALE_JOB_ERROR
+    assert job.finished_at is not None
+
+
+def test_running_job_ages_from_started_at(db):
+    # queued for a long time, but a worker picked it up just now
+    add_job(db, jobs.JOB_RUNNING, created_at=datetime.utcnow() - LONG_AGO, started_at=datetime.utcnow())
+
+    assert jobs.get_generation_job(db, "job1", user_id=1).status == jobs.JOB_RUNNING
+
+
+def test_running_job_past_timeout_is_failed(db):
+    add_job(db, jobs.JOB_RUNNING, created_at=datetime.utcnow() - LONG_AGO, started_at=datetime.utcnow() - LONG_AGO)
+
+    assert jobs.get_generation_job(db, "job1", user_id=1).status == jobs.JOB_FAILED
+
+
+def test_other_users_job_is_not_returned(db):
+    add_job(db, jobs.JOB_PENDING)
+
+    assert jobs.get_generation_job(db, "job1", user_id=2) is None
+
+
+def test_fail_stale_jobs_only_touches_old_jobs(db):
+    add_job(db, jobs.JOB_PENDING, created_at=datetime.utcnow() - LONG_AGO, job_id="old")
+    add_job(db, jobs.JOB_PENDING, job_id="recent")
+    add_job(db, jobs.JOB_COMPLETED, created_at=datetime.utcnow() - LONG_AGO, job_id="done")
+
+    assert jobs.fail_stale_jobs() == 1
+
+    db.expire_all()
+    assert {job.id: job.status for job in db.query(WorkoutGenerationJob)} == {
+        "old": jobs.JOB_FAILED,
+        "recent": jobs.JOB_PENDING,
+        "done": jobs.JOB_COMPLETED,
+    }
+
+
+def test_transition_is_compare_and_set(db):
+    add_job(db, jobs.JOB_FAILED)
+
+    assert not jobs._transition(db, "job1", jobs.JOB_RUNNING, {WorkoutGenerationJob.status: jobs.JOB_COMPLETED})
+    assert jobs._transition(db, "job1", jobs.JOB_FAILED, {WorkoutGenerationJob.status: jobs.JOB_PENDING})
+    assert not jobs._transition(db, "missing", jobs.JOB_PENDING, {WorkoutGenerationJob.status: jobs.JOB_RUNNING})
+
+
+def run_job(monkeypatch, generate):
+    monkeypatch.setattr(jobs, "generate_workout_plan_service", generate)
+    jobs._slots.acquire()  # released by the worker, as after enqueue_generation_job
+    jobs._run_generation_job("job1", 1)
+
+
+def test_worker_completes_pending_job(db, monkeypatch):
+    add_job(db, jobs.JOB_PENDING)
+
+    run_job(monkeypatch, lambda user, session, engine: [SimpleNamespace(id=7), SimpleNamespace(id=8)])
+
+    db.expire_all()
+    job = db.get(WorkoutGenerationJob, "job1")
+    assert job.status == jobs.JOB_COMPLETED
+    assert job.plan_ids == [7, 8]
+    assert job.started_at is not None and job.finished_at is not None
+
+
+def test_worker_skips_job_that_is_no_longer_pending(db, monkeypatch):
+    add_job(db, jobs.JOB_FAILED)
+    calls = []
+
+    run_job(monkeypatch, lambda *args: calls.append(args) or [])
+
+    assert calls == []
+    db.expire_all()
+    assert db.get(WorkoutGenerationJob, "job1").status == jobs.JOB_FAILED
+
+
+def test_worker_does_not_complete_job_failed_meanwhile(db, session_factory, monkeypatch):
+    add_job(db, jobs.JOB_PENDING)
+
+    def generate(user, session, engine):
+        # a poll times the job out while the plan is still being generated
+        other = session_factory()
+        jobs._transition(other, "job1", jobs.JOB_RUNNING, jobs._failed_values(jobs.STALE_JOB_ERROR))
+        other.close()
+        return [SimpleNamespace(id=7)]
+
+    run_job(monkeypatch, generate)
+
+    db.expire_all()
+    job = db.get(WorkoutGenerationJob, "job1")
+    assert job.status == jobs.JOB_FAILED
+    assert job.plan_ids is None
+
+
+def test_worker_records_generation_error(db, monkeypatch):
+    add_job(db, jobs.JOB_PENDING)
+
+    def generate(user, session, engine):
+        raise ValueError("LLM returned nothing")
+
+    run_job(monkeypatch, generate)
+
+    db.expire_all()
+    job = db.get(WorkoutGenerationJob, "job1")
+    assert job.status == jobs.JOB_FAILED
+    assert job.error == "LLM returned nothing"
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JsonArrayStreamParser
+
+DAYS = [
+    {"day": "Monday", "muscle_group": "Upper {push}", "exercises": ["E1", "E2"]},
+    {"day": "Tuesday", "muscle_group": "Rest", "warm_up": "say \"hi\" \\ then ] stretch"},
+    {"day": "Wednesday", "nested": {"sets": [{"reps": 5}, {"reps": 3}]}},
+]
+PAYLOAD = json.dumps({"notes": "key \"week_plan\" appears later", "week_plan": DAYS, "tail": {"x": 1}})
+
+
+def feed_in_chunks(text: str, size: int) -> tuple[list, JsonArrayStreamParser]:
+    parser = JsonArrayStreamParser("week_plan")
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items, parser
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(PAYLOAD)])
+def test_objects_are_emitted_whatever_the_chunking(size):
+    items, parser = feed_in_chunks(PAYLOAD, size)
+
+    assert items == DAYS
+    assert parser.finished
+
+
+def test_each_object_is_emitted_when_its_closing_brace_arrives():
+    parser = JsonArrayStreamParser("week_plan")
+    first = json.dumps(DAYS[0])
+
+    assert parser.feed('{"week_plan": [' + first[:-1]) == []
+    assert parser.feed("}") == [DAYS[0]]
+    assert parser.feed(", ") == []
+    assert not parser.finished
+
+
+def test_truncated_stream_keeps_complete_objects():
+    text = json.dumps({"week_plan": DAYS})
+    cut = text.index('{"day": "Wednesday"') + 20
+
+    items, parser = feed_in_chunks(text[:cut], 5)
+
+    assert items == DAYS[:2]
+    assert not parser.finished
+
+
+def test_malformed_object_is_skipped():
+    items, _ = feed_in_chunks('{"week_plan": [{"day": "Monday",}, {"day": "Tuesday"}]}', 4)
+
+    assert items == [{"day": "Tuesday"}]
+
+
+def test_nothing_is_emitted_without_the_array_key():
+    items, parser = feed_in_chunks(json.dumps({"plan": DAYS}), 8)
+
+    assert items == []
+    assert not parser.finished
+
+
+def test_input_after_the_array_is_ignored():
+    parser = JsonArrayStreamParser("week_plan")
+
+    assert parser.feed('{"week_plan": [{"a": 1}]') == [{"a": 1}]
+    assert parser.finished
+    assert parser.feed(', "extra": [{"b": 2}]}') == []
@@ -0,0 +1,198 @@
+import threading
+
+import pytest
+
+from app.services import llm_gateway
+from app.services.llm_gateway import LLMError, LLMGateway, LLMResponse, LLMTimeoutError, StubBackend
+from app.services.week_plan_parser import parse_week_plan
+
+MESSAGES = [{"role": "user", "content": "Give me a recovery tip"}]
+
+
+class Retryable(Exception):
+    pass
+
+
+class FakeBackend:
+    """Answers from a script of results (exceptions are raised); counts calls."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def complete(self, request, timeout):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        result = self.script.pop(0) if self.script else "ok"
+        if isinstance(result, Exception):
+            raise result
+        return LLMResponse(text=result, model=request.model)
+
+    @staticmethod
+    def is_retryable(error):
+        return isinstance(error, Retryable)
+
+
+class SignallingDict(dict):
+    """Sets `joined` when a caller finds a request already in flight."""
+
+    def __init__(self):
+        super().__init__()
+        self.joined = threading.Event()
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        if value is not None:
+            self.joined.set()
+        return value
+
+
+def gateway(backend, **kwargs) -> LLMGateway:
+    kwargs.setdefault("retry_base", 0)
+    return LLMGateway(backend, **kwargs)
+
+
+def run_in_thread(call) -> tuple[threading.Thread, dict]:
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = call()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def coalesce_two_calls(backend, first_messages=MESSAGES, second_messages=MESSAGES):
+    llm = gateway(backend)
+    llm._inflight = SignallingDict()
+    backend.release.clear()
+
+    leader, leader_outcome = run_in_thread(lambda: llm.complete(first_messages, "model-a"))
+    assert backend.entered.wait(5)
+    follower, follower_outcome = run_in_thread(lambda: llm.complete(second_messages, "model-a"))
+    joined = llm._inflight.joined.wait(0.5)
+    backend.release.set()
+    leader.join(5)
+    follower.join(5)
+    return joined, leader_outcome, follower_outcome
+
+
+def test_identical_requests_in_flight_share_one_call():
+    backend = FakeBackend("shared answer")
+
+    joined, leader, follower = coalesce_two_calls(backend)
+
+    assert joined
+    assert backend.calls == 1
+    assert leader["result"] is follower["result"]
+    assert follower["result"].text == "shared answer"
+
+
+def test_different_requests_are_not_coalesced():
+    backend = FakeBackend("first", "second")
+    other = [{"role": "user", "content": "Another tip"}]
+
+    joined, leader, follower = coalesce_two_calls(backend, second_messages=other)
+
+    assert not joined
+    assert backend.calls == 2
+    assert {leader["result"].text, follower["result"].text} == {"first", "second"}
+
+
+def test_followers_get_the_leaders_error():
+    backend = FakeBackend(ValueError("bad request"))
+
+    joined, leader, follower = coalesce_two_calls(backend)
+
+    assert joined
+    assert backend.calls == 1
+    assert isinstance(leader["error"], LLMError)
+    assert follower["error"] is leader["error"]
+
+
+def test_finished_requests_are_not_reused():
+    backend = FakeBackend("first", "second")
+    llm = gateway(backend)
+
+    assert llm.complete(MESSAGES, "model-a").text == "first"
+    assert llm.complete(MESSAGES, "model-a").text == "second"
+    assert llm._inflight == {}
+
+
+def test_retryable_errors_are_retried():
+    backend = FakeBackend(Retryable("429"), Retryable("503"), "recovered")
+
+    assert gateway(backend, max_retries=2).complete(MESSAGES, "model-a").text == "recovered"
+    assert backend.calls == 3
+
+
+def test_retries_are_bounded():
+    backend = FakeBackend(*[Retryable("503")] * 5)
+
+    with pytest.raises(LLMError, match="Retryable: 503") as raised:
+        gateway(backend, max_retries=2).complete(MESSAGES, "model-a")
+
+    assert backend.calls == 3
+    assert isinstance(raised.value.__cause__, Retryable)
+
+
+def test_other_errors_are_not_retried():
+    backend = FakeBackend(ValueError("invalid model"), "never reached")
+
+    with pytest.raises(LLMError, match="ValueError: invalid model"):
+        gateway(backend, max_retries=3).complete(MESSAGES, "model-a")
+
+    assert backend.calls == 1
+
+
+def test_backoff_past_the_deadline_times_out(monkeypatch):
+    monkeypatch.setattr(llm_gateway.random, "uniform", lambda low, high: high)
+    backend = FakeBackend(Retryable("429"), "too late")
+
+    with pytest.raises(LLMTimeoutError):
+        gateway(backend, retry_base=10).complete(MESSAGES, "model-a", timeout=1)
+
+    assert backend.calls == 1
+
+
+def test_full_slots_time_out():
+    backend = FakeBackend()
+    llm = gateway(backend, max_concurrency=1)
+    backend.release.clear()
+    holder, _ = run_in_thread(lambda: llm.complete(MESSAGES, "model-a"))
+    assert backend.entered.wait(5)
+
+    try:
+        with pytest.raises(LLMTimeoutError):
+            llm.complete([{"role": "user", "content": "queued"}], "model-a", timeout=0.1)
+    finally:
+        backend.release.set()
+        holder.join(5)
+
+
+def test_stream_releases_its_slot_when_closed_early():
+    llm = gateway(StubBackend(latency=0), max_concurrency=1)
+
+    deltas = llm.stream(MESSAGES, "model-a")
+    next(deltas)
+    deltas.close()
+
+    assert "".join(llm.stream(MESSAGES, "model-a", timeout=1)) == llm.complete(MESSAGES, "model-a").text
+
+
+def test_stub_plan_uses_the_prompt_exercise_ids():
+    prompt = "id|name\nE3|Squat\nE7|Bench\n"
+    response = gateway(StubBackend(latency=0)).complete([{"role": "user", "content": prompt}], "model-a", json_mode=True)
+
+    days = parse_week_plan(response.text)
+
+    assert len(days) == 7
+    assert days[0]["exercises"] == ["E3", "E7"]
@@ -0,0 +1,139 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.services import numpy_index
+from app.services.numpy_index import NumpyExerciseIndex, _matches, export_numpy_index
+
+
+class FakeVectorStore:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get(self, include):
+        return {
+            "ids": [name for name, _, _ in self.rows],
+            "embeddings": [vector for _, vector, _ in self.rows],
+            "documents": [name for name, _, _ in self.rows],
+            "metadatas": [metadata for _, _, metadata in self.rows],
+        }
+
+
+ROWS = [
+    ("squat", [1.0, 0.0, 0.0], {"sport_category": "football", "skill_rank": 1, "movement_pattern": "squat"}),
+    ("front squat", [0.9, 0.1, 0.0], {"sport_category": "football", "skill_rank": 2, "movement_pattern": "squat"}),
+    ("lunge", [0.7, 0.0, 0.7], {"sport_category": "soccer", "skill_rank": 0, "movement_pattern": "lunge"}),
+    ("bench", [0.0, 1.0, 0.0], {"sport_category": "both", "skill_rank": 1, "movement_pattern": "push"}),
+]
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    monkeypatch.setattr(numpy_index, "NUMPY_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(numpy_index, "EMBEDDINGS_PATH", str(tmp_path / "embeddings.npy"))
+    monkeypatch.setattr(numpy_index, "DOCUMENTS_PATH", str(tmp_path / "documents.json"))
+
+    def write(rows=ROWS):
+        count = export_numpy_index(FakeVectorStore(rows))
+        # a new export must look newer even on coarse-grained filesystem clocks
+        stat = os.stat(numpy_index.DOCUMENTS_PATH)
+        os.utime(numpy_index.DOCUMENTS_PATH, ns=(stat.st_atime_ns, stat.st_mtime_ns + count + 1))
+        return count
+    return write
+
+
+def names(documents) -> list:
+    return [doc.page_content for doc in documents]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_search_returns_nearest_first(export, mmap):
+    export()
+    index = NumpyExerciseIndex(mmap=mmap)
+
+    assert names(index.similarity_search_by_vector([2.0, 0.1, 0.0], k=2)) == ["squat", "front squat"]
+    assert names(index.similarity_search_by_vector([0.0, 1.0, 0.0], k=10))[0] == "bench"
+
+
+def test_search_applies_filters(export):
+    export()
+    index = NumpyExerciseIndex()
+
+    football = index.similarity_search_by_vector([1.0, 0.0, 0.0], k=4, filter={"sport_category": "football"})
+    easy = index.similarity_search_by_vector([1.0, 0.0, 0.0], k=4, filter={"$and": [
+        {"sport_category": {"$in": ["football", "soccer"]}},
+        {"skill_rank": {"$lte": 1}},
+    ]})
+
+    assert names(football) == ["squat", "front squat"]
+    assert names(easy) == ["squat", "lunge"]
+    assert index.similarity_search_by_vector([1.0, 0.0, 0.0], filter={"sport_category": "golf"}) == []
+
+
+def test_mmr_prefers_diverse_results(export):
+    export()
+    index = NumpyExerciseIndex()
+
+    plain = index.similarity_search_by_vector([1.0, 0.05, 0.2], k=2)
+    diverse = index.max_marginal_relevance_search_by_vector([1.0, 0.05, 0.2], k=2, fetch_k=4, lambda_mult=0.3)
+
+    assert names(plain) == ["squat", "front squat"]
+    assert names(diverse)[0] == "squat"
+    assert names(diverse)[1] != "front squat"
+
+
+def test_missing_export_serves_nothing(export):
+    index = NumpyExerciseIndex()
+
+    assert index.similarity_search_by_vector([1.0, 0.0, 0.0]) == []
+    assert index.max_marginal_relevance_search_by_vector([1.0, 0.0, 0.0]) == []
+
+
+def test_new_export_is_picked_up(export):
+    export()
+    index = NumpyExerciseIndex()
+    index.similarity_search_by_vector([1.0, 0.0, 0.0], filter={"movement_pattern": "push"})
+
+    export(ROWS + [("push up", [0.1, 0.9, 0.0], {"movement_pattern": "push"})])
+
+    found = index.similarity_search_by_vector([0.0, 1.0, 0.0], k=4, filter={"movement_pattern": "push"})
+    assert names(found) == ["bench", "push up"]
+
+
+def test_half_written_export_keeps_the_previous_copy(export):
+    export()
+    index = NumpyExerciseIndex()
+    before = index.similarity_search_by_vector([1.0, 0.0, 0.0], k=4)
+
+    # documents.json announces more rows than embeddings.npy holds
+    with open(numpy_index.DOCUMENTS_PATH) as f:
+        data = json.load(f)
+    data["rows"] += 1
+    with open(numpy_index.DOCUMENTS_PATH, "w") as f:
+        json.dump(data, f)
+
+    assert index.similarity_search_by_vector([1.0, 0.0, 0.0], k=4) == before
+
+
+def test_export_normalizes_embeddings(export):
+    export([("a", [3.0, 4.0], {}), ("b", [0.0, 0.0], {})])
+
+    matrix = np.load(numpy_index.EMBEDDINGS_PATH)
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, [[0.6, 0.8], [0.0, 0.0]], rtol=1e-6)
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"sport": "football"}, True),
+    ({"sport": {"$ne": "football"}}, False),
+    ({"rank": {"$gte": 1, "$lt": 2}}, True),
+    ({"rank": {"$gt": 1}}, False),
+    ({"missing": {"$gte": 0}}, False),
+    ({"sport": {"$nin": ["soccer"]}}, True),
+    ({"$or": [{"sport": "soccer"}, {"rank": 1}]}, True),
+    ({"$and": [{"sport": "football"}, {"rank": {"$in": [0, 2]}}]}, False),
+])
+def test_matches_chroma_where_syntax(where, expected):
+    assert _matches({"sport": "football", "rank": 1}, where) is expected
@@ -0,0 +1,55 @@
+import pytest
+
+from app.models.exercise_model import SkillEnum
+from app.models.onboarding_model import Onboarding
+from app.services.rule_based_plan import estimate_skill_level
+
+
+def onboarding(weight_kg=80, **strength_levels) -> Onboarding:
+    return Onboarding(weight_kg=weight_kg, strength_levels=strength_levels)
+
+
+def test_missing_data_is_beginner():
+    assert estimate_skill_level(Onboarding()) == SkillEnum.BEGINNER
+    assert estimate_skill_level(onboarding()) == SkillEnum.BEGINNER
+
+
+def test_unlabelled_1rms_are_read_as_lbs():
+    # 185 lbs bench / 225 lbs squat at 70 kg: ~1.2x and ~1.5x body weight
+    levels = onboarding(70, bench_press_1rm=185, back_squat_1rm=225)
+
+    assert estimate_skill_level(levels) == SkillEnum.INTERMEDIATE
+
+
+@pytest.mark.parametrize("unit, expected", [
+    ("kg", SkillEnum.ADVANCED),
+    ("KG", SkillEnum.ADVANCED),
+    ("lbs", SkillEnum.BEGINNER),
+])
+def test_unit_is_applied_to_1rms(unit, expected):
+    levels = onboarding(80, unit=unit, bench_press_1rm=110, back_squat_1rm=150, deadlift_1rm=180)
+
+    assert estimate_skill_level(levels) == expected
+
+
+def test_implausible_ratios_are_ignored():
+    # 600 kg squat at 80 kg is a typo; only the bench counts
+    levels = onboarding(80, unit="kg", back_squat_1rm=600, bench_press_1rm=50)
+
+    assert estimate_skill_level(levels) == SkillEnum.BEGINNER
+
+
+def test_only_implausible_ratios_fall_back_to_beginner():
+    assert estimate_skill_level(onboarding(80, unit="kg", deadlift_1rm=900)) == SkillEnum.BEGINNER
+
+
+def test_1rms_need_body_weight_but_rep_counts_do_not():
+    levels = onboarding(None, bench_press_1rm=300, pull_up_reps=20, push_up_reps=50)
+
+    assert estimate_skill_level(levels) == SkillEnum.ADVANCED
+
+
+def test_unparseable_and_unknown_entries_are_skipped():
+    levels = onboarding(80, pull_up_reps="lots", plank_seconds=300, push_up_reps="25")
+
+    assert estimate_skill_level(levels) == SkillEnum.INTERMEDIATE
@@ -0,0 +1,64 @@
+import json
+
+from app.services.week_plan_parser import merge_days, missing_days, parse_week_plan, WEEK_DAYS
+
+
+def day(name: str, **fields) -> dict:
+    return {
+        "day": name,
+        "muscle_group": "Full Body",
+        "duration": 60,
+        "exercises": ["E1", "E2"],
+        "warm_up": "5 min bike",
+        "cool_down": "5 min stretch",
+        "status": "Pending",
+        **fields,
+    }
+
+
+def test_valid_payload_is_returned_in_week_order():
+    raw = json.dumps({"week_plan": [day("wednesday"), day("Monday"), day("Monday", duration=30)]})
+
+    days = parse_week_plan(raw)
+
+    assert [d["day"] for d in days] == ["Monday", "Wednesday"]
+    assert days[0]["duration"] == 60  # first Monday wins
+
+
+def test_truncated_output_salvages_complete_days():
+    raw = json.dumps({"week_plan": [day(name) for name in WEEK_DAYS]})
+    cut = raw.index('{"day": "Thursday"') + 30
+
+    days = parse_week_plan(raw[:cut])
+
+    assert [d["day"] for d in days] == ["Monday", "Tuesday", "Wednesday"]
+    assert missing_days(days) == ["Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def test_invalid_days_are_dropped_and_valid_ones_kept():
+    raw = json.dumps({"week_plan": [
+        day("Monday"),
+        day("Tuesday", duration=-5),
+        day("Funday"),
+        day("Thursday", muscle_group=""),
+        day("Friday", warm_up=None),
+    ]})
+
+    days = parse_week_plan(raw)
+
+    assert [d["day"] for d in days] == ["Monday", "Friday"]
+    assert days[1]["warm_up"] == ""
+
+
+def test_unusable_output_returns_no_days():
+    assert parse_week_plan("Sorry, I cannot help with that.") == []
+    assert parse_week_plan('{"week_plan": []}') == []
+
+
+def test_merge_keeps_first_batch_and_fills_gaps():
+    first = [day("Monday", duration=45)]
+    regenerated = [day("Monday", duration=90), day("Tuesday")]
+
+    merged = merge_days(first, regenerated)
+
+    assert [(d["day"], d["duration"]) for d in merged] == [("Monday", 45), ("Tuesday", 60)]